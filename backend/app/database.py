@@ -1,10 +1,15 @@
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, inspect, make_url, text
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 from .config import settings
 
+_url = make_url(settings.database_url)
+if _url.drivername == "postgresql":
+    # SQLAlchemy 2.1 maps a bare postgresql:// to psycopg 3; requirements.txt ships psycopg2.
+    _url = _url.set(drivername="postgresql+psycopg2")
+
 engine = create_engine(
-    settings.database_url,
+    _url,
     # connection_args needed for SQLite only; not needed for PostgreSQL
 )
 
@@ -18,3 +23,31 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+# Nullable columns added to existing tables after their first release, as
+# (table, column, DDL type). migrate() adds the ones a database is missing;
+# tables that do not exist yet get them from Base.metadata.create_all().
+ADDED_COLUMNS: list[tuple[str, str, str]] = [
+    ("character_errors", "position", "INTEGER"),
+    ("character_errors", "spoken", "VARCHAR(4)"),
+]
+
+
+def migrate(bind: Engine = engine) -> list[str]:
+    """
+    Add any ADDED_COLUMNS missing from an existing database. Idempotent.
+
+    Returns the "table.column" names that were added.
+    """
+    added: list[str] = []
+    with bind.begin() as conn:
+        insp = inspect(conn)
+        for table, column, ddl_type in ADDED_COLUMNS:
+            if not insp.has_table(table):
+                continue
+            if column in {c["name"] for c in insp.get_columns(table)}:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+            added.append(f"{table}.{column}")
+    return added
@@ -1,12 +1,52 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.exc import SQLAlchemyError
+
+from . import database
 from .config import settings
-from .routes import stories, learning, users
+from .routes import stories, learning, users, reading, metrics
+from .services import ai_service, question_bank, socratic_agent
+
+logger = logging.getLogger(__name__)
+
+
+async def _migrate_database() -> None:
+    try:
+        added = await asyncio.to_thread(database.migrate)
+    except SQLAlchemyError as e:
+        # The tutor routes run without a database; only persistence is lost.
+        logger.warning("Database migration skipped: %s", e)
+        return
+    if added:
+        logger.info("Database migration added columns: %s", ", ".join(added))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ai_service.init_client()
+    await _migrate_database()
+    question_bank.load_question_bank()
+    warm_task = None
+    if settings.question_bank_warm_on_startup:
+        warm_task = asyncio.create_task(
+            question_bank.warm_question_bank(question_bank.question_bank, question_bank.mock_stories())
+        )
+    yield
+    if warm_task is not None:
+        warm_task.cancel()
+    await ai_service.close_client()
+    await socratic_agent.close_session_store()
+
 
 app = FastAPI(
     title="LingoLeap AI Reading Tutor API",
     description="Backend API for the LingoLeap AI Reading Tutor platform",
     version="0.2.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -20,6 +60,8 @@ app.add_middleware(
 app.include_router(stories.router, prefix="/api")
 app.include_router(learning.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
+app.include_router(reading.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
 
 
 @app.get("/")
@@ -28,6 +28,8 @@ class CharacterError(Base):
     session_id: Mapped[int] = mapped_column(ForeignKey("learning_sessions.id"), nullable=False)
     character: Mapped[str] = mapped_column(String(4), nullable=False)
     error_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    position: Mapped[int | None] = mapped_column(Integer, nullable=True)   # index in the normalised target
+    spoken: Mapped[str | None] = mapped_column(String(4), nullable=True)   # what the STT heard instead
 
     session: Mapped[LearningSession] = relationship(
         "LearningSession", back_populates="character_errors"
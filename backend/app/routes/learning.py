@@ -1,9 +1,14 @@
+import json
 import logging
+from typing import AsyncIterator, Literal
+
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, model_validator
 
 from ..services.ai_service import generate_socratic_question
-from ..services.socratic_agent import socratic_agent
+from ..services.session_store import SessionConflictError, SessionNotFoundError
+from ..services.socratic_agent import AgentResponse, SocraticAgent, socratic_agent
 
 router = APIRouter(tags=["learning"])
 logger = logging.getLogger(__name__)
@@ -122,15 +127,92 @@ async def comprehension_chat(payload: ComprehensionChatRequest):
                 session_id=payload.session_id,
                 student_answer=payload.student_answer,
             )
-    except ValueError as e:
-        status = 429 if "Rate limit" in str(e) else 422
-        raise HTTPException(status_code=status, detail=str(e))
-    except RuntimeError as e:
-        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        logger.error("Comprehension chat error: %s", e)
-        raise HTTPException(status_code=500, detail="AI service error")
+        raise _chat_error(e)
+
+    return _chat_response(result)
+
+
+@router.post("/comprehension/chat/stream")
+async def comprehension_chat_stream(payload: ComprehensionChatRequest):
+    """
+    Server-sent-events variant of /comprehension/chat.
+
+    Events: `feedback` and `question` carry {"text": ...} pieces as the model
+    writes them; the last event is `done` with the same body as
+    /comprehension/chat (authoritative — it may replace streamed text with
+    a fallback), or `error` with {"status", "detail"} if the AI service
+    failed mid-stream. Errors found before streaming starts (rate limit,
+    validation, unknown session) are plain HTTP errors as in /chat.
+    """
+    try:
+        if payload.student_answer is None:
+            start = await socratic_agent.start_session(
+                session_id=payload.session_id,
+                story_title=payload.story_title,
+                story_text=payload.story_text,
+                mispronounced_words=payload.mispronounced_words,
+                accuracy=payload.accuracy,
+                cpm=payload.cpm,
+            )
+            events = _single_result(start)
+        else:
+            events = await socratic_agent.stream_answer(
+                session_id=payload.session_id,
+                student_answer=payload.student_answer,
+            )
+    except Exception as e:
+        raise _chat_error(e)
+
+    return _EventStreamResponse(events)
+
+
+class _EventStreamResponse(StreamingResponse):
+    """
+    SSE response for SocraticAgent events. The agent's stream holds the
+    session lock until it ends, so it is closed however the response ends
+    (done, failed, or the client disconnected mid-stream) instead of
+    whenever the abandoned generator is garbage-collected.
+    """
+
+    def __init__(self, events: AsyncIterator[tuple[str, object]]):
+        super().__init__(
+            _sse_events(events),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        self._events = events
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
+            await self._events.aclose()
+
+
+async def _single_result(result: AgentResponse) -> AsyncIterator[tuple[str, object]]:
+    yield "question", result.question
+    yield "result", result
+
+
+async def _sse_events(events: AsyncIterator[tuple[str, object]]) -> AsyncIterator[str]:
+    try:
+        async for kind, value in events:
+            if kind == "result":
+                yield _sse("done", _chat_response(value).model_dump_json())
+            else:
+                yield _sse(kind, json.dumps({"text": value}, ensure_ascii=False))
+    except Exception as e:
+        error = _chat_error(e)
+        yield _sse("error", json.dumps({"status": error.status_code, "detail": error.detail}, ensure_ascii=False))
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
 
+
+def _chat_response(result: AgentResponse) -> ComprehensionChatResponse:
     return ComprehensionChatResponse(
         question=result.question,
         feedback=result.feedback,
@@ -141,3 +223,82 @@ async def comprehension_chat(payload: ComprehensionChatRequest):
         is_complete=result.is_complete,
         referenced_paragraph=result.referenced_paragraph,
     )
+
+
+def _chat_error(e: Exception) -> HTTPException:
+    """Map a SocraticAgent error to the HTTP error /comprehension/chat returns."""
+    if isinstance(e, SessionConflictError):
+        return HTTPException(status_code=409, detail=str(e))
+    if isinstance(e, SessionNotFoundError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, ValueError):
+        status = 429 if "Rate limit" in str(e) else 422
+        return HTTPException(status_code=status, detail=str(e))
+    if isinstance(e, RuntimeError):
+        return HTTPException(status_code=503, detail=str(e))
+    logger.error("Comprehension chat error: %s", e)
+    return HTTPException(status_code=500, detail="AI service error")
+
+
+# ── Step 3c: Session snapshots and forks ─────────────────────────────────────
+
+class SessionSnapshot(BaseModel):
+    story_title: str
+    story_text: str
+    conversation: list[ConversationTurn] = []
+    understood_count: int = Field(0, ge=0, le=SocraticAgent.REQUIRED_UNDERSTOOD)
+    total_attempts: int = Field(0, ge=0)
+    current_phase: Literal["factual", "inferential", "evaluative"] = "factual"
+    mispronounced_words: list[str] | None = None
+    accuracy: float | None = Field(None, ge=0, le=100)
+    cpm: float | None = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def _understood_within_attempts(self):
+        if self.understood_count > self.total_attempts:
+            raise ValueError("understood_count cannot exceed total_attempts")
+        return self
+
+
+class SessionForkRequest(BaseModel):
+    session_id: str                       # the new session
+    source_session_id: str | None = None  # fork a live session ...
+    snapshot: SessionSnapshot | None = None  # ... or start from an exported one
+
+    @model_validator(mode="after")
+    def _one_source(self):
+        if (self.source_session_id is None) == (self.snapshot is None):
+            raise ValueError("Give exactly one of source_session_id and snapshot")
+        return self
+
+
+@router.get("/comprehension/sessions/{session_id}/snapshot", response_model=SessionSnapshot)
+async def get_session_snapshot(session_id: str):
+    """
+    Export a comprehension chat session: story, conversation and progress.
+    POST it to /comprehension/sessions/fork to continue from the same point.
+    """
+    snapshot = await socratic_agent.snapshot_session(session_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired")
+    return snapshot
+
+
+@router.post("/comprehension/sessions/fork", response_model=ComprehensionChatResponse, status_code=201)
+async def fork_session(payload: SessionForkRequest):
+    """
+    Start session `session_id` from a live session or a snapshot, without
+    replaying its conversation through the model. Answers then go to
+    /comprehension/chat as usual; the response carries the question the
+    student is on. 404 if the source session does not exist, 409 if
+    session `session_id` already does.
+    """
+    try:
+        result = await socratic_agent.fork_session(
+            session_id=payload.session_id,
+            source_session_id=payload.source_session_id,
+            snapshot=payload.snapshot.model_dump() if payload.snapshot is not None else None,
+        )
+    except Exception as e:
+        raise _chat_error(e)
+    return _chat_response(result)
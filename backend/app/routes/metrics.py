@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+
+from ..services.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+def get_metrics():
+    """Counters and gauges of this worker process (cache hit ratio, saved latency, ...)."""
+    return metrics.snapshot()
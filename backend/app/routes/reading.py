@@ -0,0 +1,154 @@
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..models import LearningSession
+from ..services.character_error_service import record_reading
+from ..services.stt_service import StreamingReadingEvaluator, evaluate_reading_batch
+
+router = APIRouter(tags=["reading"])
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 10_000
+# Characters in one target text or transcript. Alignment keeps a
+# len(target)-bit row per transcript character, so this bounds the memory
+# and time one reading can take.
+MAX_TEXT_CHARS = 2_000
+# Characters (STT + target) in one /reading/evaluate-batch request, which
+# is evaluated synchronously on a worker thread.
+MAX_BATCH_CHARS = 1_000_000
+
+
+class ReadingPair(BaseModel):
+    stt_text: str = Field(..., max_length=MAX_TEXT_CHARS)
+    target_text: str = Field(..., max_length=MAX_TEXT_CHARS)
+
+
+class ReadingBatchRequest(BaseModel):
+    items: list[ReadingPair] = Field(..., max_length=MAX_BATCH_SIZE)
+
+    @model_validator(mode="after")
+    def _total_chars(self):
+        total = sum(len(p.stt_text) + len(p.target_text) for p in self.items)
+        if total > MAX_BATCH_CHARS:
+            raise ValueError(f"Batch too large ({total} characters, max {MAX_BATCH_CHARS})")
+        return self
+
+
+class ReadingResult(BaseModel):
+    corrected: str
+    match_rate: float
+    tier: int
+    feedback_key: str
+
+
+class ReadingBatchResponse(BaseModel):
+    results: list[ReadingResult]
+
+
+class ReadingStreamMessage(BaseModel):
+    target_text: str | None = Field(None, max_length=MAX_TEXT_CHARS)
+    transcript: str | None = Field(None, max_length=MAX_TEXT_CHARS)
+    chunk: str | None = Field(None, max_length=MAX_TEXT_CHARS)
+
+
+@router.post("/reading/evaluate-batch", response_model=ReadingBatchResponse)
+def evaluate_batch(payload: ReadingBatchRequest):
+    """
+    Evaluate many STT readings in one call (e.g. a teacher's class replay).
+    Results are returned in the same order as `items`.
+    """
+    results = evaluate_reading_batch((p.stt_text, p.target_text) for p in payload.items)
+    return ReadingBatchResponse(results=results)
+
+
+class CharacterErrorOut(BaseModel):
+    character: str
+    error_type: str
+    position: int | None
+    spoken: str | None
+
+
+class RecordedReadingResult(ReadingResult):
+    errors: list[CharacterErrorOut]
+
+
+@router.post(
+    "/learning-sessions/{session_id}/readings",
+    response_model=RecordedReadingResult,
+    status_code=201,
+)
+def record_session_reading(session_id: int, payload: ReadingPair, db: Session = Depends(get_db)):
+    """
+    Evaluate one finished reading of a learning session and store its
+    per-character errors (character_errors rows) for the teacher reports.
+    """
+    if db.get(LearningSession, session_id) is None:
+        raise HTTPException(status_code=404, detail=f"Learning session {session_id} not found")
+    result = record_reading(db, session_id, payload.stt_text, payload.target_text)
+    errors = [
+        CharacterErrorOut(
+            character=e.character, error_type=e.error_type, position=e.target_index, spoken=e.spoken
+        )
+        for e in result["errors"]
+    ]
+    return RecordedReadingResult(**{**result, "errors": errors})
+
+
+@router.websocket("/reading/stream")
+async def reading_stream(websocket: WebSocket):
+    """
+    Live evaluation of interim STT results for one line.
+
+    Client → server JSON messages:
+        {"target_text": str}   start (or restart) a line
+        {"transcript": str}    latest interim/final transcript (may revise its tail)
+        {"chunk": str}         newly recognised text to append
+    After each transcript/chunk the server pushes the current
+    {"corrected", "match_rate", "tier", "feedback_key"}. An invalid message
+    (not a JSON object, or a target / transcript over MAX_TEXT_CHARS) gets
+    {"error": ...} and is otherwise ignored.
+    """
+    await websocket.accept()
+    evaluator: StreamingReadingEvaluator | None = None
+    try:
+        while True:
+            try:
+                message = ReadingStreamMessage.model_validate(await websocket.receive_json())
+            except json.JSONDecodeError:
+                await websocket.send_json({"error": "Expected a JSON object"})
+                continue
+            except ValidationError as e:
+                await websocket.send_json({"error": _validation_error(e)})
+                continue
+            if message.target_text is not None:
+                evaluator = StreamingReadingEvaluator(message.target_text)
+                if message.transcript is None and message.chunk is None:
+                    continue
+            if evaluator is None:
+                await websocket.send_json({"error": "Send target_text first"})
+                continue
+            if message.transcript is not None:
+                result = evaluator.update(message.transcript)
+            elif message.chunk is not None:
+                if len(evaluator.transcript) + len(message.chunk) > MAX_TEXT_CHARS:
+                    await websocket.send_json({"error": f"Transcript too long (max {MAX_TEXT_CHARS} characters)"})
+                    continue
+                result = evaluator.append(message.chunk)
+            else:
+                await websocket.send_json({"error": "Expected transcript or chunk"})
+                continue
+            await websocket.send_json(result)
+    except WebSocketDisconnect:
+        logger.debug("Reading stream closed")
+
+
+def _validation_error(e: ValidationError) -> str:
+    error = e.errors()[0]
+    if error["type"] == "model_type":
+        return "Expected a JSON object"
+    field = ".".join(str(part) for part in error["loc"])
+    return f"{field}: {error['msg']}" if field else error["msg"]
@@ -12,22 +12,423 @@ Rules (from CLAUDE.md):
 import asyncio
 import json
 import logging
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
 
+import httpx
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types as genai_types
 
 from ..config import settings
+from .circuit_breaker import (
+    CLOSED,
+    OPEN,
+    STATE_VALUES,
+    CircuitBreaker,
+    RetryBudget,
+    backoff_delay,
+)
+from .context_cache import CacheableContext, ContextCacheRegistry
+from .metrics import metrics
+from .model_cassette import REPLAY, Cassette, CassetteMissError, Recording, build_cassette, request_keys
+from .model_router import LatencyTracker
+from .partial_json import IncrementalObjectParser, JsonEvent
+from .response_cache import ResponseCache, build_response_cache, cache_key
+from .session_store import SESSION_TTL_SECONDS
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 MAX_RETRIES = 3
 RETRY_BASE_DELAY = 1.0  # seconds
+RETRY_MAX_DELAY = 8.0  # seconds
 GEMINI_TIMEOUT = 30  # seconds
+_CACHED_CONTENT_RE = re.compile(r"cached.?content", re.IGNORECASE)
+
+# ---------------------------------------------------------------------------
+# Process-wide client
+# Created once at app startup (see main.lifespan) and shared by every request:
+# one pooled HTTP connection set, native async calls, and a semaphore that
+# bounds how many Gemini calls this worker has in flight. The circuit
+# breaker and retry budget are shared by those calls too (circuit_breaker.py).
+# With a model cassette (model_cassette.py) the client records its responses,
+# or is replaced by one that replays them.
+# ---------------------------------------------------------------------------
+
+_client: genai.Client | None = None
+_http_client: httpx.AsyncClient | None = None
+_semaphore: asyncio.Semaphore | None = None
+_response_cache: ResponseCache | None = None
+_context_caches: ContextCacheRegistry | None = None
+_breaker: CircuitBreaker | None = None
+_retry_budget: RetryBudget | None = None
+_latency: dict[str, LatencyTracker] = {}   # model -> recent call latencies (hedging deadline)
+
+
+def pooled_http_client() -> httpx.AsyncClient:
+    """Keep-alive connection pool sized by settings.gemini_max_connections."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.gemini_max_connections,
+            max_keepalive_connections=settings.gemini_max_connections,
+        ),
+        timeout=GEMINI_TIMEOUT,
+    )
+
+
+def _build_client() -> tuple[genai.Client, httpx.AsyncClient]:
+    """Gemini client via Vertex AI (uses Cloud Run service account) over a bounded connection pool."""
+    http_client = pooled_http_client()
+    client = genai.Client(
+        vertexai=True,
+        project=settings.gemini_project,
+        location=settings.gemini_location,
+        http_options=genai_types.HttpOptions(httpx_async_client=http_client),
+    )
+    return client, http_client
+
+
+def init_client(
+    client: genai.Client | None = None, http_client: httpx.AsyncClient | None = None
+) -> genai.Client:
+    """
+    Create the shared client and reset the concurrency semaphore.
+
+    Pass `client` (and the `http_client` it was built on, to have it closed
+    on shutdown) to install another client, e.g. one pointed at a stub server.
+    With settings.model_cassette_mode "record" the client is wrapped to
+    record its responses; with "replay" no client is needed. Context caching
+    is off under a cassette, so recorded requests carry the full prompt.
+    """
+    global _client, _http_client, _semaphore, _response_cache, _context_caches, _breaker, _retry_budget
+    cassette = build_cassette()
+    if cassette is not None and settings.model_cassette_mode == REPLAY:
+        client = _CassetteClient(cassette)
+    else:
+        if client is None:
+            client, http_client = _build_client()
+        if cassette is not None:
+            client = _CassetteClient(cassette, client)
+    _client, _http_client = client, http_client
+    _semaphore = asyncio.Semaphore(settings.gemini_max_concurrency)
+    _breaker = CircuitBreaker(settings.gemini_breaker_failure_threshold, settings.gemini_breaker_reset_seconds)
+    _retry_budget = RetryBudget(settings.gemini_retry_budget_ratio)
+    _latency.clear()
+    _response_cache = build_response_cache()
+    _context_caches = (
+        ContextCacheRegistry(_GeminiContextCaches(), ttl=SESSION_TTL_SECONDS)
+        if settings.context_cache_enabled and cassette is None else None
+    )
+    return client
+
+
+async def close_client() -> None:
+    """Close the shared client's connections and the caches (app shutdown)."""
+    global _client, _http_client, _semaphore, _response_cache, _context_caches
+    client, http_client, cache, context_caches = _client, _http_client, _response_cache, _context_caches
+    if context_caches is not None:
+        await context_caches.close()          # still needs the client
+    _client = _http_client = _semaphore = _response_cache = _context_caches = None
+    if client is not None:
+        await client.aio.aclose()
+    if http_client is not None:
+        await http_client.aclose()
+    if cache is not None:
+        await cache.close()
+
+
+def get_client() -> genai.Client:
+    """Return the shared client, creating it on first use outside the app lifespan."""
+    if _client is None:
+        return init_client()
+    return _client
 
 
-def _get_client() -> genai.Client:
-    """Return a Gemini client via Vertex AI (uses Cloud Run service account)."""
-    return genai.Client(vertexai=True, project="lingoleap-dev", location="us-central1")
+async def _generate(
+    contents: list[genai_types.Content],
+    config: genai_types.GenerateContentConfig,
+    parse: Callable[[genai_types.GenerateContentResponse], T],
+    model: str | None = None,
+) -> T:
+    """
+    Shared Gemini call path: native async call on the shared client, bounded
+    by the concurrency semaphore, with a per-attempt timeout and jittered
+    backoff retries within the retry budget. `parse` runs inside the retry
+    loop, so an unparseable response is retried like a failed call.
+    Raises CircuitOpenError without calling the model while the circuit
+    breaker is open. `model` defaults to settings.gemini_model.
+    """
+    client = get_client()
+    model = model or settings.gemini_model
+    _retry_budget.deposit()
+    last_error = None
+
+    for attempt in range(MAX_RETRIES):
+        _breaker.check()
+        try:
+            response = await _hedged_call(client, model, contents, config)
+        except asyncio.TimeoutError:
+            _breaker.record_failure()
+            logger.error("Gemini API timeout after %ds", GEMINI_TIMEOUT)
+            raise TimeoutError(f"AI response timeout ({GEMINI_TIMEOUT}s)")
+        except Exception as e:
+            _record_failure(e)
+            last_error = e
+        else:
+            _breaker.record_success()
+            _record_usage(response)
+            try:
+                return parse(response)
+            except Exception as e:
+                last_error = e
+        if not await _backoff(attempt, last_error):
+            break
+
+    raise last_error
+
+
+async def _stream(
+    contents: list[genai_types.Content],
+    config: genai_types.GenerateContentConfig,
+    model: str | None = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming counterpart of _generate(): yields the response text chunk by
+    chunk. The timeout applies to the wait for each chunk; failures before
+    the first chunk are retried, later ones are raised to the caller.
+    Streams are not hedged.
+    """
+    client = get_client()
+    model = model or settings.gemini_model
+    semaphore = _semaphore
+    _retry_budget.deposit()
+    last_error = None
+
+    for attempt in range(MAX_RETRIES):
+        _breaker.check()
+        started = False
+        try:
+            async with semaphore:
+                stream = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(
+                        model=model,
+                        contents=contents,
+                        config=config,
+                    ),
+                    timeout=GEMINI_TIMEOUT,
+                )
+                chunks = aiter(stream)
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(chunks), timeout=GEMINI_TIMEOUT)
+                    except StopAsyncIteration:
+                        _breaker.record_success()
+                        return
+                    _record_usage(chunk)
+                    if chunk.text:
+                        started = True
+                        yield chunk.text
+        except asyncio.TimeoutError:
+            _breaker.record_failure()
+            logger.error("Gemini API timeout after %ds", GEMINI_TIMEOUT)
+            raise TimeoutError(f"AI response timeout ({GEMINI_TIMEOUT}s)")
+        except Exception as e:
+            _record_failure(e)
+            if started:
+                raise
+            last_error = e
+            if not await _backoff(attempt, e):
+                break
+
+    raise last_error
+
+
+async def _hedged_call(
+    client: genai.Client,
+    model: str,
+    contents: list[genai_types.Content],
+    config: genai_types.GenerateContentConfig,
+) -> genai_types.GenerateContentResponse:
+    """
+    One attempt of _generate(). If it has not answered by the model's recent
+    p95 latency (at least settings.gemini_hedge_min_delay), an identical
+    second request is sent — paid for from the retry budget, and only while
+    the circuit is closed — and whichever answers first wins; the other is
+    cancelled. Fails only when every request sent has failed.
+    """
+    semaphore = _semaphore
+
+    async def request() -> genai_types.GenerateContentResponse:
+        async with semaphore:
+            return await asyncio.wait_for(
+                client.aio.models.generate_content(model=model, contents=contents, config=config),
+                timeout=GEMINI_TIMEOUT,
+            )
+
+    tracker = _latency.setdefault(model, LatencyTracker())
+    start = time.perf_counter()
+    primary = asyncio.ensure_future(request())
+    pending = {primary}
+    try:
+        deadline = _hedge_deadline(tracker)
+        if deadline is not None:
+            await asyncio.wait(pending, timeout=deadline)
+            if not primary.done() and _breaker.state == CLOSED and _retry_budget.withdraw():
+                metrics.incr("gemini.hedges")
+                pending.add(asyncio.ensure_future(request()))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    tracker.record(time.perf_counter() - start)
+                    if task is not primary:
+                        metrics.incr("gemini.hedge_wins")
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _hedge_deadline(tracker: LatencyTracker) -> float | None:
+    """Seconds to wait before hedging, or None to not hedge."""
+    if not settings.gemini_hedging_enabled:
+        return None
+    p95 = tracker.quantile(0.95)
+    return max(p95, settings.gemini_hedge_min_delay) if p95 is not None else None
+
+
+def _record_failure(error: Exception) -> None:
+    """
+    Count a failed call against the circuit breaker if it says the model is
+    unhealthy. A rejected request (4xx other than 429) means the service
+    answered, so it counts as a success; so does a cassette miss.
+    """
+    if isinstance(error, CassetteMissError):
+        _breaker.record_success()
+    elif isinstance(error, genai_errors.ClientError) and error.code != 429:
+        _breaker.record_success()
+    else:
+        _breaker.record_failure()
+
+
+async def _backoff(attempt: int, error: Exception) -> bool:
+    """
+    Sleep before retrying after failed attempt number `attempt + 1`, and
+    return True. Returns False without sleeping when the call should give
+    up instead: it was the last attempt, the circuit just opened, the retry
+    budget is spent, replay has no recording for the request, or the
+    provider rejected the context cache the request referenced.
+    """
+    if isinstance(error, CassetteMissError):
+        logger.error("Model cassette: %s", error)
+        return False
+    if _cache_rejected(error):
+        return False
+    if attempt >= MAX_RETRIES - 1:
+        logger.error("Gemini API failed after %d attempts: %s", MAX_RETRIES, error)
+        return False
+    if _breaker.state == OPEN:
+        logger.error("Gemini API attempt %d failed and the circuit is open: %s", attempt + 1, error)
+        return False
+    if not _retry_budget.withdraw():
+        metrics.incr("gemini.retries_denied")
+        logger.error("Gemini API attempt %d failed, retry budget spent: %s", attempt + 1, error)
+        return False
+    delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+    metrics.incr("gemini.retries")
+    logger.warning("Gemini API attempt %d failed: %s. Retrying in %.1fs", attempt + 1, error, delay)
+    await asyncio.sleep(delay)
+    return True
+
+
+class _CassetteClient:
+    """
+    Stands in for genai.Client under a model cassette: passes calls through
+    to `client` and records the responses, or, without a client, replays
+    them after the cassette's synthetic latency. Covers the calls made in
+    this module (no context caching).
+    """
+
+    STREAM_CHUNKS = 8  # pieces a replayed stream is cut into
+
+    def __init__(self, cassette: Cassette, client: genai.Client | None = None):
+        self.cassette = cassette
+        self.client = client
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(
+                generate_content=self._generate_content,
+                generate_content_stream=self._generate_content_stream,
+            ),
+            aclose=self._aclose,
+        )
+
+    async def _generate_content(self, model, contents, config) -> genai_types.GenerateContentResponse:
+        key, near = request_keys(model, contents, config)
+        if self.client is None:
+            recording = self.cassette.lookup(key, near)
+            await asyncio.sleep(self.cassette.delay(recording.latency))
+            return _text_response(recording.text)
+        start = time.perf_counter()
+        response = await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+        if response.text:
+            self.cassette.record(Recording(key, near, model, response.text, time.perf_counter() - start))
+        return response
+
+    async def _generate_content_stream(
+        self, model, contents, config
+    ) -> AsyncIterator[genai_types.GenerateContentResponse]:
+        key, near = request_keys(model, contents, config)
+        if self.client is None:
+            return self._replay_stream(self.cassette.lookup(key, near))
+        start = time.perf_counter()
+        stream = await self.client.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+        return self._record_stream(stream, Recording(key, near, model, "", 0.0), start)
+
+    async def _replay_stream(self, recording: Recording) -> AsyncIterator[genai_types.GenerateContentResponse]:
+        text = recording.text
+        size = -(-len(text) // self.STREAM_CHUNKS) or 1
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        delay = self.cassette.delay(recording.latency)
+        for piece in pieces:
+            await asyncio.sleep(delay / len(pieces))
+            yield _text_response(piece)
+
+    async def _record_stream(
+        self, stream: AsyncIterator[genai_types.GenerateContentResponse], recording: Recording, start: float
+    ) -> AsyncIterator[genai_types.GenerateContentResponse]:
+        pieces = []
+        async for chunk in stream:
+            if chunk.text:
+                pieces.append(chunk.text)
+            yield chunk
+        if pieces:
+            self.cassette.record(Recording(
+                recording.key, recording.near, recording.model, "".join(pieces), time.perf_counter() - start
+            ))
+
+    async def _aclose(self) -> None:
+        if self.client is not None:
+            await self.client.aio.aclose()
+
+
+def _text_response(text: str) -> genai_types.GenerateContentResponse:
+    content = genai_types.Content(role="model", parts=[genai_types.Part(text=text)])
+    return genai_types.GenerateContentResponse(candidates=[genai_types.Candidate(content=content)])
+
+
+def _record_usage(response: genai_types.GenerateContentResponse) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    cached_tokens = getattr(usage, "cached_content_token_count", None) if usage else None
+    if cached_tokens:
+        metrics.incr("context_cache.tokens_saved", cached_tokens)
 
 
 async def generate_structured_response(
@@ -36,46 +437,269 @@ async def generate_structured_response(
     response_schema: dict,
     max_tokens: int = 1024,
     temperature: float = 0.7,
+    cache: bool = False,
+    context: CacheableContext | None = None,
+    model: str | None = None,
 ) -> dict:
     """Call Gemini with JSON mode, return parsed dict.
 
     Uses response_mime_type="application/json" and response_schema
     to get structured JSON output from Gemini.
+
+    With cache=True the response may come from the shared response cache
+    (see response_cache.py); use it only for requests whose answer does
+    not need to be unique, such as a session's opening question.
+
+    With `context`, the call references a provider-side cache of
+    context.prefix and sends context.instructions ahead of the contents,
+    once that cache is ready (see context_cache.py); otherwise `system_prompt`
+    is sent in full as usual. If the provider rejects the cache (expired or
+    deleted), the cache is invalidated and the call is made again with the
+    full prompt; any other failure is raised as for an uncached call.
+
+    `model` overrides settings.gemini_model (see model_router.py). Context
+    caches are created for settings.gemini_model, so other models always
+    get the full prompt.
     """
-    client = _get_client()
-    last_error = None
+    model = model or settings.gemini_model
 
-    for attempt in range(MAX_RETRIES):
+    def call() -> Awaitable[dict]:
+        return _generate(
+            contents,
+            _json_config(response_schema, max_tokens, temperature, system_instruction=system_prompt),
+            lambda response: json.loads(response.text),
+            model,
+        )
+
+    get_client()
+    name = _context_cache_handle(context) if not cache and model == settings.gemini_model else None
+    if name is not None:
         try:
-            response = await asyncio.wait_for(
-                asyncio.to_thread(
-                    client.models.generate_content,
-                    model="gemini-2.5-flash",
-                    contents=contents,
-                    config=genai_types.GenerateContentConfig(
-                        system_instruction=system_prompt,
-                        response_mime_type="application/json",
-                        response_schema=response_schema,
-                        max_output_tokens=max_tokens,
-                        temperature=temperature,
-                    ),
-                ),
-                timeout=GEMINI_TIMEOUT,
+            return await _generate(
+                _with_instructions(contents, context.instructions),
+                _json_config(response_schema, max_tokens, temperature, cached_content=name),
+                lambda response: json.loads(response.text),
+                model,
             )
-            return json.loads(response.text)
-        except asyncio.TimeoutError:
-            logger.error("Gemini API timeout after %ds", GEMINI_TIMEOUT)
-            raise TimeoutError(f"AI response timeout ({GEMINI_TIMEOUT}s)")
-        except Exception as e:
-            last_error = e
-            if attempt < MAX_RETRIES - 1:
-                delay = RETRY_BASE_DELAY * (2 ** attempt)
-                logger.warning("Gemini API attempt %d failed: %s. Retrying in %.1fs", attempt + 1, e, delay)
-                await asyncio.sleep(delay)
-            else:
-                logger.error("Gemini API failed after %d attempts: %s", MAX_RETRIES, e)
+        except genai_errors.ClientError as e:
+            if not _cache_rejected(e):
+                raise
+            logger.warning("Context cache %s rejected, sending the full prompt: %s", name, e)
+            _context_caches.invalidate(context.prefix)
 
-    raise last_error
+    if not cache or _response_cache is None:
+        return await call()
+    key = cache_key(
+        model, system_prompt, contents, response_schema,
+        max_tokens=max_tokens, temperature=temperature,
+    )
+    return await _cached(_response_cache, key, call)
+
+
+async def stream_structured_response(
+    system_prompt: str,
+    contents: list[genai_types.Content],
+    response_schema: dict,
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    context: CacheableContext | None = None,
+    model: str | None = None,
+) -> AsyncIterator[JsonEvent]:
+    """Streaming variant of generate_structured_response().
+
+    Yields JsonEvents for the top-level fields as Gemini writes them (see
+    partial_json.py), then JsonEvent("result", "", <whole object>). Once an
+    event has been yielded, a failure is raised rather than retried.
+    """
+    get_client()
+    model = model or settings.gemini_model
+    attempts = []
+    name = _context_cache_handle(context) if model == settings.gemini_model else None
+    if name is not None:
+        attempts.append((
+            _with_instructions(contents, context.instructions),
+            _json_config(response_schema, max_tokens, temperature, cached_content=name),
+        ))
+    attempts.append((
+        contents,
+        _json_config(response_schema, max_tokens, temperature, system_instruction=system_prompt),
+    ))
+
+    for attempt_contents, config in attempts:
+        parser = IncrementalObjectParser()
+        started = False
+        try:
+            async for text in _stream(attempt_contents, config, model):
+                for event in parser.feed(text):
+                    started = True
+                    yield event
+            break
+        except genai_errors.ClientError as e:
+            if config.cached_content is None or started or not _cache_rejected(e):
+                raise
+            logger.warning("Context cache %s rejected, sending the full prompt: %s", name, e)
+            _context_caches.invalidate(context.prefix)
+    yield JsonEvent("result", "", parser.result())
+
+
+def _cache_rejected(error: Exception) -> bool:
+    """The provider refused the cached content a request referenced (expired, deleted, not ours)."""
+    return (
+        isinstance(error, genai_errors.ClientError)
+        and error.code in (400, 403, 404)
+        and _CACHED_CONTENT_RE.search(str(error)) is not None
+    )
+
+
+def _json_config(
+    response_schema: dict, max_tokens: int, temperature: float, **kwargs
+) -> genai_types.GenerateContentConfig:
+    return genai_types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=response_schema,
+        max_output_tokens=max_tokens,
+        temperature=temperature,
+        **kwargs,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Context cache
+# A cached-content request may not carry its own system instruction, so the
+# per-turn instructions travel as the first part of the first user message.
+# ---------------------------------------------------------------------------
+
+class _GeminiContextCaches:
+    """ContextCacheProvider backed by Gemini cached content on the shared client."""
+
+    async def create(self, prefix: str, ttl: float) -> tuple[str, int]:
+        cached = await asyncio.wait_for(
+            get_client().aio.caches.create(
+                model=settings.gemini_model,
+                config=genai_types.CreateCachedContentConfig(
+                    system_instruction=prefix,
+                    ttl=f"{int(ttl)}s",
+                    display_name="lingoleap-prompt-prefix",
+                ),
+            ),
+            timeout=GEMINI_TIMEOUT,
+        )
+        usage = cached.usage_metadata
+        return cached.name, (usage.total_token_count or 0) if usage else 0
+
+    async def extend(self, name: str, ttl: float) -> None:
+        await asyncio.wait_for(
+            get_client().aio.caches.update(
+                name=name, config=genai_types.UpdateCachedContentConfig(ttl=f"{int(ttl)}s")
+            ),
+            timeout=GEMINI_TIMEOUT,
+        )
+
+    async def delete(self, name: str) -> None:
+        await asyncio.wait_for(get_client().aio.caches.delete(name=name), timeout=GEMINI_TIMEOUT)
+
+
+def _context_cache_handle(context: CacheableContext | None) -> str | None:
+    """Name of a ready context cache for `context`, counting hits / fallbacks."""
+    if context is None or _context_caches is None:
+        return None
+    name = _context_caches.handle(context.prefix, context.session_id)
+    metrics.incr("context_cache.hits" if name else "context_cache.fallbacks")
+    return name
+
+
+def _with_instructions(
+    contents: list[genai_types.Content], instructions: str
+) -> list[genai_types.Content]:
+    head = genai_types.Part(text=instructions)
+    if contents and contents[0].role == "user":
+        first = contents[0].model_copy(update={"parts": [head, *(contents[0].parts or [])]})
+        return [first, *contents[1:]]
+    return [genai_types.Content(role="user", parts=[head]), *contents]
+
+
+def warm_context_cache(context: CacheableContext) -> None:
+    """Start caching context.prefix ahead of the session's first model call."""
+    if _context_caches is not None:
+        _context_caches.handle(context.prefix, context.session_id)
+
+
+def release_context_cache(context: CacheableContext) -> None:
+    """The session is over; its reference to the cached prefix goes away."""
+    if _context_caches is not None:
+        _context_caches.release(context.prefix, context.session_id)
+
+
+metrics.register_gauge(
+    "context_cache.entries", lambda: len(_context_caches) if _context_caches is not None else 0
+)
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# Each cached variant stores the model latency it took to produce, so a hit
+# can report how much model time it saved.
+# ---------------------------------------------------------------------------
+
+_inflight: dict[str, asyncio.Future] = {}
+
+
+def _serve_variant(variant: str) -> dict:
+    entry = json.loads(variant)
+    metrics.incr("response_cache.hits")
+    metrics.incr("response_cache.saved_latency_seconds", entry["latency"])
+    return entry["response"]
+
+
+async def _cached(cache: ResponseCache, key: str, call: Callable[[], Awaitable[dict]]) -> dict:
+    variants = await cache.get_variants(key)
+    if len(variants) >= cache.max_variants or (variants and key in _inflight):
+        return _serve_variant(random.choice(variants))
+
+    pending = _inflight.get(key)
+    if pending is not None:
+        # Same request already on its way to the model: wait for it instead of
+        # sending an identical one (a class starting the story at once).
+        try:
+            return _serve_variant(await asyncio.shield(pending))
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise                 # this request itself was cancelled
+            return await call()       # the leading request was; ask the model ourselves
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        start = time.perf_counter()
+        response = await call()
+        latency = time.perf_counter() - start
+        variant = json.dumps({"response": response, "latency": latency}, ensure_ascii=False)
+        await cache.add_variant(key, variant)
+        future.set_result(variant)
+        metrics.incr("response_cache.misses")
+        metrics.incr("response_cache.model_latency_seconds", latency)
+        return response
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # waiters re-raise it; don't warn when there are none
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+def _hit_ratio() -> float:
+    hits = metrics.get("response_cache.hits")
+    total = hits + metrics.get("response_cache.misses")
+    return hits / total if total else 0.0
+
+
+metrics.register_gauge("response_cache.hit_ratio", _hit_ratio)
+metrics.register_gauge(
+    "gemini.breaker.state", lambda: STATE_VALUES[_breaker.state] if _breaker is not None else 0.0
+)
 
 
 # Deprecated: use SocraticAgent.process_answer() for new code.
@@ -145,17 +769,15 @@ async def generate_socratic_question(
             )
         )
 
-    client = _get_client()
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=contents,
-        config=genai_types.GenerateContentConfig(
+    return await _generate(
+        contents,
+        genai_types.GenerateContentConfig(
             system_instruction=system_prompt,
             max_output_tokens=128,
             temperature=0.7,
         ),
+        lambda response: response.text.strip(),
     )
-    return response.text.strip()
 
 
 async def generate_exit_ticket(text: str) -> list[dict]:
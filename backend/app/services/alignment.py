@@ -0,0 +1,385 @@
+"""
+Character alignment engines used by stt_service.correct_homophones().
+
+Every engine returns the *same* alignment as the reference Levenshtein
+backtrace (diagonal first, then deletion, then insertion), so switching
+engines never changes the corrected output — only its cost:
+
+  - "full":        reference O(n·m) list-of-lists DP table.
+  - "banded":      Ukkonen diagonal band around the length difference plus an
+                   error budget; the budget doubles until the band provably
+                   contains every optimal path.  O(n·band) time and memory.
+  - "bitparallel": Myers/Hyyrö bit-vector rows (one Python int per row) with a
+                   divide-and-conquer backtrace that only keeps O(log n)
+                   checkpoint rows.  O(n·m/w) time, linear memory.
+
+align() also pairs a common prefix/suffix up front unless strip=False;
+that keeps the corrected output but not always the exact pairing.
+
+An alignment is a list of (stt_index, target_index) pairs in reading order;
+-1 marks a gap (extra STT character or character missing from the STT).
+"""
+
+from typing import Callable, Container
+
+Alignment = list[tuple[int, int]]
+
+_INF = 1 << 30
+_LEAF_ROWS = 64  # bit-parallel rows kept in memory for the final backtrace
+
+
+# ---------------------------------------------------------------------------
+# Shared backtrace
+# ---------------------------------------------------------------------------
+
+def _walk(
+    s: str,
+    t: str,
+    cell: Callable[[int, int], int],
+    i: int,
+    j: int,
+    top: int,
+    ops: Alignment,
+    stop: Container[tuple[int, int]] | None = None,
+) -> int:
+    """
+    Follow the reference backtrace from (i, j) until it reaches row `top`.
+
+    Appends ops in reverse order and returns the column at which the path
+    enters row `top`.  When `top` is 0 the walk continues along row 0 down to
+    column 0, exactly like the original correct_homophones() loop.  With
+    `stop`, the walk also ends at the first cell in it (the backtrace from a
+    cell never changes, so a known path can be joined there).
+    """
+    while i > top or (top == 0 and j > 0):
+        if stop is not None and (i, j) in stop:
+            break
+        if i > 0:
+            d = cell(i, j)
+            if j > 0:
+                cost = 0 if s[i - 1] == t[j - 1] else 1
+                if d == cell(i - 1, j - 1) + cost:
+                    i -= 1
+                    j -= 1
+                    ops.append((i, j))          # match or substitution
+                    continue
+            if d == cell(i - 1, j) + 1:
+                i -= 1
+                ops.append((i, -1))             # extra char in STT
+                continue
+        j -= 1
+        ops.append((-1, j))                     # missing from STT
+    return j
+
+
+# ---------------------------------------------------------------------------
+# Engines
+# ---------------------------------------------------------------------------
+
+def align_full(s: str, t: str) -> Alignment:
+    """Reference engine: full (n+1)×(m+1) Levenshtein table."""
+    s_len, t_len = len(s), len(t)
+
+    dp = [[0] * (t_len + 1) for _ in range(s_len + 1)]
+    for i in range(s_len + 1):
+        dp[i][0] = i
+    for j in range(t_len + 1):
+        dp[0][j] = j
+
+    for i in range(1, s_len + 1):
+        row, prev = dp[i], dp[i - 1]
+        sc = s[i - 1]
+        for j in range(1, t_len + 1):
+            cost = 0 if sc == t[j - 1] else 1
+            row[j] = min(
+                prev[j] + 1,          # deletion
+                row[j - 1] + 1,       # insertion
+                prev[j - 1] + cost,   # substitution
+            )
+
+    ops: Alignment = []
+    _walk(s, t, lambda i, j: dp[i][j], s_len, t_len, 0, ops)
+    ops.reverse()
+    return ops
+
+
+def _default_budget(s_len: int, t_len: int) -> int:
+    """Initial error budget for the banded engine (~10% of the longer side)."""
+    return max(8, max(s_len, t_len) // 10)
+
+
+def align_banded(s: str, t: str, budget: int | None = None) -> Alignment:
+    """
+    Banded engine: only cells with lo <= j - i <= hi are evaluated, where the
+    band spans the length difference plus `budget` on each side.
+
+    Any cell on a path of cost d satisfies |j-i| + |(m-n)-(j-i)| <= d, so once
+    the banded distance fits within |m-n| + 2·budget the band contains every
+    optimal path and the backtrace is identical to the full table's.
+    Otherwise the budget doubles and the band is recomputed.
+    """
+    s_len, t_len = len(s), len(t)
+    delta = t_len - s_len
+    e = budget if budget is not None else _default_budget(s_len, t_len)
+
+    while True:
+        lo = min(0, delta) - e
+        hi = max(0, delta) + e
+        if lo <= -s_len and hi >= t_len:
+            return align_full(s, t)
+
+        starts: list[int] = [0]
+        rows: list[list[int]] = [list(range(min(t_len, hi) + 1))]
+        for i in range(1, s_len + 1):
+            prev, p0 = rows[-1], starts[-1]
+            p_len = len(prev)
+            j0 = max(0, i + lo)
+            j1 = min(t_len, i + hi)
+            cur = [_INF] * (j1 - j0 + 1)
+            sc = s[i - 1]
+            for j in range(j0, j1 + 1):
+                if j == 0:
+                    cur[0] = i
+                    continue
+                v = _INF
+                k = j - 1 - p0
+                if 0 <= k < p_len:
+                    v = prev[k] + (0 if sc == t[j - 1] else 1)
+                k += 1
+                if 0 <= k < p_len and prev[k] + 1 < v:
+                    v = prev[k] + 1
+                if j > j0 and cur[j - j0 - 1] + 1 < v:
+                    v = cur[j - j0 - 1] + 1
+                cur[j - j0] = v
+            starts.append(j0)
+            rows.append(cur)
+
+        def cell(i: int, j: int) -> int:
+            k = j - starts[i]
+            row = rows[i]
+            return row[k] if 0 <= k < len(row) else _INF
+
+        if cell(s_len, t_len) <= abs(delta) + 2 * e:
+            ops: Alignment = []
+            _walk(s, t, cell, s_len, t_len, 0, ops)
+            ops.reverse()
+            return ops
+        e *= 2
+
+
+def _match_masks(t: str) -> dict[str, int]:
+    """Myers' Peq table: character → bitmask of its positions in `t`."""
+    peq: dict[str, int] = {}
+    for j, ch in enumerate(t):
+        peq[ch] = peq.get(ch, 0) | (1 << j)
+    return peq
+
+
+def _advance(vp: int, vn: int, eq: int, mask: int) -> tuple[int, int]:
+    """
+    One Hyyrö global-distance step: given the vertical delta vectors of row
+    i-1 and the match mask of s[i-1], return the vectors of row i.
+    Bit j-1 of vp/vn is set when D[i][j] - D[i][j-1] is +1/-1.
+    """
+    xv = eq | vn
+    xh = ((((eq & vp) + vp) & mask) ^ vp) | eq
+    ph = vn | (~(xh | vp) & mask)
+    mh = vp & xh
+    ph = ((ph << 1) | 1) & mask   # D[i][0] - D[i-1][0] = +1 (global distance)
+    mh = (mh << 1) & mask
+    return mh | (~(xv | ph) & mask), ph & xv
+
+
+def _row_value(i: int, vp: int, vn: int, j: int) -> int:
+    """Recover D[i][j] from the delta vectors of row i."""
+    low = (1 << j) - 1
+    return i + (vp & low).bit_count() - (vn & low).bit_count()
+
+
+def edit_distance(s: str, t: str) -> int:
+    """Levenshtein distance in O(len(s)·len(t)/w) using Myers/Hyyrö bit vectors."""
+    if not s or not t:
+        return len(s) + len(t)
+    mask = (1 << len(t)) - 1
+    peq = _match_masks(t)
+    vp, vn = mask, 0
+    for ch in s:
+        vp, vn = _advance(vp, vn, peq.get(ch, 0), mask)
+    return _row_value(len(s), vp, vn, len(t))
+
+
+def align_bitparallel(s: str, t: str) -> Alignment:
+    """
+    Bit-parallel engine with a Hirschberg-style divide-and-conquer backtrace.
+
+    Rows are recomputed from a checkpoint at the top of each block instead of
+    being stored: the lower half is resolved first, which fixes the column
+    where the reference path crosses the midpoint row, and the upper half is
+    then solved ending at that column.  Splitting on forward rows (rather
+    than meeting a reverse pass) keeps the reference tie-breaking intact.
+    """
+    s_len, t_len = len(s), len(t)
+    mask = (1 << t_len) - 1
+    peq = _match_masks(t)
+    ops: Alignment = []
+
+    def solve(top: int, vp: int, vn: int, bottom: int, j: int) -> int:
+        if bottom - top <= _LEAF_ROWS:
+            rows = [(vp, vn)]
+            for i in range(top, bottom):
+                vp, vn = _advance(vp, vn, peq.get(s[i], 0), mask)
+                rows.append((vp, vn))
+
+            def cell(i: int, j: int) -> int:
+                rvp, rvn = rows[i - top]
+                return _row_value(i, rvp, rvn, j)
+
+            return _walk(s, t, cell, bottom, j, top, ops)
+
+        mid = (top + bottom) // 2
+        mvp, mvn = vp, vn
+        for i in range(top, mid):
+            mvp, mvn = _advance(mvp, mvn, peq.get(s[i], 0), mask)
+        j = solve(mid, mvp, mvn, bottom, j)
+        return solve(top, vp, vn, mid, j)
+
+    solve(0, mask, 0, s_len, t_len)
+    ops.reverse()
+    return ops
+
+
+class IncrementalAligner:
+    """
+    Bit-parallel alignment of a growing STT string against a fixed target.
+
+    One delta-vector row is kept per STT character, so extending the STT by k
+    characters costs O(k·m/w) and rewinding to an earlier length is a slice.
+
+    The backtrace from a cell depends only on the rows above it, so the path
+    of the previous alignment() stays valid when rows are added: realign()
+    walks back from the new end only until it joins that path, and reuses
+    the rest.  A chunk typically changes the last few dozen steps of a path
+    that is as long as the target.
+    """
+
+    def __init__(self, target: str):
+        self.target = target
+        self._mask = (1 << len(target)) - 1
+        self._peq = _match_masks(target)
+        self._stt: list[str] = []
+        self._rows: list[tuple[int, int]] = [(self._mask, 0)]
+        self._ops: Alignment = []                      # last alignment
+        self._path: list[tuple[int, int]] = [(0, 0)]   # cell before each op, then the end cell
+        self._on_path: dict[tuple[int, int], int] = {(0, 0): 0}
+
+    def __len__(self) -> int:
+        return len(self._stt)
+
+    def extend(self, chars: str) -> None:
+        vp, vn = self._rows[-1]
+        mask, peq = self._mask, self._peq
+        for ch in chars:
+            vp, vn = _advance(vp, vn, peq.get(ch, 0), mask)
+            self._rows.append((vp, vn))
+        self._stt.extend(chars)
+
+    def truncate(self, length: int) -> None:
+        """Forget every STT character from index `length` on."""
+        del self._stt[length:]
+        del self._rows[length + 1:]
+        path = self._path
+        while path[-1][0] > length:
+            del self._on_path[path.pop()]
+        del self._ops[len(path) - 1:]
+
+    def distance(self) -> int:
+        vp, vn = self._rows[-1]
+        return _row_value(len(self._stt), vp, vn, len(self.target))
+
+    def alignment(self) -> Alignment:
+        return list(self.realign()[0])
+
+    def realign(self) -> tuple[Alignment, int]:
+        """
+        The alignment of the current STT, and the index of its first op that
+        differs from the alignment returned by the previous call (ops before
+        it are unchanged).  The returned list is updated in place by later
+        calls; copy it to keep it.
+        """
+        s, t, rows = self._stt, self.target, self._rows
+
+        def cell(i: int, j: int) -> int:
+            vp, vn = rows[i]
+            return _row_value(i, vp, vn, j)
+
+        tail: Alignment = []
+        j = _walk(s, t, cell, len(s), len(t), 0, tail, self._on_path)
+        i = len(s) - sum(1 for a, _ in tail if a >= 0)
+        k = self._on_path[(i, j)]
+
+        path, on_path = self._path, self._on_path
+        for cell_ in path[k + 1:]:
+            del on_path[cell_]
+        del path[k + 1:]
+        del self._ops[k:]
+        for a, b in reversed(tail):
+            i += a >= 0
+            j += b >= 0
+            on_path[(i, j)] = len(path)
+            path.append((i, j))
+            self._ops.append((a, b))
+        return self._ops, k
+
+
+# ---------------------------------------------------------------------------
+# Engine registry
+# ---------------------------------------------------------------------------
+
+ENGINES: dict[str, Callable[[str, str], Alignment]] = {
+    "full": align_full,
+    "banded": align_banded,
+    "bitparallel": align_bitparallel,
+}
+
+# Below this many DP cells the plain table beats the setup cost of the others.
+_AUTO_FULL_MAX_CELLS = 16
+
+
+def align(s: str, t: str, engine: str = "auto", strip: bool = True) -> Alignment:
+    """
+    Align STT text `s` against target `t` with the named engine.
+
+    With `strip`, a common prefix/suffix is paired up directly and only the
+    differing middle goes through the engine, so fluent readings shrink to a
+    few DP cells.  The result is an optimal alignment with the same corrected
+    text as align_full(), but where a run of equal characters can pair either
+    way it may pair them differently (e.g. "衣衣十得" / "衣我是"), so the
+    positions of individual mistakes can differ.  strip=False aligns the
+    full strings and returns exactly the align_full() pairing.
+    """
+    if engine != "auto" and engine not in ENGINES:
+        raise ValueError(f"Unknown alignment engine: {engine}")
+
+    s_len, t_len = len(s), len(t)
+    limit = min(s_len, t_len) if strip else 0
+    p = 0
+    while p < limit and s[p] == t[p]:
+        p += 1
+    q = 0
+    while q < limit - p and s[s_len - 1 - q] == t[t_len - 1 - q]:
+        q += 1
+    ms, mt = s[p:s_len - q], t[p:t_len - q]
+
+    ops: Alignment = [(k, k) for k in range(p)]
+    if ms and mt:
+        if engine == "auto":
+            engine = "full" if len(ms) * len(mt) <= _AUTO_FULL_MAX_CELLS else "bitparallel"
+        ops.extend(
+            (i + p if i >= 0 else -1, j + p if j >= 0 else -1)
+            for i, j in ENGINES[engine](ms, mt)
+        )
+    else:
+        ops.extend((p + i, -1) for i in range(len(ms)))
+        ops.extend((-1, p + j) for j in range(len(mt)))
+    ops.extend((s_len - q + k, t_len - q + k) for k in range(q))
+    return ops
@@ -0,0 +1,114 @@
+"""
+Local screening of student answers before they reach the model.
+
+The Socratic prompt spends a section teaching the model to spot answers that
+are not an attempt — "不知道", "隨便", a lone "嗯", a couple of characters
+that have nothing to do with the story — and each of those still cost a full
+model round trip to come back as understood=false. screen_answer() catches
+the obvious ones deterministically so the agent can answer at once with a
+templated hint (hint_paragraph() / hint_feedback()); anything it is not
+sure about goes to the model as before.
+
+Short answers can be right: "沒有" to "農夫有沒有等到兔子？", "難過" to
+"你覺得主角是開心還是難過？", "對" to a yes/no question. So refusals that
+double as a "no" are only screened after an open question, answers of a
+closed (yes/no or choice) question or a question about the student's own
+view are never judged off topic, and an answer sharing a character with
+the story or the question is not either.
+
+Answers are compared after stt_service normalization (punctuation and
+whitespace removed, Arabic numerals as Chinese numerals).
+"""
+
+import functools
+import re
+
+from .paragraph_index import paragraph_index
+from .story_table import Story
+from .stt_service import _normalize_for_comparison
+
+PERFUNCTORY = "perfunctory"   # "I don't know" / "whatever" / filler
+OFF_TOPIC = "off_topic"       # 1-2 characters, unrelated to the story and the question
+
+# Whole answers (after normalization and trimming particles) that are not
+# an attempt to answer.
+_NON_ANSWERS = frozenset({
+    "不知道", "不曉得", "不清楚", "不懂", "不確定", "沒想法", "沒意見",
+    "隨便", "都可以", "都行", "忘了", "忘記了", "不記得", "不想回答",
+    "不知", "母災", "跳過", "下一題", "pass", "idk",
+})
+# Refusals that are also a plain "no": non-answers only after an open question.
+_DECLINES = frozenset({"沒有", "不會", "不想", "不要"})
+# Yes/no and choice questions: "…嗎", "A還是B", "有沒有" / "是不是" (A-not-A).
+_CLOSED_QUESTION_RE = re.compile(r"嗎|還是|或是|(.)[不沒]\1")
+# Questions about the student's own view, which a word like "難過" answers.
+_OPINION_QUESTION_RE = re.compile(r"覺得|感覺|感受|心情|認為|想法|喜歡|如果你|如果是你")
+_FILLERS = frozenset("嗯呃喔哦噢啊阿欸誒唉哈嘿耶啦吧呢呀嘛齁蛤")
+_LEAD_INS = ("我真的", "我也", "我就", "我", "就是", "真的", "就")
+_OFF_TOPIC_MAX_CHARS = 2
+_NUMBER_RE = re.compile(r"[\d零一二兩三四五六七八九十百千萬]")
+_CLAUSE_RE = re.compile(r"[^，。！？；]+")
+
+_HINTS = {
+    PERFUNCTORY: "沒關係！讓我給你一個提示：看看第{n}段，作者提到了「{clause}」……你覺得這代表什麼？",
+    OFF_TOPIC: "這個回答好像和課文沒有關係喔。看看第{n}段，作者提到了「{clause}」，再想想看！",
+    # after another non-answer: narrow it down to one sentence
+    "again": "我們一起把第{n}段的這句話再讀一次：「{sentence}」答案就藏在這裡喔！",
+}
+
+
+def screen_answer(answer: str, story: Story, question: str = "") -> str | None:
+    """
+    PERFUNCTORY or OFF_TOPIC for an answer to `question` that clearly is
+    not an attempt, None when the model has to judge it. Without the
+    question, only answers that are never valid are screened.
+    """
+    text = _normalize_for_comparison(answer).lower()
+    core = _trim(text)
+    closed = not question or _CLOSED_QUESTION_RE.search(question) is not None
+    if not core or core in _NON_ANSWERS or (core in _DECLINES and not closed):
+        return PERFUNCTORY
+    if (
+        not closed
+        and not _OPINION_QUESTION_RE.search(question)
+        and len(text) <= _OFF_TOPIC_MAX_CHARS
+        and not _NUMBER_RE.search(answer)        # a number is an attempt, however wrong
+        and not set(text) & (_story_chars(story) | set(_normalize_for_comparison(question)))
+    ):
+        return OFF_TOPIC
+    return None
+
+
+def _trim(text: str) -> str:
+    """Drop filler particles at both ends and a leading "我" / "就是"."""
+    start, end = 0, len(text)
+    while start < end and text[start] in _FILLERS:
+        start += 1
+    while end > start and text[end - 1] in _FILLERS:
+        end -= 1
+    core = text[start:end]
+    for lead_in in _LEAD_INS:
+        if core.startswith(lead_in) and core[len(lead_in):] in _NON_ANSWERS | _DECLINES:
+            return core[len(lead_in):]
+    return core
+
+
+def hint_paragraph(story: Story, question: str) -> int:
+    """Index of the paragraph `question` is about, else the first non-empty one."""
+    best = paragraph_index(story).best(question)
+    if best is not None:
+        return best
+    return next((i for i, p in enumerate(story.paragraphs) if p.strip()), 0)
+
+
+def hint_feedback(kind: str, story: Story, paragraph: int, again: bool = False) -> str:
+    """Templated feedback pointing the student at `paragraph`, numbered like the prompt's [第N段]."""
+    text = story.paragraphs[paragraph]
+    sentence = text.split("。")[0] + "。" if "。" in text else text
+    clause = next(iter(_CLAUSE_RE.findall(text)), text)
+    return _HINTS["again" if again else kind].format(n=paragraph, clause=clause, sentence=sentence)
+
+
+@functools.lru_cache(maxsize=256)
+def _story_chars(story: Story) -> frozenset[str]:
+    return frozenset(_normalize_for_comparison(story.text))
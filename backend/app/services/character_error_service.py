@@ -0,0 +1,53 @@
+"""
+Persistence of per-character reading mistakes (CharacterError rows).
+
+A reading produces its errors in the same alignment pass that corrects
+homophones (stt_service.evaluate_reading(..., with_errors=True)); they are
+written with one executemany INSERT per reading, so the number of DB round
+trips does not grow with the number of mistakes.
+"""
+
+from typing import Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models import CharacterError
+from .stt_service import CharacterErrorRecord, evaluate_reading
+
+
+def save_character_errors(
+    db: Session, session_id: int, errors: Iterable[CharacterErrorRecord]
+) -> int:
+    """
+    Bulk-insert the errors of one learning session. Does not commit.
+
+    Returns the number of rows written.
+    """
+    rows = [
+        {
+            "session_id": session_id,
+            "character": e.character,
+            "error_type": e.error_type,
+            "position": e.target_index,
+            "spoken": e.spoken,
+        }
+        for e in errors
+    ]
+    if rows:
+        # render_nulls keeps NULL spoken/position in the same parameter set,
+        # otherwise the ORM splits the rows into one batch per column layout.
+        db.execute(insert(CharacterError).execution_options(render_nulls=True), rows)
+    return len(rows)
+
+
+def record_reading(db: Session, session_id: int, stt_text: str, target_text: str) -> dict:
+    """
+    Evaluate one reading and persist its character errors.
+
+    Returns the evaluate_reading() result including "errors".
+    """
+    result = evaluate_reading(stt_text, target_text, with_errors=True)
+    save_character_errors(db, session_id, result["errors"])
+    db.commit()
+    return result
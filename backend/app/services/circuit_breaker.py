@@ -0,0 +1,148 @@
+"""
+Failure isolation for Gemini calls: a circuit breaker and a retry budget.
+
+During a model outage every request used to go through all its retries
+(~3s of sleeps) before the caller fell back. Instead, per worker:
+
+  - CircuitBreaker: after `failure_threshold` consecutive failed calls the
+    circuit opens and calls fail immediately with CircuitOpenError. After
+    `reset_timeout` seconds one probe call is let through (half-open); its
+    success closes the circuit, its failure opens it again.
+  - RetryBudget: retries are limited to a fraction of first attempts (plus a
+    small floor), so a failing model sees at most ~(1 + ratio)× the normal
+    load instead of MAX_RETRIES×.
+  - backoff_delay(): exponential backoff with full jitter, so workers that
+    failed together do not retry together.
+"""
+
+import random
+import threading
+import time
+from typing import Callable
+
+from .metrics import metrics
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0.0, HALF_OPEN: 1.0, OPEN: 2.0}  # gauge encoding
+
+
+class CircuitOpenError(RuntimeError):
+    """The circuit is open: the call was not attempted."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open probe."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        name: str = "gemini",
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.name = name
+        self.trips = 0
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at: float | None = None   # when the half-open probe was let through
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            now = self.clock()
+            if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_at = None
+            if self._state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back
+                # (cancelled) frees the slot after another reset_timeout.
+                if self._probe_at is None or now - self._probe_at >= self.reset_timeout:
+                    self._probe_at = now
+                    return
+            elif self._state == CLOSED:
+                return
+        metrics.incr(f"{self.name}.breaker.rejected")
+        raise CircuitOpenError(f"{self.name} circuit is open; not calling the model")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probe_at = None
+                self.trips += 1
+                metrics.incr(f"{self.name}.breaker.trips")
+
+
+class RetryBudget:
+    """
+    Token bucket for retries: every first attempt deposits `ratio` tokens,
+    every retry spends one. `min_per_second` tokens accrue regardless, so a
+    quiet worker can still retry; the balance is capped at `burst`.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_per_second: float = 0.5,
+        burst: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.burst = burst
+        self.clock = clock
+        self._tokens = burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take one retry from the budget; False if it is spent."""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random | None = None) -> float:
+    """Full-jitter exponential backoff before retry number `attempt + 1`."""
+    return (rng or random).uniform(0, min(cap, base * (2 ** attempt)))
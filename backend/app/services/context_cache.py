@@ -0,0 +1,191 @@
+"""
+Bookkeeping for provider-side context caches of static prompt prefixes.
+
+The story + rubric part of the Socratic system prompt is identical for every
+turn of every session on a story. Gemini can hold such a prefix server-side
+as "cached content"; calls that reference it by name skip re-processing
+those input tokens and are billed for them at the cached rate.
+
+ContextCacheRegistry maps a prefix to its provider handle, per worker:
+  - the handle is created in the background on first use; until it is
+    ready — or when creation fails, e.g. a prefix below the provider's
+    minimum size — callers send the full prompt as before;
+  - each session using a prefix holds a reference that lapses `ttl`
+    seconds after its last use (the SessionStore TTL), so a reference
+    lives exactly as long as its session can still come back;
+  - the provider-side expiry is kept at least `ttl` past the last use,
+    and the handle is deleted once no live reference is left.
+
+The provider calls themselves live in ai_service.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Coroutine, Protocol
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class CacheableContext:
+    """
+    A system prompt split for context caching: `prefix` is shared (and
+    cached), `instructions` is per session / turn and sent with the
+    contents. `session_id` holds the reference to the cached prefix.
+    """
+
+    prefix: str
+    instructions: str
+    session_id: str
+
+
+class ContextCacheProvider(Protocol):
+    async def create(self, prefix: str, ttl: float) -> tuple[str, int]:
+        """Cache `prefix` for `ttl` seconds; returns (name, cached token count)."""
+        ...
+
+    async def extend(self, name: str, ttl: float) -> None:
+        """Push the expiry of `name` to `ttl` seconds from now."""
+        ...
+
+    async def delete(self, name: str) -> None:
+        ...
+
+
+@dataclass(slots=True)
+class _Entry:
+    name: str | None = None           # provider handle once created
+    tokens: int = 0
+    expires_at: float = 0.0           # provider-side expiry
+    refs: dict[str, float] = field(default_factory=dict)  # session_id -> last use
+    task: asyncio.Task | None = None  # pending create / extend
+    retry_at: float = 0.0             # no new create before this (after a failure)
+
+    def busy(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+def prefix_key(prefix: str) -> str:
+    return hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+
+class ContextCacheRegistry:
+    """Prefix → provider cache handle, reference-counted by session."""
+
+    EXTEND_SLACK = 5 * 60   # seconds of provider lifetime kept beyond `ttl`
+    RETRY_AFTER = 10 * 60   # seconds before retrying a failed create
+    SWEEP_INTERVAL = 60     # seconds between sweeps of lapsed references
+
+    def __init__(self, provider: ContextCacheProvider, ttl: float):
+        self.provider = provider
+        self.ttl = ttl
+        self._entries: dict[str, _Entry] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._next_sweep = 0.0
+
+    def __len__(self) -> int:
+        return sum(1 for e in self._entries.values() if e.name is not None)
+
+    @property
+    def lifetime(self) -> float:
+        return self.ttl + self.EXTEND_SLACK
+
+    def handle(self, prefix: str, session_id: str, now: float | None = None) -> str | None:
+        """
+        Provider cache name for `prefix` if one is ready, else None (send the
+        full prompt). Counts `session_id` as a user of the prefix and starts
+        creating / extending the provider cache as needed.
+        """
+        now = time.time() if now is None else now
+        if now >= self._next_sweep:
+            self.sweep(now)
+        entry = self._entries.setdefault(prefix_key(prefix), _Entry())
+        entry.refs[session_id] = now
+        if entry.name is not None and entry.expires_at <= now + self.EXTEND_SLACK / 5:
+            entry.name = None                 # about to expire under us: recreate
+        if entry.name is None:
+            if not entry.busy() and now >= entry.retry_at:
+                entry.task = self._spawn(self._create(entry, prefix))
+            return None
+        if entry.expires_at < now + self.ttl and not entry.busy():
+            entry.task = self._spawn(self._extend(entry))
+        return entry.name
+
+    def invalidate(self, prefix: str) -> None:
+        """The handle was rejected by the provider; stop using it for a while."""
+        entry = self._entries.get(prefix_key(prefix))
+        if entry is not None and entry.name is not None:
+            entry.name = None
+            entry.retry_at = time.time() + self.RETRY_AFTER
+
+    def release(self, prefix: str, session_id: str) -> None:
+        """`session_id` is done with `prefix`; the cache goes when nobody else uses it."""
+        key = prefix_key(prefix)
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.refs.pop(session_id, None)
+        if not entry.refs and not entry.busy():
+            self._drop(key, entry)
+
+    def sweep(self, now: float | None = None) -> None:
+        """Expire references idle for `ttl` and delete unreferenced caches."""
+        now = time.time() if now is None else now
+        self._next_sweep = now + self.SWEEP_INTERVAL
+        for key, entry in list(self._entries.items()):
+            for session_id, last_use in list(entry.refs.items()):
+                if last_use <= now - self.ttl:
+                    del entry.refs[session_id]
+            if not entry.refs and not entry.busy():
+                self._drop(key, entry)
+
+    async def close(self) -> None:
+        """Delete every provider cache this registry created (app shutdown)."""
+        for task in list(self._tasks):
+            task.cancel()
+        names = [e.name for e in self._entries.values() if e.name is not None]
+        self._entries.clear()
+        results = await asyncio.gather(*(self.provider.delete(n) for n in names), return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning("Could not delete context cache %s: %s", name, result)
+
+    def _drop(self, key: str, entry: _Entry) -> None:
+        del self._entries[key]
+        if entry.name is not None:
+            self._spawn(self._delete(entry.name))
+
+    def _spawn(self, coro: Coroutine) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _create(self, entry: _Entry, prefix: str) -> None:
+        try:
+            entry.name, entry.tokens = await self.provider.create(prefix, self.lifetime)
+            entry.expires_at = time.time() + self.lifetime
+            metrics.incr("context_cache.created")
+        except Exception as e:
+            logger.warning("Context cache creation failed, using full prompts: %s", e)
+            entry.retry_at = time.time() + self.RETRY_AFTER
+            metrics.incr("context_cache.create_failures")
+
+    async def _extend(self, entry: _Entry) -> None:
+        try:
+            await self.provider.extend(entry.name, self.lifetime)
+            entry.expires_at = time.time() + self.lifetime
+        except Exception as e:
+            logger.warning("Context cache %s could not be extended: %s", entry.name, e)
+
+    async def _delete(self, name: str) -> None:
+        try:
+            await self.provider.delete(name)
+            metrics.incr("context_cache.deleted")
+        except Exception as e:
+            logger.warning("Could not delete context cache %s: %s", name, e)
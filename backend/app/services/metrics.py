@@ -0,0 +1,47 @@
+"""
+In-process metrics: named counters plus gauges computed on read.
+
+Exposed as JSON at GET /api/metrics. Counters are per worker process and
+reset on restart; they are meant for dashboards and load tests, not billing.
+"""
+
+import threading
+from typing import Callable
+
+
+class Metrics:
+    """Thread-safe registry of float counters and callable gauges."""
+
+    def __init__(self):
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0.0) + value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def register_gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Register a value computed at snapshot time (e.g. a hit ratio)."""
+        with self._lock:
+            self._gauges[name] = fn
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            values = dict(self._counters)
+            gauges = list(self._gauges.items())
+        for name, fn in gauges:
+            values[name] = fn()
+        return dict(sorted(values.items()))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+# Module-level singleton
+metrics = Metrics()
@@ -0,0 +1,146 @@
+"""
+Recorded model responses for offline runs and load tests.
+
+settings.model_cassette_mode selects what ai_service does with them:
+  - "record": calls go to Gemini as usual, and each response is appended to
+    the cassette (settings.model_cassette_path, JSON lines) with the latency
+    it took.
+  - "replay": calls are answered from the cassette without credentials or
+    network, after a synthetic latency (settings.model_cassette_latency).
+  - "off": the cassette is not used.
+
+A recording is found by the request key (response_cache.cache_key() of the
+model, system prompt, contents, schema and generation parameters). A
+request that was never recorded falls back to a recording for the same
+model and schema whose last message (usually the student's answer) is the
+same; failing that it raises CassetteMissError. A key recorded several
+times serves its recordings in turn.
+
+Latency specs for replay (milliseconds):
+  "recorded"                 the latency observed when recording
+  "none"                     no delay
+  "fixed:800"                always 800 ms
+  "uniform:300:1500"         uniform between 300 and 1500 ms
+  "lognormal:800:4000"       log-normal with median 800 ms and p99 4000 ms
+"""
+
+import json
+import logging
+import math
+import random
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+from google.genai import types as genai_types
+
+from ..config import settings
+from .metrics import metrics
+from .response_cache import cache_key
+
+logger = logging.getLogger(__name__)
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+
+_Z99 = 2.3263  # standard normal 99th percentile
+
+
+class CassetteMissError(LookupError):
+    """Replay found no recording for the request."""
+
+
+@dataclass(frozen=True, slots=True)
+class Recording:
+    key: str
+    near: str       # key of the model, schema and last message only
+    model: str
+    text: str
+    latency: float  # seconds
+
+
+def request_keys(
+    model: str, contents: list[genai_types.Content], config: genai_types.GenerateContentConfig
+) -> tuple[str, str]:
+    """(exact key, near key) of a generate_content request."""
+    params = {"max_tokens": config.max_output_tokens, "temperature": config.temperature}
+    schema = config.response_schema or {}
+    exact = cache_key(model, str(config.system_instruction or ""), contents, schema, **params)
+    near = cache_key(model, "", contents[-1:], schema, **params)
+    return exact, near
+
+
+def latency_sampler(spec: str, rng: random.Random | None = None) -> Callable[[float], float]:
+    """Function from a recorded latency to the replay delay, both in seconds (see module doc)."""
+    rng = rng or random.Random()
+    kind, _, args = spec.partition(":")
+    values = [float(v) / 1000 for v in args.split(":")] if args else []
+    if kind == "recorded" and not values:
+        return lambda recorded: recorded
+    if kind == "none" and not values:
+        return lambda recorded: 0.0
+    if kind == "fixed" and len(values) == 1:
+        return lambda recorded: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda recorded: rng.uniform(*values)
+    if kind == "lognormal" and len(values) == 2 and 0 < values[0] <= values[1]:
+        mu, sigma = math.log(values[0]), (math.log(values[1]) - math.log(values[0])) / _Z99
+        return lambda recorded: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Invalid model cassette latency: {spec!r}")
+
+
+class Cassette:
+    """Recordings by key, loaded from and appended to a JSON-lines file."""
+
+    def __init__(self, path: str | Path, latency: str = "recorded", rng: random.Random | None = None):
+        self.path = Path(path)
+        self.delay = latency_sampler(latency, rng)
+        self._exact: dict[str, list[Recording]] = {}
+        self._near: dict[str, list[Recording]] = {}
+        self._served: dict[str, int] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(Recording(**json.loads(line)))
+
+    def __len__(self) -> int:
+        return sum(len(recordings) for recordings in self._exact.values())
+
+    def _add(self, recording: Recording) -> None:
+        self._exact.setdefault(recording.key, []).append(recording)
+        self._near.setdefault(recording.near, []).append(recording)
+
+    def record(self, recording: Recording) -> None:
+        with self._lock:
+            self._add(recording)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(recording), ensure_ascii=False) + "\n")
+
+    def lookup(self, key: str, near: str) -> Recording:
+        """The next recording for `key`, else for `near`; raises CassetteMissError."""
+        for index, found, metric in ((self._exact, key, "cassette.hits"), (self._near, near, "cassette.near_hits")):
+            recordings = index.get(found)
+            if recordings:
+                with self._lock:
+                    n = self._served.get(found, 0)
+                    self._served[found] = n + 1
+                metrics.incr(metric)
+                return recordings[n % len(recordings)]
+        metrics.incr("cassette.misses")
+        raise CassetteMissError(f"No recording for request {key[:12]}")
+
+
+def build_cassette() -> Cassette | None:
+    """Cassette for settings.model_cassette_mode, or None when it is off."""
+    mode = settings.model_cassette_mode
+    if mode == OFF:
+        return None
+    if mode not in (RECORD, REPLAY):
+        raise ValueError(f"Unknown model cassette mode: {mode!r}")
+    cassette = Cassette(settings.model_cassette_path, settings.model_cassette_latency)
+    logger.info("Model cassette %s: %s (%d recordings)", mode, cassette.path, len(cassette))
+    return cassette
@@ -0,0 +1,61 @@
+"""
+Model routing and hedging policy for answer evaluation.
+
+  - route_answer(): picks the model tier for a student answer. Very short
+    answers ("高山", "很高", "400") need little reasoning to evaluate and
+    go to settings.gemini_fast_model when one is configured; everything else
+    goes to settings.gemini_model. Answers that are clearly not an attempt
+    never get here: SocraticAgent answers them locally (LOCAL_ROUTE, see
+    answer_screen.py).
+  - LatencyTracker: recent call latencies per model. ai_service hedges a
+    call — sends a second, identical request and keeps whichever answers
+    first — once it has run past the tracked p95 for its model.
+"""
+
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from ..config import settings
+
+DEFAULT_ROUTE = "default"
+FAST_ROUTE = "fast"
+LOCAL_ROUTE = "local"
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    name: str
+    model: str
+
+
+def route_answer(student_answer: str) -> Route:
+    """The model tier that evaluates `student_answer`."""
+    if settings.gemini_fast_model and len(student_answer.strip()) <= settings.fast_route_max_chars:
+        return Route(FAST_ROUTE, settings.gemini_fast_model)
+    return Route(DEFAULT_ROUTE, settings.gemini_model)
+
+
+class LatencyTracker:
+    """Sliding window of the last `window` latencies, in seconds."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+
+    def quantile(self, q: float) -> float | None:
+        """The q-quantile of the window, or None until min_samples are in."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
@@ -0,0 +1,106 @@
+"""
+Character n-gram index over the paragraphs of a story.
+
+Chinese text has no word boundaries, so paragraphs are indexed by character
+unigrams and bigrams (after stt_service normalization: punctuation removed,
+Arabic numerals as Chinese numerals, so "4000" finds "四千") and ranked with
+BM25. One index is built per story and cached (paragraph_index()).
+
+SocraticAgent uses it to
+  - send only the paragraphs relevant to the current question and answer
+    when a story is too long to put in every prompt, and
+  - fill in referenced_paragraph when the model leaves it out or returns
+    an index that does not exist.
+"""
+
+import functools
+import math
+from collections import Counter
+from typing import Iterable, Sequence
+
+from .story_table import Story, story_table
+from .stt_service import _normalize_for_comparison
+
+_K1 = 1.2
+_B = 0.75
+
+
+def _grams(text: str) -> Iterable[str]:
+    yield from text
+    for i in range(len(text) - 1):
+        yield text[i:i + 2]
+
+
+class ParagraphIndex:
+    """Inverted index: n-gram → [(paragraph, count)], scored with BM25."""
+
+    def __init__(self, paragraphs: Sequence[str]):
+        self.size = len(paragraphs)
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths: list[int] = []
+        for i, paragraph in enumerate(paragraphs):
+            counts = Counter(_grams(_normalize_for_comparison(paragraph)))
+            self._lengths.append(sum(counts.values()))
+            for gram, count in counts.items():
+                self._postings.setdefault(gram, []).append((i, count))
+        indexed = sum(1 for n in self._lengths if n) or 1
+        avg_length = sum(self._lengths) / indexed
+        self._norms = [_K1 * (1 - _B + _B * n / avg_length) for n in self._lengths]
+        self._idf = {
+            gram: math.log(1 + (indexed - len(posts) + 0.5) / (len(posts) + 0.5))
+            for gram, posts in self._postings.items()
+        }
+
+    def scores(self, query: str) -> dict[int, float]:
+        """BM25 score of every paragraph sharing an n-gram with `query`."""
+        out: dict[int, float] = {}
+        for gram in set(_grams(_normalize_for_comparison(query))):
+            posts = self._postings.get(gram)
+            if posts is None:
+                continue
+            idf = self._idf[gram]
+            for i, count in posts:
+                out[i] = out.get(i, 0.0) + idf * count * (_K1 + 1) / (count + self._norms[i])
+        return out
+
+    def rank(self, query: str, limit: int | None = None) -> list[int]:
+        """Paragraph indices matching `query`, best first."""
+        scores = self.scores(query)
+        ranked = sorted(scores, key=lambda i: (-scores[i], i))
+        return ranked if limit is None else ranked[:limit]
+
+    def best(self, query: str) -> int | None:
+        ranked = self.rank(query, 1)
+        return ranked[0] if ranked else None
+
+    def select(self, query: str, count: int) -> list[int]:
+        """
+        `count` paragraph indices for a prompt excerpt, in story order: the
+        best matches, the paragraph after the best one (where the next
+        question is likely to go), then the earliest remaining paragraphs.
+        """
+        nonempty = [i for i, n in enumerate(self._lengths) if n]
+        if len(nonempty) <= count:
+            return nonempty
+        ranked = self.rank(query)
+        chosen = ranked[:count - 1]
+        if ranked and ranked[0] + 1 < self.size and self._lengths[ranked[0] + 1]:
+            chosen.append(ranked[0] + 1)
+        chosen = list(dict.fromkeys(chosen))
+        for i in nonempty:
+            if len(chosen) >= count:
+                break
+            if i not in chosen:
+                chosen.append(i)
+        return sorted(chosen[:count])
+
+
+def paragraph_index(story: Story) -> ParagraphIndex:
+    return _paragraph_index(story.key)
+
+
+# Keyed on the story key rather than the Story, so the cache does not keep
+# stories alive past their sessions (story_table holds them weakly).
+@functools.lru_cache(maxsize=256)
+def _paragraph_index(story_key: str) -> ParagraphIndex:
+    return ParagraphIndex(story_table[story_key].paragraphs)
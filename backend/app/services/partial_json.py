@@ -0,0 +1,160 @@
+"""
+Incremental parser for one streamed JSON object.
+
+Gemini streams structured output as arbitrary text chunks of a single JSON
+object. IncrementalObjectParser consumes those chunks and reports, as soon
+as the text allows:
+  - "delta" events: newly decoded characters of a top-level string value
+    that is still being written;
+  - "value" events: a top-level value once it is complete.
+So the feedback sentence can be shown while the model is still writing the
+next question. Nested objects / arrays are reported as whole values only.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+_WHITESPACE = " \t\r\n"
+_MAX_ESCAPE = 12  # longest escape sequence: a surrogate pair "\udXXX\udXXX"
+
+# Parser states
+_START, _KEY_OR_END, _KEY, _COLON, _VALUE, _STRING, _SCALAR, _NESTED, _AFTER_VALUE, _DONE = range(10)
+
+
+@dataclass(frozen=True, slots=True)
+class JsonEvent:
+    kind: str   # "delta" | "value" ("result" for the whole object, see ai_service)
+    key: str
+    value: Any  # the new characters for "delta", the decoded value for "value"
+
+
+def _decode_prefix(raw: str) -> str:
+    """Decode the longest prefix of a JSON string body that ends on a whole character."""
+    for cut in range(len(raw), max(-1, len(raw) - _MAX_ESCAPE - 1), -1):
+        try:
+            text = json.loads(f'"{raw[:cut]}"')
+        except json.JSONDecodeError:
+            continue
+        if text and "\ud800" <= text[-1] <= "\udbff":   # half of a surrogate pair
+            text = text[:-1]
+        return text
+    return ""
+
+
+class IncrementalObjectParser:
+    """Feed chunks of a JSON object; get JsonEvents back as fields appear."""
+
+    def __init__(self):
+        self._state = _START
+        self._text: list[str] = []       # everything fed so far
+        self._key_raw: list[str] = []
+        self._key = ""
+        self._raw: list[str] = []        # current value, undecoded
+        self._emitted = 0                # decoded characters of the current string already reported
+        self._escape = False
+        self._depth = 0
+        self._nested_in_string = False
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: str) -> list[JsonEvent]:
+        events: list[JsonEvent] = []
+        self._text.append(chunk)
+        for ch in chunk:
+            self._step(ch, events)
+        if self._state == _STRING:
+            self._string_delta(events)
+        return events
+
+    def result(self) -> dict:
+        """The whole object; raises json.JSONDecodeError if it is not valid JSON."""
+        return json.loads("".join(self._text))
+
+    def _step(self, ch: str, events: list[JsonEvent]) -> None:
+        state = self._state
+        if state == _STRING:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._string_delta(events)
+                events.append(JsonEvent("value", self._key, _decode_prefix("".join(self._raw))))
+                self._state = _AFTER_VALUE
+                return
+            self._raw.append(ch)
+        elif state == _KEY:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._key = json.loads('"' + "".join(self._key_raw) + '"')
+                self._state = _COLON
+                return
+            self._key_raw.append(ch)
+        elif ch in _WHITESPACE and state not in (_SCALAR, _NESTED):
+            return
+        elif state == _START:
+            if ch == "{":
+                self._state = _KEY_OR_END
+        elif state == _KEY_OR_END:
+            if ch == '"':
+                self._key_raw = []
+                self._state = _KEY
+            elif ch == "}":
+                self._state = _DONE
+        elif state == _COLON:
+            if ch == ":":
+                self._state = _VALUE
+        elif state == _VALUE:
+            self._raw = []
+            if ch == '"':
+                self._emitted = 0
+                self._state = _STRING
+            elif ch in "{[":
+                self._raw.append(ch)
+                self._depth = 1
+                self._state = _NESTED
+            else:
+                self._raw.append(ch)
+                self._state = _SCALAR
+        elif state == _SCALAR:
+            if ch in _WHITESPACE or ch in ",}":
+                events.append(JsonEvent("value", self._key, json.loads("".join(self._raw))))
+                self._state = _AFTER_VALUE
+                self._step(ch, events)
+            else:
+                self._raw.append(ch)
+        elif state == _NESTED:
+            self._raw.append(ch)
+            if self._nested_in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._nested_in_string = False
+            elif ch == '"':
+                self._nested_in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    events.append(JsonEvent("value", self._key, json.loads("".join(self._raw))))
+                    self._state = _AFTER_VALUE
+        elif state == _AFTER_VALUE:
+            if ch == ",":
+                self._state = _KEY_OR_END
+            elif ch == "}":
+                self._state = _DONE
+
+    def _string_delta(self, events: list[JsonEvent]) -> None:
+        decoded = _decode_prefix("".join(self._raw))
+        if len(decoded) > self._emitted:
+            events.append(JsonEvent("delta", self._key, decoded[self._emitted:]))
+            self._emitted = len(decoded)
@@ -0,0 +1,282 @@
+"""
+Pre-generated, phase-tagged Socratic questions per story.
+
+Teachers assign stories ahead of class, so the questions that do not depend
+on a student's answer — the opening question and the per-phase fallbacks —
+are generated in advance by a background job and served from memory.
+Only the answer evaluation stays a live model call.
+
+Stories are keyed by a hash of title + text (paragraphs joined with "\\n",
+as the frontend sends them), so a bank entry is used exactly when the
+session's story matches what was generated.
+
+Generate / refresh the bank file (MOCK_STORIES, plus DB texts with --db):
+    cd backend && python -m app.services.question_bank [--db] [--refresh]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable
+
+from google.genai import types as genai_types
+
+from ..config import settings
+from .ai_service import generate_structured_response
+from .story_table import story_key
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("factual", "inferential", "evaluative")   # same order as socratic_agent.PHASE_ORDER
+QUESTIONS_PER_PHASE = 4
+BANK_FILE_VERSION = 1
+
+QUESTION_BANK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "phase": {"type": "string", "enum": list(PHASES)},
+                    "question": {
+                        "type": "string",
+                        "description": "A Socratic question in Traditional Chinese, 15-40 characters",
+                    },
+                    "referenced_paragraph": {
+                        "type": "INTEGER",
+                        "description": "問題所針對的段落索引（從 0 開始）",
+                        "nullable": True,
+                    },
+                },
+                "required": ["phase", "question"],
+            },
+        },
+    },
+    "required": ["questions"],
+}
+
+
+@dataclass(frozen=True, slots=True)
+class BankQuestion:
+    phase: str
+    question: str
+    referenced_paragraph: int | None = None
+
+
+class QuestionBank:
+    """In-memory bank: story key → questions, loadable from / savable to JSON."""
+
+    def __init__(self):
+        self._stories: dict[str, dict] = {}   # key → {"title": str, "questions": list[BankQuestion]}
+
+    def __len__(self) -> int:
+        return len(self._stories)
+
+    def has(self, story_title: str, story_text: str) -> bool:
+        return story_key(story_title, story_text) in self._stories
+
+    def get(self, story_title: str, story_text: str) -> list[BankQuestion]:
+        entry = self._stories.get(story_key(story_title, story_text))
+        return list(entry["questions"]) if entry else []
+
+    def put(self, story_title: str, story_text: str, questions: Iterable[BankQuestion]) -> None:
+        self._stories[story_key(story_title, story_text)] = {
+            "title": story_title,
+            "questions": list(questions),
+        }
+
+    def pick(
+        self,
+        story_title: str,
+        story_text: str,
+        phase: str,
+        exclude: Iterable[str] = (),
+        prefer_paragraphs: Iterable[int] = (),
+    ) -> BankQuestion | None:
+        """
+        A random bank question of `phase` that is not in `exclude`, preferring
+        ones about `prefer_paragraphs`. None if the bank has nothing suitable.
+        """
+        excluded = set(exclude)
+        candidates = [
+            q for q in self.get(story_title, story_text)
+            if q.phase == phase and q.question not in excluded
+        ]
+        preferred = set(prefer_paragraphs)
+        focused = [q for q in candidates if q.referenced_paragraph in preferred]
+        pool = focused or candidates
+        return random.choice(pool) if pool else None
+
+    def clear(self) -> None:
+        self._stories.clear()
+
+    def save(self, path: str | Path) -> None:
+        data = {
+            "version": BANK_FILE_VERSION,
+            "stories": {
+                key: {"title": entry["title"], "questions": [asdict(q) for q in entry["questions"]]}
+                for key, entry in self._stories.items()
+            },
+        }
+        Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    def load(self, path: str | Path) -> int:
+        """Merge a saved bank into this one; returns the number of stories loaded."""
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("version") != BANK_FILE_VERSION:
+            raise ValueError(f"Unsupported question bank version: {data.get('version')!r}")
+        for key, entry in data["stories"].items():
+            self._stories[key] = {
+                "title": entry["title"],
+                "questions": [BankQuestion(**q) for q in entry["questions"]],
+            }
+        return len(data["stories"])
+
+
+# Module-level singleton used by SocraticAgent
+question_bank = QuestionBank()
+
+
+# ---------------------------------------------------------------------------
+# Generation
+# ---------------------------------------------------------------------------
+
+def _build_prompt(story_title: str, story_text: str, per_phase: int) -> str:
+    numbered_text = "\n".join(
+        f"[第{i}段] {p}" for i, p in enumerate(story_text.split("\n")) if p.strip()
+    )
+    return f"""你是一位溫暖、鼓勵學生的繁體中文閱讀助教，擅長用蘇格拉底式問答引導學生深入理解課文。
+
+課文標題：{story_title}
+
+課文內容（每段前標有段落索引）：
+{numbered_text}
+
+請為這篇課文預先準備題庫：factual、inferential、evaluative 三個階段各 {per_phase} 題。
+
+提問品質要求：
+- 問題必須針對課文的核心訊息、角色動機、或重要細節，不要問太表面的問題
+- factual：事實性問題（誰、什麼、在哪裡、發生什麼事），聚焦最重要的事件或細節
+- inferential：推論性問題（為什麼、怎麼會這樣、有什麼影響），引導思考因果關係、角色心理或作者意圖
+- evaluative：評估性問題（你覺得、如果是你、這個故事告訴我們什麼），連結自身經驗
+- 每個問題應指向課文中特定的段落，並在 referenced_paragraph 填入該段落索引（從 0 開始）
+- 同一階段的問題要涵蓋課文的不同面向，不要重複
+- 語氣溫暖、友善，適合小學高年級至國中生；只用繁體中文
+- 問題長度：15-40 個字"""
+
+
+async def generate_questions(
+    story_title: str, story_text: str, per_phase: int = QUESTIONS_PER_PHASE
+) -> list[BankQuestion]:
+    """Ask Gemini for a phase-tagged question set; invalid items are dropped."""
+    result = await generate_structured_response(
+        system_prompt=_build_prompt(story_title, story_text, per_phase),
+        contents=[
+            genai_types.Content(role="user", parts=[genai_types.Part(text="請產生題庫。")])
+        ],
+        response_schema=QUESTION_BANK_SCHEMA,
+        max_tokens=4096,
+    )
+    num_paragraphs = len(story_text.split("\n"))
+    questions: list[BankQuestion] = []
+    seen: set[str] = set()
+    for item in result.get("questions", []):
+        phase = item.get("phase")
+        question = (item.get("question") or "").strip()
+        paragraph = item.get("referenced_paragraph")
+        if phase not in PHASES or not question or question in seen:
+            continue
+        if not isinstance(paragraph, int) or not 0 <= paragraph < num_paragraphs:
+            paragraph = None
+        seen.add(question)
+        questions.append(BankQuestion(phase, question, paragraph))
+    return questions
+
+
+async def warm_question_bank(
+    bank: QuestionBank,
+    stories: Iterable[tuple[str, str]],
+    refresh: bool = False,
+    concurrency: int = 4,
+) -> int:
+    """
+    Generate bank entries for (title, text) stories that are missing (or all
+    of them with refresh=True). A failing story is logged and skipped.
+    Returns the number of stories generated.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm(title: str, text: str) -> bool:
+        async with semaphore:
+            try:
+                questions = await generate_questions(title, text)
+            except Exception as e:
+                logger.warning("Question bank generation failed for %s: %s", title, e)
+                return False
+        if not {q.phase for q in questions} >= set(PHASES):
+            logger.warning("Question bank for %s is missing a phase, skipped", title)
+            return False
+        bank.put(title, text, questions)
+        return True
+
+    todo = [(t, x) for t, x in stories if refresh or not bank.has(t, x)]
+    results = await asyncio.gather(*(warm(t, x) for t, x in todo))
+    return sum(results)
+
+
+def mock_stories() -> list[tuple[str, str]]:
+    from ..routes.stories import MOCK_STORIES
+
+    return [(s["title"], "\n".join(s["content"])) for s in MOCK_STORIES]
+
+
+def db_stories() -> list[tuple[str, str]]:
+    from sqlalchemy import select
+
+    from ..database import SessionLocal
+    from ..models import Text
+
+    with SessionLocal() as db:
+        return [(t.title, "\n".join(json.loads(t.content))) for t in db.scalars(select(Text))]
+
+
+def load_question_bank(path: str | Path | None = None) -> int:
+    """Load the bank file into the singleton at startup; missing file → empty bank."""
+    path = Path(path or settings.question_bank_path)
+    if not path.exists():
+        logger.info("No question bank at %s; questions will be generated live", path)
+        return 0
+    try:
+        return question_bank.load(path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Could not load question bank %s: %s", path, e)
+        return 0
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from . import ai_service
+
+    path = Path(args.output or settings.question_bank_path)
+    if path.exists():
+        question_bank.load(path)
+    stories = mock_stories() + (db_stories() if args.db else [])
+    try:
+        generated = await warm_question_bank(question_bank, stories, refresh=args.refresh)
+    finally:
+        await ai_service.close_client()
+    question_bank.save(path)
+    print(f"Generated {generated} stories; {len(question_bank)} in {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate the Socratic question bank")
+    parser.add_argument("--db", action="store_true", help="also include texts from the database")
+    parser.add_argument("--refresh", action="store_true", help="regenerate stories already in the bank")
+    parser.add_argument("--output", help="bank file (default: settings.question_bank_path)")
+    asyncio.run(_main(parser.parse_args()))
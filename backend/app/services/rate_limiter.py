@@ -0,0 +1,121 @@
+"""
+Per-key request rate limiting with O(1) state per key.
+
+Sliding-window counter: time is cut into fixed windows of `window` seconds
+and a key keeps only (window index, count in the previous window, count in
+the current window). A request is allowed while
+
+    previous_count × (fraction of the previous window still inside the
+    sliding window) + current_count  <  limit
+
+which approximates a true sliding log without storing timestamps.
+
+Backends:
+  - MemoryRateLimiter: per process; keys idle for two windows carry no
+    information any more and are evicted in LRU order on every call.
+  - RedisRateLimiter: shared by every worker; one Lua script does the
+    read-modify-write atomically and the key expires after two windows.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+RATE_KEY_PREFIX = "lingoleap:ratelimit:"
+
+# (window index, previous window count, current window count)
+WindowState = tuple[int, int, int]
+
+
+def sliding_window_step(
+    state: WindowState | None, now: float, limit: int, window: float
+) -> tuple[bool, WindowState]:
+    """Apply one request at `now`; returns (allowed, new state)."""
+    idx = math.floor(now / window)
+    if state is None:
+        prev, curr = 0, 0
+    else:
+        w, prev, curr = state
+        if w != idx:
+            prev = curr if w == idx - 1 else 0
+            curr = 0
+    weight = 1.0 - (now - idx * window) / window
+    if prev * weight + curr >= limit:
+        return False, (idx, prev, curr)
+    return True, (idx, prev, curr + 1)
+
+
+# Same algorithm as sliding_window_step(), stored as a hash {w, p, c}.
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local idx = math.floor(now / window)
+local data = redis.call('HMGET', KEYS[1], 'w', 'p', 'c')
+local w, p, c = tonumber(data[1]), tonumber(data[2]) or 0, tonumber(data[3]) or 0
+if w == nil then
+  p, c = 0, 0
+elseif w ~= idx then
+  if w == idx - 1 then p = c else p = 0 end
+  c = 0
+end
+local weight = 1 - (now - idx * window) / window
+if p * weight + c >= limit then
+  return 0
+end
+redis.call('HSET', KEYS[1], 'w', idx, 'p', p, 'c', c + 1)
+redis.call('PEXPIRE', KEYS[1], math.ceil(window * 2000))
+return 1
+"""
+
+
+class RateLimiter(Protocol):
+    async def allow(self, key: str) -> bool:
+        """Count a request for `key`; False if it is over the limit."""
+        ...
+
+
+class MemoryRateLimiter:
+    """Sliding-window counter per key in an LRU-ordered dict."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._states: OrderedDict[str, WindowState] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    async def allow(self, key: str) -> bool:
+        return self.allow_at(key, time.time())
+
+    def allow_at(self, key: str, now: float) -> bool:
+        states = self._states
+        allowed, state = sliding_window_step(states.get(key), now, self.limit, self.window)
+        states[key] = state
+        states.move_to_end(key)
+        # Least recently used keys come first; once a key's last window is
+        # two windows old its counts no longer matter.
+        stale = math.floor(now / self.window) - 1
+        while states:
+            oldest_key, oldest = next(iter(states.items()))
+            if oldest[0] >= stale:
+                break
+            del states[oldest_key]
+        return allowed
+
+
+class RedisRateLimiter:
+    """Sliding-window counter shared through Redis (atomic Lua update)."""
+
+    def __init__(self, redis, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._script = redis.register_script(_SLIDING_WINDOW_LUA)
+
+    async def allow(self, key: str) -> bool:
+        result = await self._script(
+            keys=[RATE_KEY_PREFIX + key], args=[self.limit, self.window, time.time()]
+        )
+        return bool(int(result))
@@ -0,0 +1,174 @@
+"""
+Content-addressed cache of structured Gemini responses.
+
+A key is the SHA-256 of everything that determines the model output
+(model, system prompt, contents, schema, generation parameters), so two
+sessions that would send byte-identical requests share an entry — e.g. a
+whole class opening the same story gets the same first-question prompt.
+
+Each key holds a small pool of up to N response variants: the first N
+requests for a key still go to the model and add their answer to the pool,
+later ones are served a random variant. That keeps some variety in the
+questions while bounding model calls per key to N per TTL.
+
+Backends: in-memory LRU (per worker) or Redis (shared across workers),
+selected by settings.response_cache_backend ("memory" | "redis" | "none").
+Cache failures never fail a request — they are logged and treated as misses.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+import redis.asyncio as aioredis
+from google.genai import types as genai_types
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "lingoleap:response:"
+
+
+def cache_key(
+    model: str,
+    system_prompt: str,
+    contents: list[genai_types.Content],
+    response_schema: dict,
+    **params,
+) -> str:
+    """SHA-256 over the request; stable across processes and key orders."""
+    digest = hashlib.sha256()
+    for part in (
+        model,
+        system_prompt,
+        json.dumps([c.model_dump(mode="json", exclude_none=True) for c in contents],
+                   ensure_ascii=False, sort_keys=True),
+        json.dumps(response_schema, ensure_ascii=False, sort_keys=True),
+        json.dumps(params, sort_keys=True),
+    ):
+        digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+
+class ResponseCache(Protocol):
+    async def get_variants(self, key: str) -> list[str]:
+        """Serialized variants stored under `key` (empty if none / expired)."""
+        ...
+
+    async def add_variant(self, key: str, value: str) -> None:
+        """Append a variant, keeping at most `max_variants`, and (re)start the TTL."""
+        ...
+
+    async def clear(self) -> None:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class MemoryResponseCache:
+    """Per-process LRU of variant pools with a TTL per key."""
+
+    def __init__(self, max_entries: int, ttl: float, max_variants: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_variants = max_variants
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get_variants(self, key: str) -> list[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return []
+            expires_at, variants = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return []
+            self._entries.move_to_end(key)
+            return list(variants)
+
+    async def add_variant(self, key: str, value: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            variants = entry[1] if entry and entry[0] > time.monotonic() else []
+            variants = (variants + [value])[-self.max_variants:]
+            self._entries[key] = (time.monotonic() + self.ttl, variants)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def close(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisResponseCache:
+    """
+    Variant pools as Redis lists, shared by every worker.
+
+    Size is bounded by the TTL and the server's maxmemory policy
+    (allkeys-lru recommended), not by an entry count.
+    """
+
+    def __init__(self, redis, ttl: float, max_variants: int):
+        self._redis = redis
+        self.ttl = ttl
+        self.max_variants = max_variants
+
+    async def get_variants(self, key: str) -> list[str]:
+        try:
+            values = await self._redis.lrange(REDIS_KEY_PREFIX + key, 0, -1)
+        except Exception as e:
+            logger.warning("Response cache read failed: %s", e)
+            return []
+        return [v.decode() if isinstance(v, bytes) else v for v in values]
+
+    async def add_variant(self, key: str, value: str) -> None:
+        name = REDIS_KEY_PREFIX + key
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.rpush(name, value)
+                pipe.ltrim(name, -self.max_variants, -1)
+                pipe.expire(name, int(self.ttl))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    async def clear(self) -> None:
+        async for name in self._redis.scan_iter(match=REDIS_KEY_PREFIX + "*"):
+            await self._redis.delete(name)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def build_response_cache() -> ResponseCache | None:
+    """Cache configured by settings; None when caching is disabled."""
+    backend = settings.response_cache_backend
+    if backend == "none":
+        return None
+    if backend == "redis":
+        return RedisResponseCache(
+            aioredis.Redis.from_url(settings.redis_url),
+            settings.response_cache_ttl,
+            settings.response_cache_variants,
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown response cache backend: {backend!r}")
+    return MemoryResponseCache(
+        settings.response_cache_max_entries,
+        settings.response_cache_ttl,
+        settings.response_cache_variants,
+    )
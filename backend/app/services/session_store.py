@@ -0,0 +1,436 @@
+"""
+Storage of Socratic session state.
+
+Two interchangeable backends, selected by settings.session_store_backend:
+  - "memory": per-process dict (single worker, lost on restart).
+  - "redis":  shared by every worker / instance, so a student's next answer
+              may land anywhere; sessions expire via native key TTL.
+Both use a sliding TTL: a session lives TTL_SECONDS past its last access.
+
+Writes are optimistic: a SessionState carries the version it was read at,
+and save() fails with SessionConflictError if the stored session has moved
+on since (e.g. two answers for the same session raced).
+
+A session references its story through the shared story table instead of
+carrying the text, and keeps at most HISTORY_TURNS turns in a Conversation
+ring buffer.
+
+A session can be exported as a self-contained snapshot (snapshot_state())
+and a new session started from a snapshot or forked from a live session
+(SessionState.fork()), so a conversation does not have to be replayed
+through the model to reach the same point.
+"""
+
+import heapq
+import json
+import logging
+import sys
+import time
+from dataclasses import MISSING, dataclass, field, fields, replace
+from typing import Iterable, Iterator, Protocol
+
+import redis.asyncio as aioredis
+from redis.exceptions import WatchError
+
+from ..config import settings
+from .rate_limiter import MemoryRateLimiter, RateLimiter, RedisRateLimiter
+from .story_table import Story, story_table
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY_PREFIX = "lingoleap:session:"
+STORY_KEY_PREFIX = "lingoleap:story:"
+SESSION_TTL_SECONDS = 30 * 60  # idle time after which a session expires
+
+HISTORY_TURNS = 10  # first turn + the last HISTORY_TURNS - 1 turns are kept
+
+Turn = tuple[str, str]  # (role, text); role is "ai" or "student"
+
+
+class Conversation:
+    """
+    Bounded turn history. The first turn (the opening question) is pinned
+    and the other capacity - 1 slots form a ring buffer, so a turn appended
+    to a full history overwrites the oldest later turn in place.
+
+    copy() is copy-on-write: both copies share the ring until one of them
+    appends.
+    """
+
+    __slots__ = ("capacity", "_first", "_ring", "_start", "_shared")
+
+    def __init__(self, turns: Iterable[Turn] = (), capacity: int = HISTORY_TURNS):
+        if capacity < 2:
+            raise ValueError("Conversation capacity must be at least 2")
+        self.capacity = capacity
+        self._first: Turn | None = None
+        self._ring: list[Turn] = []
+        self._start = 0
+        self._shared = False
+        for role, text in turns:
+            self.append(role, text)
+
+    def append(self, role: str, text: str) -> None:
+        turn = (sys.intern(role), text)
+        if self._first is None:
+            self._first = turn
+            return
+        if self._shared:
+            self._ring, self._shared = list(self._ring), False
+        if len(self._ring) < self.capacity - 1:
+            self._ring.append(turn)
+        else:
+            self._ring[self._start] = turn
+            self._start = (self._start + 1) % len(self._ring)
+
+    def copy(self) -> "Conversation":
+        other = Conversation.__new__(Conversation)
+        other.capacity, other._first, other._start = self.capacity, self._first, self._start
+        other._ring = self._ring
+        other._shared = self._shared = True
+        return other
+
+    def __iter__(self) -> Iterator[Turn]:
+        if self._first is None:
+            return
+        yield self._first
+        ring, start = self._ring, self._start
+        for i in range(len(ring)):
+            yield ring[(start + i) % len(ring)]
+
+    def __len__(self) -> int:
+        return (self._first is not None) + len(self._ring)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Conversation):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"Conversation({list(self)!r})"
+
+
+@dataclass(slots=True)
+class SessionState:
+    session_id: str
+    story: Story  # shared through story_table, never copied per session
+    conversation: Conversation = field(default_factory=Conversation)
+    understood_count: int = 0
+    total_attempts: int = 0
+    current_phase: str = "factual"  # factual -> inferential -> evaluative
+    created_at: float = field(default_factory=time.time)
+    consecutive_errors: int = 0
+    # Optional reading results from LiveTutor (Issue #17)
+    mispronounced_words: list[str] | None = None
+    accuracy: float | None = None
+    cpm: float | None = None
+    # Store version this state was read at (optimistic locking)
+    version: int = 0
+
+    @property
+    def story_title(self) -> str:
+        return self.story.title
+
+    @property
+    def story_text(self) -> str:
+        return self.story.text
+
+    def copy(self) -> "SessionState":
+        words = self.mispronounced_words
+        return replace(
+            self,
+            conversation=self.conversation.copy(),
+            mispronounced_words=list(words) if words is not None else None,
+        )
+
+    def fork(self, session_id: str) -> "SessionState":
+        """A new, unsaved session `session_id` continuing from this one."""
+        forked = self.copy()
+        forked.session_id = session_id
+        forked.created_at = time.time()
+        forked.consecutive_errors = 0
+        forked.version = 0
+        return forked
+
+
+class SessionConflictError(Exception):
+    """The session was modified by another request since it was read."""
+
+
+class SessionNotFoundError(LookupError):
+    """No session has the id (never started, or expired)."""
+
+
+_SCALAR_FIELDS = [f for f in fields(SessionState) if f.name not in ("story", "conversation")]
+_DEFAULTS = {f.name: f.default for f in _SCALAR_FIELDS if f.default is not MISSING}
+
+
+def dump_state(state: SessionState) -> str:
+    """
+    Compact JSON: the story is referenced by key, turns are [role, text]
+    pairs and fields still at their default value are omitted.
+    """
+    data = {"story": state.story.key}
+    if state.conversation:
+        data["conversation"] = list(state.conversation)
+    for f in _SCALAR_FIELDS:
+        value = getattr(state, f.name)
+        default = _DEFAULTS.get(f.name, MISSING)
+        if value != default or type(value) is not type(default):
+            data[f.name] = value
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _state_from_data(data: dict, story: Story) -> SessionState:
+    data = dict(data)
+    del data["story"]
+    conversation = Conversation(data.pop("conversation", ()))
+    return SessionState(story=story, conversation=conversation, **data)
+
+
+def load_state(raw: str | bytes) -> SessionState:
+    """Inverse of dump_state(); the story must be in story_table."""
+    data = json.loads(raw)
+    story = story_table.get(data["story"])
+    if story is None:
+        raise KeyError(f"Story {data['story']} is not in the story table")
+    return _state_from_data(data, story)
+
+
+def snapshot_state(state: SessionState) -> dict:
+    """
+    Self-contained export of a session: the story text is included and the
+    session id, version and timestamps are not, so the snapshot can start
+    sessions in any process (state_from_snapshot()).
+    """
+    return {
+        "story_title": state.story.title,
+        "story_text": state.story.text,
+        "conversation": [{"role": role, "text": text} for role, text in state.conversation],
+        "understood_count": state.understood_count,
+        "total_attempts": state.total_attempts,
+        "current_phase": state.current_phase,
+        "mispronounced_words": state.mispronounced_words,
+        "accuracy": state.accuracy,
+        "cpm": state.cpm,
+    }
+
+
+def state_from_snapshot(session_id: str, snapshot: dict) -> SessionState:
+    """A new, unsaved session `session_id` in the state `snapshot` records."""
+    words = snapshot.get("mispronounced_words")
+    return SessionState(
+        session_id=session_id,
+        story=story_table.intern(snapshot["story_title"], snapshot["story_text"]),
+        conversation=Conversation((t["role"], t["text"]) for t in snapshot.get("conversation", ())),
+        understood_count=snapshot.get("understood_count", 0),
+        total_attempts=snapshot.get("total_attempts", 0),
+        current_phase=snapshot.get("current_phase", "factual"),
+        mispronounced_words=list(words) if words is not None else None,
+        accuracy=snapshot.get("accuracy"),
+        cpm=snapshot.get("cpm"),
+    )
+
+
+class SessionStore(Protocol):
+    TTL_SECONDS: int
+    RATE_LIMIT: int
+    RATE_WINDOW: int
+
+    async def get(self, session_id: str) -> SessionState | None:
+        ...
+
+    async def save(self, state: SessionState, exclusive: bool = False) -> None:
+        """
+        Write `state` if nobody saved the session since it was read, and bump
+        state.version. A new state (version 0) replaces any stored session,
+        unless `exclusive`: then a stored session raises SessionConflictError.
+        """
+        ...
+
+    async def check_rate_limit(self, session_id: str) -> bool:
+        """Return True if rate limit exceeded."""
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class MemorySessionStore:
+    """
+    In-memory session store; a session expires TTL_SECONDS after its last access.
+
+    Deadlines live in a min-heap, so each get/save only pops the sessions
+    that have actually expired (amortized O(log n)) instead of scanning
+    every session. Refreshing a deadline pushes a new heap entry; the stale
+    one is skipped when it surfaces and the heap is rebuilt once stale
+    entries dominate.
+    """
+
+    TTL_SECONDS = SESSION_TTL_SECONDS
+    RATE_LIMIT = 30  # max requests per minute per session
+    RATE_WINDOW = 60  # seconds
+
+    def __init__(self):
+        self._sessions: dict[str, SessionState] = {}
+        self._deadlines: dict[str, float] = {}          # session_id -> expiry time
+        self._expiry_heap: list[tuple[float, str]] = []  # (deadline, session_id), may hold stale entries
+        self._rate_limiter: RateLimiter = MemoryRateLimiter(self.RATE_LIMIT, self.RATE_WINDOW)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def get(self, session_id: str) -> SessionState | None:
+        now = time.time()
+        self.purge_expired(now)
+        state = self._sessions.get(session_id)
+        if state is None:
+            return None
+        self._touch(session_id, now)
+        # Hand out a copy so an unsaved change is never visible to other requests
+        return state.copy()
+
+    async def save(self, state: SessionState, exclusive: bool = False) -> None:
+        now = time.time()
+        self.purge_expired(now)
+        current = self._sessions.get(state.session_id)
+        if exclusive and current is not None:
+            raise SessionConflictError(f"Session {state.session_id} already exists")
+        if state.version and current is not None and current.version != state.version:
+            raise SessionConflictError(f"Session {state.session_id} was modified concurrently")
+        state.version += 1
+        self._sessions[state.session_id] = state.copy()
+        self._touch(state.session_id, now)
+
+    def _touch(self, session_id: str, now: float) -> None:
+        deadline = now + self.TTL_SECONDS
+        self._deadlines[session_id] = deadline
+        heapq.heappush(self._expiry_heap, (deadline, session_id))
+        if len(self._expiry_heap) > 2 * len(self._deadlines) + 64:
+            self._expiry_heap = [(d, sid) for sid, d in self._deadlines.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def purge_expired(self, now: float | None = None) -> int:
+        """Drop sessions whose deadline has passed; returns how many were removed."""
+        now = time.time() if now is None else now
+        heap, removed = self._expiry_heap, 0
+        while heap and heap[0][0] <= now:
+            deadline, session_id = heapq.heappop(heap)
+            if self._deadlines.get(session_id) == deadline:    # not refreshed since
+                del self._deadlines[session_id]
+                del self._sessions[session_id]
+                removed += 1
+        return removed
+
+    async def check_rate_limit(self, session_id: str) -> bool:
+        """Return True if rate limit exceeded."""
+        return not await self._rate_limiter.allow(session_id)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisSessionStore:
+    """
+    Sessions as compact JSON strings expiring TTL_SECONDS after their last
+    access (GETEX / SET EX refresh the key TTL).
+
+    Story texts are stored once per story under STORY_KEY_PREFIX with a
+    2 × TTL_SECONDS expiry. Each worker rewrites a story on save(), and
+    refreshes its expiry on get(), at most once per TTL_SECONDS, so a story
+    outlives every session that references it — including sessions that
+    are only read, and kept alive by GETEX, on a worker that never wrote it.
+
+    save() is a WATCH / GET / MULTI / SET / EXEC round trip: the stored
+    version must still equal the one the state was read at.
+    """
+
+    TTL_SECONDS = SESSION_TTL_SECONDS
+    RATE_LIMIT = 30  # max requests per minute per session
+    RATE_WINDOW = 60  # seconds
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._rate_limiter: RateLimiter = RedisRateLimiter(redis, self.RATE_LIMIT, self.RATE_WINDOW)
+        self._story_written: dict[str, float] = {}  # story key -> when this worker last wrote it
+
+    async def get(self, session_id: str) -> SessionState | None:
+        raw = await self._redis.getex(SESSION_KEY_PREFIX + session_id, ex=self.TTL_SECONDS)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        key, now = data["story"], time.time()
+        story = story_table.get(key)
+        if story is None:
+            story = await self._load_story(key)
+        elif not self._story_is_fresh(key, now):
+            if not await self._redis.expire(STORY_KEY_PREFIX + key, 2 * self.TTL_SECONDS):
+                await self._redis.set(STORY_KEY_PREFIX + key, _story_json(story), ex=2 * self.TTL_SECONDS)
+            self._story_refreshed(key, now)
+        if story is None:
+            logger.warning("Story %s of session %s is missing from Redis", key, session_id)
+            return None
+        return _state_from_data(data, story)
+
+    async def _load_story(self, key: str) -> Story | None:
+        raw = await self._redis.getex(STORY_KEY_PREFIX + key, ex=2 * self.TTL_SECONDS)
+        if raw is None:
+            return None
+        self._story_refreshed(key, time.time())
+        data = json.loads(raw)
+        return story_table.intern(data["title"], data["text"])
+
+    def _story_is_fresh(self, key: str, now: float) -> bool:
+        written = self._story_written.get(key)
+        return written is not None and now - written < self.TTL_SECONDS
+
+    def _story_refreshed(self, key: str, now: float) -> None:
+        self._story_written[key] = now
+        if len(self._story_written) > 1024:
+            self._story_written = {k: t for k, t in self._story_written.items() if self._story_is_fresh(k, now)}
+
+    async def save(self, state: SessionState, exclusive: bool = False) -> None:
+        key = SESSION_KEY_PREFIX + state.session_id
+        story = state.story
+        now = time.time()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                raw = await pipe.get(key)
+                if exclusive and raw is not None:
+                    raise SessionConflictError(f"Session {state.session_id} already exists")
+                if state.version and raw is not None and json.loads(raw).get("version", 0) != state.version:
+                    raise SessionConflictError(f"Session {state.session_id} was modified concurrently")
+                pipe.multi()
+                state.version += 1
+                pipe.set(key, dump_state(state), ex=self.TTL_SECONDS)
+                write_story = not self._story_is_fresh(story.key, now)
+                if write_story:
+                    pipe.set(STORY_KEY_PREFIX + story.key, _story_json(story), ex=2 * self.TTL_SECONDS)
+                await pipe.execute()
+            except WatchError:
+                state.version -= 1
+                raise SessionConflictError(f"Session {state.session_id} was modified concurrently")
+        if write_story:
+            self._story_refreshed(story.key, now)
+
+    async def check_rate_limit(self, session_id: str) -> bool:
+        """Return True if rate limit exceeded (shared across workers)."""
+        return not await self._rate_limiter.allow(session_id)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def _story_json(story: Story) -> str:
+    return json.dumps({"title": story.title, "text": story.text}, ensure_ascii=False)
+
+
+def build_session_store() -> SessionStore:
+    """Session store configured by settings.session_store_backend."""
+    backend = settings.session_store_backend
+    if backend == "redis":
+        return RedisSessionStore(aioredis.Redis.from_url(settings.redis_url))
+    if backend != "memory":
+        raise ValueError(f"Unknown session store backend: {backend!r}")
+    return MemorySessionStore()
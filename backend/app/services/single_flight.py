@@ -0,0 +1,96 @@
+"""
+Per-key coordination of concurrent async work within one process.
+
+  - SingleFlight: concurrent calls with the same key share one execution
+    and its result (e.g. a double-tapped submit sends the same answer twice).
+  - KeyedLock: calls with the same key run one at a time (e.g. two
+    different answers for one session must not interleave).
+
+Both only hold state for keys that are in use, so they stay bounded by the
+number of requests in flight. They do not coordinate across workers; the
+session store's optimistic version check covers that.
+"""
+
+import asyncio
+import contextlib
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Key → the future of the call in flight for it."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def pending(self, key: Hashable) -> asyncio.Future | None:
+        return self._calls.get(key)
+
+    def start(self, key: Hashable) -> asyncio.Future:
+        """Register the caller as the one executing `key`; finish() must follow."""
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        return future
+
+    def finish(
+        self, key: Hashable, future: asyncio.Future, result: Any = None, error: BaseException | None = None
+    ) -> None:
+        """Hand the outcome to the waiting callers and forget the key."""
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if future.done():
+            return
+        if error is None:
+            future.set_result(result)
+        elif isinstance(error, Exception):
+            future.set_exception(error)
+            future.exception()  # waiters re-raise it; don't warn when there are none
+        else:
+            future.cancel()     # cancelled / closed: waiters run the call themselves
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn`, or wait for the identical call already in flight."""
+        pending = self._calls.get(key)
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise           # this caller itself was cancelled
+                # the leading call was; run it ourselves
+        future = self.start(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+        self.finish(key, future, result)
+        return result
+
+
+class KeyedLock:
+    """An asyncio.Lock per key, dropped once nobody holds or waits for it."""
+
+    def __init__(self):
+        self._locks: dict[Hashable, tuple[asyncio.Lock, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @contextlib.asynccontextmanager
+    async def __call__(self, key: Hashable) -> AsyncIterator[None]:
+        lock, users = self._locks.get(key) or (asyncio.Lock(), 0)
+        self._locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[key]
+            if users == 1:
+                del self._locks[key]
+            else:
+                self._locks[key] = (lock, users - 1)
@@ -4,76 +4,48 @@ Manages session state, evaluates student comprehension, and generates
 follow-up questions using structured Gemini output.
 """
 
-import time
+import functools
 import logging
-from dataclasses import dataclass, field
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
 
 from google.genai import types as genai_types
 
-from .ai_service import generate_structured_response
+from ..config import settings
+from .ai_service import (
+    generate_structured_response,
+    release_context_cache,
+    stream_structured_response,
+    warm_context_cache,
+)
+from .answer_screen import hint_feedback, hint_paragraph, screen_answer
+from .context_cache import CacheableContext
+from .metrics import metrics
+from .model_router import LOCAL_ROUTE, Route, route_answer
+from .paragraph_index import paragraph_index
+from .question_bank import QuestionBank, question_bank
+from .session_store import (
+    HISTORY_TURNS,
+    SessionNotFoundError,
+    SessionState,
+    SessionStore,
+    build_session_store,
+    snapshot_state,
+    state_from_snapshot,
+)
+from .single_flight import KeyedLock, SingleFlight
+from .story_table import Story, story_table
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class SessionState:
-    session_id: str
-    story_title: str
-    story_text: str
-    conversation: list[dict] = field(default_factory=list)  # {role, text}
-    understood_count: int = 0
-    total_attempts: int = 0
-    current_phase: str = "factual"  # factual -> inferential -> evaluative
-    created_at: float = field(default_factory=time.time)
-    consecutive_errors: int = 0
-    # Optional reading results from LiveTutor (Issue #17)
-    mispronounced_words: list[str] | None = None
-    accuracy: float | None = None
-    cpm: float | None = None
-
-
-class SessionStore:
-    """In-memory session store with 30-minute TTL cleanup."""
-
-    TTL_SECONDS = 30 * 60
-    RATE_LIMIT = 30  # max requests per minute per session
-    RATE_WINDOW = 60  # seconds
-
-    def __init__(self):
-        self._sessions: dict[str, SessionState] = {}
-        self._rate_counts: dict[str, list[float]] = {}  # session_id -> [timestamps]
-
-    def get(self, session_id: str) -> SessionState | None:
-        self._cleanup()
-        return self._sessions.get(session_id)
-
-    def save(self, state: SessionState) -> None:
-        self._sessions[state.session_id] = state
-
-    def _cleanup(self) -> None:
-        now = time.time()
-        expired = [
-            sid for sid, s in self._sessions.items()
-            if now - s.created_at > self.TTL_SECONDS
-        ]
-        for sid in expired:
-            del self._sessions[sid]
-
-    def check_rate_limit(self, session_id: str) -> bool:
-        """Return True if rate limit exceeded."""
-        now = time.time()
-        timestamps = self._rate_counts.get(session_id, [])
-        # Remove old timestamps
-        timestamps = [t for t in timestamps if now - t < self.RATE_WINDOW]
-        if len(timestamps) >= self.RATE_LIMIT:
-            return True
-        timestamps.append(now)
-        self._rate_counts[session_id] = timestamps
-        return False
+# Module-level singleton
+_store: SessionStore = build_session_store()
 
 
-# Module-level singleton
-_store = SessionStore()
+async def close_session_store() -> None:
+    await _store.close()
 
 
 # Gemini response schema for structured output
@@ -104,6 +76,8 @@ EVALUATION_SCHEMA = {
         },
     },
     "required": ["understood", "feedback", "question", "phase"],
+    # Feedback before the next question, so a stream can show it first
+    "propertyOrdering": ["understood", "feedback", "question", "phase", "referenced_paragraph"],
 }
 
 PHASE_ORDER = ["factual", "inferential", "evaluative"]
@@ -124,79 +98,113 @@ class AgentResponse:
 class SocraticAgent:
     REQUIRED_UNDERSTOOD = 5
     MAX_ANSWER_LENGTH = 500
-    MAX_HISTORY_TURNS = 10
+    MAX_HISTORY_TURNS = HISTORY_TURNS  # enforced by the session's Conversation buffer
     MAX_CONSECUTIVE_ERRORS = 3
 
-    def _build_system_prompt(self, state: SessionState) -> str:
-        paragraphs = state.story_text.split("\n")
-        numbered_text = "\n".join(
-            f"[第{i}段] {p}" for i, p in enumerate(paragraphs) if p.strip()
+    def __init__(self, question_bank: QuestionBank | None = None):
+        # With a bank, the opening and fallback questions are served from
+        # pre-generated questions; only answer evaluation calls the model.
+        self.question_bank = question_bank
+        # A retried / double-tapped submit joins the identical answer already
+        # in flight; different answers for one session take turns.
+        self._answers = SingleFlight()
+        self._session_locks = KeyedLock()
+
+    def _bank_question(
+        self, state: SessionState, phase: str, prefer: list[int] | None = None
+    ) -> str | None:
+        if self.question_bank is None:
+            return None
+        asked = [text for role, text in state.conversation if role == "ai"]
+        focus = prefer if prefer is not None else [
+            i for i, p in enumerate(state.story.paragraphs)
+            if state.mispronounced_words and any(w and w in p for w in state.mispronounced_words)
+        ]
+        picked = self.question_bank.pick(
+            state.story_title, state.story_text, phase, exclude=asked, prefer_paragraphs=focus
+        )
+        metrics.incr("question_bank.hits" if picked else "question_bank.misses")
+        return picked.question if picked else None
+
+    def _fallback_question(self, state: SessionState) -> str:
+        """Bank question for the current phase, else a pre-written one."""
+        return self._bank_question(state, state.current_phase) or _fallback_question(state)
+
+    def _screened_answer(self, state: SessionState, student_answer: str) -> dict | None:
+        """
+        The evaluation of an obvious non-answer, made locally (see
+        answer_screen.py): a hint at the paragraph the last question is
+        about, and a same-phase question on it. None to ask the model.
+        """
+        answered, asked = [], ""                         # (answer, the question it answered)
+        for role, text in state.conversation:            # ..., ("ai", asked), ("student", answer)
+            if role == "ai":
+                asked = text
+            else:
+                answered.append((text, asked))
+        kind = screen_answer(student_answer, state.story, asked)
+        if kind is None:
+            return None
+        metrics.incr(f"answer_screen.{kind}")
+        again = len(answered) > 1 and screen_answer(answered[-2][0], state.story, answered[-2][1]) is not None
+        paragraph = hint_paragraph(state.story, asked)
+        return {
+            "understood": False,
+            "feedback": hint_feedback(kind, state.story, paragraph, again),
+            "question": self._bank_question(state, state.current_phase, prefer=[paragraph])
+                        or asked or self._fallback_question(state),
+            "phase": state.current_phase,
+            "referenced_paragraph": paragraph,
+        }
+
+    def _system_prompt_parts(self, state: SessionState) -> tuple[str, str]:
+        """
+        The system prompt as (static prefix, per-turn suffix). The prefix
+        depends only on the story and the reading results, so it is built
+        once and reused for every turn of every session that shares them;
+        the suffix carries the phase / progress lines, and the excerpt of a
+        long story.
+        """
+        words = state.mispronounced_words
+        prefix = _static_prompt(
+            state.story.key,
+            tuple(words) if words is not None else None,
+            *_reading_numbers(state.accuracy, state.cpm),
+            excerpted=_is_long(state.story),
+        )
+        return prefix, self._story_excerpt(state) + _progress_prompt(
+            state.current_phase, state.understood_count, self.REQUIRED_UNDERSTOOD
         )
 
-        # Build reading info section if data is available (Issue #17)
-        reading_info = ""
-        if state.mispronounced_words or state.accuracy is not None or state.cpm is not None:
-            reading_info = "\n學生朗讀資訊：\n"
-            if state.accuracy is not None:
-                reading_info += f"- 正確率：{state.accuracy:.1f}%\n"
-            if state.cpm is not None:
-                reading_info += f"- 語速：{state.cpm:.0f} 字/分鐘\n"
-            if state.mispronounced_words:
-                reading_info += f"- 讀錯的字：{', '.join(state.mispronounced_words)}\n"
-            reading_info += "→ 提問時可以特別關注這些字相關的段落和內容\n"
-
-        return f"""你是一位溫暖、鼓勵學生的繁體中文閱讀助教，擅長用蘇格拉底式問答引導學生深入理解課文。
-
-課文標題：{state.story_title}
-
-課文內容（每段前標有段落索引）：
-{numbered_text}
-{reading_info}
-你的任務：
-1. 評估學生的回答是否展現了對問題的理解
-2. 給予簡短、溫暖的回饋（1-2句）
-3. 提出下一個蘇格拉底式問題，問題必須緊扣課文的關鍵內容
-
-提問品質要求：
-- 問題必須針對課文的核心訊息、角色動機、或重要細節，不要問太表面的問題
-- factual 階段：聚焦課文中最重要的事件或細節，而非瑣碎資訊
-- inferential 階段：引導學生思考因果關係、角色心理、或作者意圖
-- evaluative 階段：讓學生連結自身經驗，表達對課文主題的看法
-- 每個問題應指向課文中特定的段落或句子，幫助學生深入閱讀
-- 不要重複問過的問題，每題都應該引導學生看到課文的新面向
-
-評估規則：
-- understood = true 的條件：學生的回答包含問題要求的**關鍵資訊**，且資訊正確
-- understood = false 的條件：回答缺少關鍵資訊、資訊錯誤、太模糊籠統、或敷衍
-- 「方向正確但不精確」不算理解。例如：問「玉山的稱號是什麼？」回答「高山」→ false（太籠統，沒有說出「東北亞第一高峰」）
-- 學生必須展現他**讀過並理解課文**，而非只是用常識猜測。如果答案可以不看課文就說出來，要特別嚴格判斷
-- 數字必須精確：課文說「四千公尺」，回答「400」或「300」→ false（差距太大）
-- 數字容許小幅誤差：「將近四千」回答「3952」或「大約四千」→ true
-- 人名、地名、專有名詞必須正確，不可張冠李戴
-- 如果 understood = false，用不同方式重新問同一層次的問題（換個角度或給提示）
-- 如果 understood = true，進入下一個層次的問題
-- 當 understood=false 時，在 referenced_paragraph 填入答案所在段落的索引（從 0 開始）
-- 當 understood=true 時，referenced_paragraph 設為 null
-
-偵測敷衍回答：
-- 如果學生回答「不知道」「不懂」「隨便」「沒有」等敷衍詞 → understood = false
-- 回饋時不要責備，而是用更具體的提示引導，例如：「沒關係！讓我給你一個提示：看看第X段，作者提到了……你覺得這代表什麼？」
-- 如果學生連續敷衍，縮小問題範圍，給更明確的選項式提示（例如：「你覺得主角是開心還是難過？從哪裡可以看出來？」）
-- 如果學生的回答只有1-2個字且與課文無關 → understood = false，給予鼓勵並提供具體線索
-
-問題層次（由淺入深）：
-- factual：事實性問題（誰、什麼、在哪裡、發生什麼事）— 理解計數 1-2
-- inferential：推論性問題（為什麼、怎麼會這樣、有什麼影響）— 理解計數 3-4
-- evaluative：評估性問題（你覺得、如果是你、這個故事告訴我們什麼）— 理解計數 5
-
-目前階段：{state.current_phase}
-學生已理解的問題數：{state.understood_count}/{self.REQUIRED_UNDERSTOOD}
+    def _story_excerpt(self, state: SessionState) -> str:
+        """
+        The paragraphs of a long story relevant to this turn — the last
+        question, the student's answer and the misread words — or "" when
+        the whole story is in the static prefix.
+        """
+        if not _is_long(state.story):
+            return ""
+        query = " ".join([*_last_turns(state), *(state.mispronounced_words or [])])
+        return _excerpt_prompt(
+            state.story, tuple(paragraph_index(state.story).select(query, EXCERPT_PARAGRAPHS))
+        )
 
-回饋風格：
-- 語氣溫暖、友善，適合小學高年級至國中生
-- 只用繁體中文
-- 回饋要簡短（1-2句），然後直接問下一個問題
-- 問題長度：15-40 個字"""
+    def _build_system_prompt(self, state: SessionState) -> str:
+        return "".join(self._system_prompt_parts(state))
+
+    def _cacheable_context(self, state: SessionState) -> CacheableContext:
+        """
+        The prompt split for provider context caching. The cached prefix
+        leaves the reading results out, so one cache entry serves every
+        session on the story; they travel with the per-turn instructions.
+        The prefix always holds the whole story, however long: cached tokens
+        are cheap, so long stories need no per-turn excerpt here.
+        """
+        words = state.mispronounced_words
+        instructions = _reading_info(
+            tuple(words) if words is not None else None, *_reading_numbers(state.accuracy, state.cpm)
+        ) + _progress_prompt(state.current_phase, state.understood_count, self.REQUIRED_UNDERSTOOD)
+        return CacheableContext(_static_prompt(state.story.key, None, None, None), instructions, state.session_id)
 
     async def start_session(
         self,
@@ -210,13 +218,35 @@ class SocraticAgent:
         """Start a new session — generate the first question."""
         state = SessionState(
             session_id=session_id,
-            story_title=story_title,
-            story_text=story_text,
+            story=story_table.intern(story_title, story_text),
             mispronounced_words=mispronounced_words,
             accuracy=accuracy,
             cpm=cpm,
         )
 
+        banked = self._bank_question(state, "factual")
+        if banked is not None:
+            question, phase = banked, "factual"
+        else:
+            question, phase = await self._generate_opening_question(state)
+
+        state.current_phase = phase
+        state.conversation.append("ai", question)
+        await _store.save(state)
+        warm_context_cache(self._cacheable_context(state))
+
+        return AgentResponse(
+            question=question,
+            feedback=None,
+            understood=None,
+            understood_count=0,
+            required_count=self.REQUIRED_UNDERSTOOD,
+            phase=phase,
+            is_complete=False,
+        )
+
+    async def _generate_opening_question(self, state: SessionState) -> tuple[str, str]:
+        """Live model call for the first question; returns (question, phase)."""
         system_prompt = self._build_system_prompt(state)
         contents = [
             genai_types.Content(
@@ -226,10 +256,13 @@ class SocraticAgent:
         ]
 
         try:
+            # The opening prompt depends only on the story and reading stats,
+            # so sessions on the same story can share (a pool of) answers.
             result = await generate_structured_response(
                 system_prompt=system_prompt,
                 contents=contents,
                 response_schema=EVALUATION_SCHEMA,
+                cache=True,
             )
             question = result.get("question", "這篇課文的主角是誰？")
             phase = result.get("phase", "factual")
@@ -237,27 +270,165 @@ class SocraticAgent:
             logger.warning("AI service error in start_session: %s", e)
             question = "這篇課文的主角是誰？他（她）做了什麼事？"
             phase = "factual"
+        return question, phase
 
-        state.current_phase = phase
-        state.conversation.append({"role": "ai", "text": question})
-        _store.save(state)
+    async def snapshot_session(self, session_id: str) -> dict | None:
+        """Export session `session_id` (see session_store.snapshot_state()); None if unknown."""
+        state = await _store.get(session_id)
+        return snapshot_state(state) if state is not None else None
+
+    async def fork_session(
+        self,
+        session_id: str,
+        source_session_id: str | None = None,
+        snapshot: dict | None = None,
+    ) -> AgentResponse:
+        """
+        Start session `session_id` where another one stands — the live
+        session `source_session_id`, or an exported `snapshot` — without a
+        model call. The response repeats the question the student is on.
+
+        Raises SessionNotFoundError if the source session does not exist,
+        and SessionConflictError if session `session_id` already does.
+        Forks are rate limited per source (the new id is always fresh): with
+        the source session's own limit, or per story for snapshots.
+        """
+        if source_session_id is not None:
+            source = await _store.get(source_session_id)
+            if source is None:
+                raise SessionNotFoundError(f"Session {source_session_id} not found or expired")
+            state = source.fork(session_id)
+        elif snapshot is not None:
+            state = state_from_snapshot(session_id, snapshot)
+            if state.current_phase not in PHASE_ORDER:
+                raise ValueError(f"Invalid phase {state.current_phase!r}")
+            if not 0 <= state.understood_count <= min(self.REQUIRED_UNDERSTOOD, state.total_attempts):
+                raise ValueError(
+                    f"understood_count must be between 0 and min({self.REQUIRED_UNDERSTOOD}, total_attempts)"
+                )
+        else:
+            raise ValueError("A source session or a snapshot is required")
+
+        limit_key = source_session_id if source_session_id is not None else f"story:{state.story.key}"
+        if await _store.check_rate_limit(limit_key):
+            raise ValueError("Rate limit exceeded. Please wait before forking this session again.")
 
+        await _store.save(state, exclusive=True)
+        metrics.incr("socratic.forks")
+        is_complete = state.understood_count >= self.REQUIRED_UNDERSTOOD
+        if not is_complete:
+            warm_context_cache(self._cacheable_context(state))
         return AgentResponse(
-            question=question,
+            question=_last_turns(state)[0] or self._fallback_question(state),
             feedback=None,
             understood=None,
-            understood_count=0,
+            understood_count=state.understood_count,
             required_count=self.REQUIRED_UNDERSTOOD,
-            phase=phase,
-            is_complete=False,
+            phase=state.current_phase,
+            is_complete=is_complete,
         )
 
     async def process_answer(
         self, session_id: str, student_answer: str
     ) -> AgentResponse:
         """Process a student's answer, evaluate understanding, return next question."""
+        key = _answer_key(session_id, student_answer)
+        if self._answers.pending(key) is not None:
+            metrics.incr("socratic.coalesced")
+        return await self._answers.do(key, lambda: self._process_answer(session_id, student_answer))
+
+    async def _process_answer(self, session_id: str, student_answer: str) -> AgentResponse:
+        async with self._session_locks(session_id):
+            state, contents = await self._begin_answer(session_id, student_answer)
+            start = time.perf_counter()
+            screened = self._screened_answer(state, student_answer)
+            if screened is not None:
+                _record_route(Route(LOCAL_ROUTE, ""), time.perf_counter() - start)
+                return await self._finish_answer(state, screened)
+            route = route_answer(student_answer)
+            try:
+                result = await generate_structured_response(
+                    system_prompt=self._build_system_prompt(state),
+                    contents=contents,
+                    response_schema=EVALUATION_SCHEMA,
+                    context=self._cacheable_context(state),
+                    model=route.model,
+                )
+            except Exception as e:
+                return await self._finish_answer(state, None, e)
+            finally:
+                _record_route(route, time.perf_counter() - start)
+            return await self._finish_answer(state, result)
+
+    async def stream_answer(
+        self, session_id: str, student_answer: str
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Streaming process_answer(). Validation errors (rate limit, empty
+        answer, unknown session) are raised here, before anything streams.
+
+        The returned iterator yields ("feedback", text) and ("question", text)
+        pieces as the model writes them, then ("result", AgentResponse). The
+        result is authoritative: after a model error or an unusable question
+        it carries the fallback text instead of what was streamed. A duplicate
+        of an answer already in flight yields only the shared result.
+        """
+        stream = self._stream_answer(session_id, student_answer)
+        await anext(stream)     # runs the checks; the session stays locked until the stream ends
+        return stream
+
+    async def _stream_answer(
+        self, session_id: str, student_answer: str
+    ) -> AsyncIterator[tuple[str, Any]]:
+        key = _answer_key(session_id, student_answer)
+        if self._answers.pending(key) is not None:
+            metrics.incr("socratic.coalesced")
+            response = await self._answers.do(key, lambda: self._process_answer(session_id, student_answer))
+            yield "ready", None
+            yield "result", response
+            return
+
+        flight = self._answers.start(key)
+        try:
+            async with self._session_locks(session_id):
+                state, contents = await self._begin_answer(session_id, student_answer)
+                yield "ready", None
+                start = time.perf_counter()
+                result, error = self._screened_answer(state, student_answer), None
+                if result is not None:
+                    _record_route(Route(LOCAL_ROUTE, ""), time.perf_counter() - start)
+                    yield "feedback", result["feedback"]
+                    yield "question", result["question"]
+                else:
+                    route = route_answer(student_answer)
+                    try:
+                        async for event in stream_structured_response(
+                            system_prompt=self._build_system_prompt(state),
+                            contents=contents,
+                            response_schema=EVALUATION_SCHEMA,
+                            context=self._cacheable_context(state),
+                            model=route.model,
+                        ):
+                            if event.kind == "delta" and event.key in ("feedback", "question"):
+                                yield event.key, event.value
+                            elif event.kind == "result":
+                                result = event.value
+                    except Exception as e:
+                        error = e
+                    _record_route(route, time.perf_counter() - start)
+                response = await self._finish_answer(state, result, error)
+        except BaseException as e:
+            self._answers.finish(key, flight, error=e)
+            raise
+        self._answers.finish(key, flight, response)
+        yield "result", response
+
+    async def _begin_answer(
+        self, session_id: str, student_answer: str
+    ) -> tuple[SessionState, list[genai_types.Content]]:
+        """Validate the answer, record it in the session and build the model contents."""
         # Rate limiting check
-        if _store.check_rate_limit(session_id):
+        if await _store.check_rate_limit(session_id):
             raise ValueError("Rate limit exceeded. Please wait before sending another answer.")
 
         # Input validation
@@ -267,20 +438,15 @@ class SocraticAgent:
             raise ValueError(f"Answer too long (max {self.MAX_ANSWER_LENGTH} characters)")
         student_answer = student_answer.strip()
 
-        state = _store.get(session_id)
+        state = await _store.get(session_id)
         if state is None:
             raise ValueError(f"Session {session_id} not found or expired")
 
-        state.conversation.append({"role": "student", "text": student_answer})
+        # The buffer keeps the first turn (initial question) + the last
+        # MAX_HISTORY_TURNS-1 turns
+        state.conversation.append("student", student_answer)
         state.total_attempts += 1
 
-        # Truncate conversation history to keep only last N turns
-        if len(state.conversation) > self.MAX_HISTORY_TURNS:
-            # Keep first turn (initial question) + last MAX_HISTORY_TURNS-1 turns
-            state.conversation = [state.conversation[0]] + state.conversation[-(self.MAX_HISTORY_TURNS - 1):]
-
-        system_prompt = self._build_system_prompt(state)
-
         # Build Gemini contents from conversation
         contents: list[genai_types.Content] = [
             genai_types.Content(
@@ -288,12 +454,11 @@ class SocraticAgent:
                 parts=[genai_types.Part(text="請開始提問。")],
             )
         ]
-        for turn in state.conversation:
-            role = "model" if turn["role"] == "ai" else "user"
+        for role, text in state.conversation:
             contents.append(
                 genai_types.Content(
-                    role=role,
-                    parts=[genai_types.Part(text=turn["text"])],
+                    role="model" if role == "ai" else "user",
+                    parts=[genai_types.Part(text=text)],
                 )
             )
         # Ensure last message is from user
@@ -304,13 +469,15 @@ class SocraticAgent:
                     parts=[genai_types.Part(text="請根據我的回答進行評估，然後繼續提問。")],
                 )
             )
+        return state, contents
 
+    async def _finish_answer(
+        self, state: SessionState, result: dict | None, error: Exception | None = None
+    ) -> AgentResponse:
+        """Apply the model's evaluation (or `error`) to the session and save it."""
         try:
-            result = await generate_structured_response(
-                system_prompt=system_prompt,
-                contents=contents,
-                response_schema=EVALUATION_SCHEMA,
-            )
+            if error is not None:
+                raise error
             understood = result.get("understood", False)
             feedback = result.get("feedback", "")
             question = result.get("question", "")
@@ -318,11 +485,13 @@ class SocraticAgent:
             referenced_paragraph = result.get("referenced_paragraph")
 
             # Validate referenced_paragraph bounds
-            num_paragraphs = len([p for p in state.story_text.split("\n") if p.strip()])
+            num_paragraphs = _paragraph_count(state.story)
             if referenced_paragraph is not None:
                 if not isinstance(referenced_paragraph, int) or referenced_paragraph < 0 or referenced_paragraph >= num_paragraphs:
                     logger.warning("Invalid referenced_paragraph %s (max %d), resetting to None", referenced_paragraph, num_paragraphs - 1)
                     referenced_paragraph = None
+            if referenced_paragraph is None and not understood:
+                referenced_paragraph = _locate_answer(state)
 
             # Validate phase
             if phase not in PHASE_ORDER:
@@ -331,7 +500,7 @@ class SocraticAgent:
 
             # Validate question is non-empty
             if not question or not question.strip():
-                question = _fallback_question(state)
+                question = self._fallback_question(state)
 
             state.consecutive_errors = 0  # Reset on success
 
@@ -341,12 +510,12 @@ class SocraticAgent:
                           state.consecutive_errors, self.MAX_CONSECUTIVE_ERRORS, e)
 
             if state.consecutive_errors >= self.MAX_CONSECUTIVE_ERRORS:
-                _store.save(state)
+                await _store.save(state)
                 raise RuntimeError("AI 服務暫時無法使用，請稍後再試。") from e
 
             understood = False  # Don't auto-pass on error; re-ask instead
             feedback = "讓我再想一下，請你再回答一次好嗎？"
-            question = _fallback_question(state)
+            question = self._fallback_question(state)
             phase = state.current_phase
             referenced_paragraph = None
 
@@ -367,9 +536,11 @@ class SocraticAgent:
         is_complete = state.understood_count >= self.REQUIRED_UNDERSTOOD
 
         if not is_complete:
-            state.conversation.append({"role": "ai", "text": question})
+            state.conversation.append("ai", question)
 
-        _store.save(state)
+        await _store.save(state)
+        if is_complete:
+            release_context_cache(self._cacheable_context(state))
 
         return AgentResponse(
             question=question,
@@ -383,6 +554,166 @@ class SocraticAgent:
         )
 
 
+def _record_route(route: Route, seconds: float) -> None:
+    metrics.incr(f"socratic.route.{route.name}.calls")
+    metrics.incr(f"socratic.route.{route.name}.seconds", seconds)
+
+
+def _last_turns(state: SessionState) -> tuple[str, str]:
+    """The last question asked and the last student answer ("" if none)."""
+    turns = list(state.conversation)
+    asked = next((text for role, text in reversed(turns) if role == "ai"), "")
+    answer = next((text for role, text in reversed(turns) if role == "student"), "")
+    return asked, answer
+
+
+def _locate_answer(state: SessionState) -> int | None:
+    """
+    The paragraph the last question and answer are about, for an evaluation
+    that left referenced_paragraph out (or gave one that does not exist).
+    """
+    paragraph = paragraph_index(state.story).best(" ".join(_last_turns(state)))
+    if paragraph is not None:
+        metrics.incr("socratic.referenced_paragraph_located")
+    return paragraph
+
+
+def _answer_key(session_id: str, student_answer: str) -> tuple[str, str]:
+    """Requests with the same key are the same submission."""
+    return session_id, student_answer.strip() if isinstance(student_answer, str) else ""
+
+
+# ---------------------------------------------------------------------------
+# System prompt pieces
+# ---------------------------------------------------------------------------
+
+# A story with more paragraphs than this is not repeated whole in every
+# uncached prompt: the static prefix only says how long it is, and each turn
+# carries the EXCERPT_PARAGRAPHS paragraphs that matter to it
+# (paragraph_index.py). A provider context cache always holds the whole story.
+FULL_TEXT_MAX_PARAGRAPHS = 20
+EXCERPT_PARAGRAPHS = 8
+
+
+def _story_block(story: Story) -> tuple[str, int]:
+    """Paragraphs numbered for the prompt, and how many non-empty ones there are."""
+    numbered = [f"[第{i}段] {p}" for i, p in enumerate(story.paragraphs) if p.strip()]
+    return "\n".join(numbered), len(numbered)
+
+
+def _paragraph_count(story: Story) -> int:
+    return sum(1 for p in story.paragraphs if p.strip())
+
+
+def _is_long(story: Story) -> bool:
+    return _paragraph_count(story) > FULL_TEXT_MAX_PARAGRAPHS
+
+
+def _excerpt_prompt(story: Story, paragraphs: tuple[int, ...]) -> str:
+    numbered = "\n".join(f"[第{i}段] {story.paragraphs[i]}" for i in paragraphs)
+    return f"課文相關段落（段落索引與全文相同）：\n{numbered}\n\n"
+
+
+def _reading_numbers(accuracy: float | None, cpm: float | None) -> tuple[str | None, str | None]:
+    """Accuracy and speed as the prompt prints them (and _static_prompt is keyed on)."""
+    return (
+        f"{accuracy:.1f}" if accuracy is not None else None,
+        f"{cpm:.0f}" if cpm is not None else None,
+    )
+
+
+def _reading_info(
+    mispronounced_words: tuple[str, ...] | None, accuracy: str | None, cpm: str | None
+) -> str:
+    """Reading results section (Issue #17); empty without reading data."""
+    if not (mispronounced_words or accuracy is not None or cpm is not None):
+        return ""
+    reading_info = "\n學生朗讀資訊：\n"
+    if accuracy is not None:
+        reading_info += f"- 正確率：{accuracy}%\n"
+    if cpm is not None:
+        reading_info += f"- 語速：{cpm} 字/分鐘\n"
+    if mispronounced_words:
+        reading_info += f"- 讀錯的字：{', '.join(mispronounced_words)}\n"
+    reading_info += "→ 提問時可以特別關注這些字相關的段落和內容\n"
+    return reading_info
+
+
+# Keyed on the story key rather than the Story, so cached prompts do not keep
+# stories alive past their sessions (story_table holds them weakly), and on
+# the reading numbers as printed, so 91.52 and 91.48 share an entry.
+@functools.lru_cache(maxsize=1024)
+def _static_prompt(
+    story_key: str,
+    mispronounced_words: tuple[str, ...] | None,
+    accuracy: str | None,
+    cpm: str | None,
+    excerpted: bool = False,
+) -> str:
+    story = story_table[story_key]
+    if excerpted:
+        numbered_text = f"（課文較長，共 {len(story.paragraphs)} 段；每一輪只列出與目前問題相關的段落，見「課文相關段落」）"
+    else:
+        numbered_text = _story_block(story)[0]
+    reading_info = _reading_info(mispronounced_words, accuracy, cpm)
+    return f"""你是一位溫暖、鼓勵學生的繁體中文閱讀助教，擅長用蘇格拉底式問答引導學生深入理解課文。
+
+課文標題：{story.title}
+
+課文內容（每段前標有段落索引）：
+{numbered_text}
+{reading_info}
+你的任務：
+1. 評估學生的回答是否展現了對問題的理解
+2. 給予簡短、溫暖的回饋（1-2句）
+3. 提出下一個蘇格拉底式問題，問題必須緊扣課文的關鍵內容
+
+提問品質要求：
+- 問題必須針對課文的核心訊息、角色動機、或重要細節，不要問太表面的問題
+- factual 階段：聚焦課文中最重要的事件或細節，而非瑣碎資訊
+- inferential 階段：引導學生思考因果關係、角色心理、或作者意圖
+- evaluative 階段：讓學生連結自身經驗，表達對課文主題的看法
+- 每個問題應指向課文中特定的段落或句子，幫助學生深入閱讀
+- 不要重複問過的問題，每題都應該引導學生看到課文的新面向
+
+評估規則：
+- understood = true 的條件：學生的回答包含問題要求的**關鍵資訊**，且資訊正確
+- understood = false 的條件：回答缺少關鍵資訊、資訊錯誤、太模糊籠統、或敷衍
+- 「方向正確但不精確」不算理解。例如：問「玉山的稱號是什麼？」回答「高山」→ false（太籠統，沒有說出「東北亞第一高峰」）
+- 學生必須展現他**讀過並理解課文**，而非只是用常識猜測。如果答案可以不看課文就說出來，要特別嚴格判斷
+- 數字必須精確：課文說「四千公尺」，回答「400」或「300」→ false（差距太大）
+- 數字容許小幅誤差：「將近四千」回答「3952」或「大約四千」→ true
+- 人名、地名、專有名詞必須正確，不可張冠李戴
+- 如果 understood = false，用不同方式重新問同一層次的問題（換個角度或給提示）
+- 如果 understood = true，進入下一個層次的問題
+- 當 understood=false 時，在 referenced_paragraph 填入答案所在段落的索引（從 0 開始）
+- 當 understood=true 時，referenced_paragraph 設為 null
+
+偵測敷衍回答：
+- 如果學生回答「不知道」「不懂」「隨便」「沒有」等敷衍詞 → understood = false
+- 回饋時不要責備，而是用更具體的提示引導，例如：「沒關係！讓我給你一個提示：看看第X段，作者提到了……你覺得這代表什麼？」
+- 如果學生連續敷衍，縮小問題範圍，給更明確的選項式提示（例如：「你覺得主角是開心還是難過？從哪裡可以看出來？」）
+- 如果學生的回答只有1-2個字且與課文無關 → understood = false，給予鼓勵並提供具體線索
+
+問題層次（由淺入深）：
+- factual：事實性問題（誰、什麼、在哪裡、發生什麼事）— 理解計數 1-2
+- inferential：推論性問題（為什麼、怎麼會這樣、有什麼影響）— 理解計數 3-4
+- evaluative：評估性問題（你覺得、如果是你、這個故事告訴我們什麼）— 理解計數 5
+
+"""
+
+
+def _progress_prompt(phase: str, understood_count: int, required_count: int) -> str:
+    return f"""目前階段：{phase}
+學生已理解的問題數：{understood_count}/{required_count}
+
+回饋風格：
+- 語氣溫暖、友善，適合小學高年級至國中生
+- 只用繁體中文
+- 回饋要簡短（1-2句），然後直接問下一個問題
+- 問題長度：15-40 個字"""
+
+
 def _fallback_question(state: SessionState) -> str:
     """Return a pre-written question when AI is unavailable."""
     fallback = {
@@ -394,4 +725,4 @@ def _fallback_question(state: SessionState) -> str:
 
 
 # Module-level agent singleton
-socratic_agent = SocraticAgent()
+socratic_agent = SocraticAgent(question_bank if settings.question_bank_enabled else None)
@@ -0,0 +1,76 @@
+"""
+Interned story texts shared by every session in the process.
+
+A class of students reads the same few stories, but each session used to
+carry its own copy of the full story text. Sessions now reference a Story
+from this table, keyed by a hash of title + text, so each distinct story is
+held once per process however many sessions are reading it.
+
+Stories are held weakly — an entry lives while some session references it —
+plus strong references to the most recently used ones, so a story whose
+sessions are all parked in Redis is not re-fetched on every request.
+"""
+
+import hashlib
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+
+def story_key(story_title: str, story_text: str) -> str:
+    return hashlib.sha256(f"{story_title}\0{story_text}".encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True, slots=True, weakref_slot=True)
+class Story:
+    key: str
+    title: str = field(compare=False)
+    text: str = field(compare=False)                 # paragraphs joined with "\n"
+    paragraphs: tuple[str, ...] = field(compare=False, repr=False)
+
+
+class StoryTable:
+    """key → Story; intern() returns the one shared instance per story."""
+
+    def __init__(self, keep_recent: int = 256):
+        self.keep_recent = keep_recent
+        self._stories: weakref.WeakValueDictionary[str, Story] = weakref.WeakValueDictionary()
+        self._recent: OrderedDict[str, Story] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._stories)
+
+    def intern(self, story_title: str, story_text: str) -> Story:
+        key = story_key(story_title, story_text)
+        story = self._stories.get(key)
+        if story is None:
+            story = Story(key, story_title, story_text, tuple(story_text.split("\n")))
+            self._stories[key] = story
+        self._use(story)
+        return story
+
+    def get(self, key: str) -> Story | None:
+        story = self._stories.get(key)
+        if story is not None:
+            self._use(story)
+        return story
+
+    def __getitem__(self, key: str) -> Story:
+        story = self.get(key)
+        if story is None:
+            raise KeyError(f"Story {key} is not in the story table")
+        return story
+
+    def _use(self, story: Story) -> None:
+        self._recent[story.key] = story
+        self._recent.move_to_end(story.key)
+        while len(self._recent) > self.keep_recent:
+            self._recent.popitem(last=False)
+
+    def clear(self) -> None:
+        self._recent.clear()
+        self._stories.clear()
+
+
+# Module-level singleton
+story_table = StoryTable()
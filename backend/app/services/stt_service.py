@@ -9,7 +9,17 @@ version used for session persistence and server-side validation.
 """
 
 import re
-from typing import Literal
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Literal
+
+from .alignment import Alignment, IncrementalAligner, align
 
 # ---------------------------------------------------------------------------
 # Pinyin lookup map (toneless): character → pinyin syllable
@@ -304,12 +314,66 @@ _PINYIN_GROUPS: dict[str, str] = {
     "zuo": "做作坐座左昨",
 }
 
-# Build inverted map: character → pinyin (toneless). First mapping wins.
-_CHAR_TO_PINYIN: dict[str, str] = {}
-for _py, _chars in _PINYIN_GROUPS.items():
-    for _ch in _chars:
-        if _ch not in _CHAR_TO_PINYIN:
-            _CHAR_TO_PINYIN[_ch] = _py
+# ---------------------------------------------------------------------------
+# Compiled pinyin-class table
+# Each syllable is interned to a small integer class id (0 = unknown) and a
+# codepoint-indexed array('H') maps every character to its class, so a
+# homophone test is two array reads and an integer compare.  The table can be
+# pre-generated into _PINYIN_TABLE_PATH (`python -m app.services.stt_service`)
+# and is loaded from there at import when its fingerprint matches.
+# ---------------------------------------------------------------------------
+
+_PINYIN_TABLE_PATH = Path(__file__).with_name("pinyin_classes.bin")
+_PINYIN_TABLE_MAGIC = b"PYC2"
+_PINYIN_TABLE_HEADER = struct.Struct("<4sIII")  # magic, fingerprint, table size, syllable bytes
+
+
+def _pinyin_fingerprint() -> int:
+    return zlib.crc32(("|".join(_PINYIN_GROUPS) + "|".join(_PINYIN_GROUPS.values())).encode())
+
+
+def _compile_pinyin_table() -> tuple[tuple[str, ...], array]:
+    """Intern syllables (first mapping of a character wins) into a class table."""
+    groups = list(_PINYIN_GROUPS.values())
+    table = array("H", bytes(2 * (ord(max(max(chars) for chars in groups)) + 1)))
+    # Assign later groups first so that earlier groups overwrite them.
+    for cls in range(len(groups), 0, -1):
+        for ch in groups[cls - 1]:
+            table[ord(ch)] = cls
+    return ("", *_PINYIN_GROUPS), table
+
+
+def _load_pinyin_table(path: Path) -> tuple[tuple[str, ...], array] | None:
+    """Load a generated table; None if missing, corrupt or built from other data."""
+    try:
+        data = path.read_bytes()
+        magic, fingerprint, size, syl_len = _PINYIN_TABLE_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    offset = _PINYIN_TABLE_HEADER.size
+    if magic != _PINYIN_TABLE_MAGIC or fingerprint != _pinyin_fingerprint():
+        return None
+    if len(data) != offset + syl_len + 2 * size:
+        return None
+    syllables = ("", *data[offset:offset + syl_len].decode().split("\n"))
+    table = array("H")
+    table.frombytes(data[offset + syl_len:])
+    if sys.byteorder == "big":
+        table.byteswap()
+    return syllables, table
+
+
+def write_pinyin_table(path: Path = _PINYIN_TABLE_PATH) -> None:
+    """Generate the binary pinyin-class table loaded at import."""
+    syllables, table = _compile_pinyin_table()
+    blob = "\n".join(syllables[1:]).encode()
+    if sys.byteorder == "big":
+        table.byteswap()
+    header = _PINYIN_TABLE_HEADER.pack(_PINYIN_TABLE_MAGIC, _pinyin_fingerprint(), len(table), len(blob))
+    path.write_bytes(header + blob + table.tobytes())
+
+
+_PINYIN_SYLLABLES, _PINYIN_CLASSES = _load_pinyin_table(_PINYIN_TABLE_PATH) or _compile_pinyin_table()
 
 # ---------------------------------------------------------------------------
 # Public helpers
@@ -319,19 +383,34 @@ _PUNCTUATION_RE = re.compile(r"[「」『』，。！？：；、\s]")
 _NUMERAL_MAP = ["零", "一", "二", "三", "四", "五", "六", "七", "八", "九"]
 
 
+def pinyin_class(ch: str) -> int:
+    """Return the interned pinyin class id of a character (0 if unknown)."""
+    try:
+        return _PINYIN_CLASSES[ord(ch)]
+    except (TypeError, IndexError):
+        return 0
+
+
+def pinyin_classes(text: str) -> array:
+    """Return the pinyin class ids of every character in `text`."""
+    table, size = _PINYIN_CLASSES, len(_PINYIN_CLASSES)
+    return array("H", [table[o] if o < size else 0 for o in map(ord, text)])
+
+
 def get_pinyin(ch: str) -> str | None:
     """Return the toneless pinyin for a character, or None if unknown."""
-    return _CHAR_TO_PINYIN.get(ch)
+    return _PINYIN_SYLLABLES[pinyin_class(ch)] or None
 
 
 def is_homophone(a: str, b: str) -> bool:
     """Return True if two characters share the same toneless pinyin."""
     if a == b:
         return True
-    pa, pb = get_pinyin(a), get_pinyin(b)
-    if pa is None or pb is None:
+    try:
+        ca = _PINYIN_CLASSES[ord(a)]
+        return ca != 0 and ca == _PINYIN_CLASSES[ord(b)]
+    except (TypeError, IndexError):
         return False
-    return pa == pb
 
 
 def _int_to_chinese(n: int) -> str:
@@ -382,7 +461,7 @@ def _normalize_for_comparison(text: str) -> str:
 # Core algorithm: correct_homophones
 # ---------------------------------------------------------------------------
 
-def correct_homophones(stt_text: str, target_text: str) -> str:
+def correct_homophones(stt_text: str, target_text: str, engine: str = "auto") -> str:
     """
     Given raw STT text and the known target text, correct homophone substitutions
     on a character-by-character basis using Levenshtein alignment with backtracking.
@@ -392,87 +471,223 @@ def correct_homophones(stt_text: str, target_text: str) -> str:
       - Homophones → replace STT char with target char.
       - Not homophones → keep STT char (genuine error).
 
+    `engine` selects the alignment engine (see alignment.ENGINES); all engines
+    produce the same alignment, "auto" picks the cheapest for the input size.
+
     Returns the corrected string.
     Ported from frontend/src/utils/pinyin.ts correctHomophones().
     """
-    s = list(stt_text)
-    t = list(target_text)
-    s_len, t_len = len(s), len(t)
-
-    if s_len == 0 or t_len == 0:
+    if not stt_text or not target_text:
         return stt_text
+    return _correct(stt_text, target_text, pinyin_classes(target_text), engine)
 
-    # Build DP table (Levenshtein distance)
-    dp = [[0] * (t_len + 1) for _ in range(s_len + 1)]
-    for i in range(s_len + 1):
-        dp[i][0] = i
-    for j in range(t_len + 1):
-        dp[0][j] = j
-
-    for i in range(1, s_len + 1):
-        for j in range(1, t_len + 1):
-            cost = 0 if s[i - 1] == t[j - 1] else 1
-            dp[i][j] = min(
-                dp[i - 1][j] + 1,        # deletion
-                dp[i][j - 1] + 1,        # insertion
-                dp[i - 1][j - 1] + cost, # substitution
-            )
 
-    # Backtrack to find alignment
+def _correct(stt_text: str, target_text: str, target_classes: array, engine: str = "auto") -> str:
+    """correct_homophones() with the target's pinyin class ids precomputed."""
+    return _apply_alignment(stt_text, target_text, target_classes, align(stt_text, target_text, engine))
+
+
+def _apply_alignment(
+    stt_text: str, target_text: str, target_classes: array, alignment: Alignment
+) -> str:
     result: list[str] = []
-    i, j = s_len, t_len
-
-    while i > 0 or j > 0:
-        if i > 0 and j > 0:
-            cost = 0 if s[i - 1] == t[j - 1] else 1
-            if dp[i][j] == dp[i - 1][j - 1] + cost:
-                # Match or substitution
-                if s[i - 1] == t[j - 1]:
-                    result.append(s[i - 1])          # exact match
-                elif is_homophone(s[i - 1], t[j - 1]):
-                    result.append(t[j - 1])           # homophone → use target
-                else:
-                    result.append(s[i - 1])           # genuine mismatch → keep STT
-                i -= 1
-                j -= 1
+    for i, j in alignment:
+        if i < 0:
+            continue                                  # missing from STT — skip
+        sc = stt_text[i]
+        if j >= 0 and sc != target_text[j]:
+            tc = target_classes[j]
+            if tc and tc == pinyin_class(sc):
+                result.append(target_text[j])         # homophone → use target
                 continue
-        if i > 0 and dp[i][j] == dp[i - 1][j] + 1:
-            result.append(s[i - 1])  # deletion (extra char in STT) — keep
-            i -= 1
+        result.append(sc)                             # match / genuine error / extra
+    return "".join(result)
+
+
+# ---------------------------------------------------------------------------
+# Character-level errors
+# ---------------------------------------------------------------------------
+
+ErrorType = Literal["substitution", "homophone", "omission", "insertion"]
+
+
+@dataclass(frozen=True, slots=True)
+class CharacterErrorRecord:
+    """
+    One per-character reading mistake taken from the alignment.
+
+    `character` is the expected target character, except for insertions where
+    it is the extra spoken character. `target_index` indexes the normalised
+    target (for insertions: the target position the extra char precedes);
+    `stt_index` indexes the STT text and is -1 for omissions.
+    """
+    error_type: ErrorType
+    character: str
+    spoken: str | None
+    target_index: int
+    stt_index: int
+
+
+def _apply_alignment_with_errors(
+    stt_text: str, target_text: str, target_classes: array, alignment: Alignment
+) -> tuple[str, list[CharacterErrorRecord]]:
+    """_apply_alignment() that also collects the per-character errors in the same pass."""
+    result: list[str] = []
+    errors: list[CharacterErrorRecord] = []
+    next_j = 0
+    for i, j in alignment:
+        if i < 0:
+            errors.append(CharacterErrorRecord("omission", target_text[j], None, j, -1))
+            next_j = j + 1
+            continue
+        sc = stt_text[i]
+        if j < 0:
+            errors.append(CharacterErrorRecord("insertion", sc, sc, next_j, i))
+            result.append(sc)
+            continue
+        next_j = j + 1
+        tc = target_text[j]
+        if sc == tc:
+            result.append(sc)
+        elif target_classes[j] and target_classes[j] == pinyin_class(sc):
+            errors.append(CharacterErrorRecord("homophone", tc, sc, j, i))
+            result.append(tc)
         else:
-            j -= 1                   # insertion (missing from STT) — skip
+            errors.append(CharacterErrorRecord("substitution", tc, sc, j, i))
+            result.append(sc)
+    return "".join(result), errors
 
-    result.reverse()
-    return "".join(result)
+
+def extract_character_errors(stt_text: str, target_text: str) -> list[CharacterErrorRecord]:
+    """
+    Per-character mistakes of an STT reading against its target text.
+
+    Positions follow the reference alignment (align_full(), no prefix/suffix
+    stripping), so they do not depend on the engine; they refer to the
+    normalised (punctuation-free) target. Homophones are reported even
+    though evaluate_reading() counts them as correct.
+    """
+    prepared = prepare_target(target_text)
+    if stt_text == prepared.normalized:
+        return []
+    return _apply_alignment_with_errors(
+        stt_text, prepared.normalized, prepared.classes,
+        align(stt_text, prepared.normalized, strip=False),
+    )[1]
 
 
 # ---------------------------------------------------------------------------
 # compute_match_rate
 # ---------------------------------------------------------------------------
 
+def _char_counts(text: str) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for ch in text:
+        counts[ch] = counts.get(ch, 0) + 1
+    return counts
+
+
+def _overlap_rate(spoken_norm: str, target_counts: dict[str, int], target_len: int) -> float:
+    """Match rate of normalised spoken text against a target's character counts."""
+    if not target_len or not spoken_norm:
+        return 0.0
+    matched = 0
+    for ch, n in _char_counts(spoken_norm).items():
+        available = target_counts.get(ch, 0)
+        matched += n if n < available else available
+    return matched / target_len
+
+
 def compute_match_rate(corrected: str, target: str) -> float:
     """
     Character-frequency overlap between corrected STT and target text.
     Both strings are first normalised (punctuation removed, numbers converted).
     Returns a float in [0, 1].
     """
-    spoken_norm = _normalize_for_comparison(corrected)
-    target_norm = _normalize_for_comparison(target)
+    prepared = prepare_target(target)
+    return _overlap_rate(
+        _normalize_for_comparison(corrected), prepared.counts, len(prepared.normalized)
+    )
 
-    if not target_norm or not spoken_norm:
-        return 0.0
 
-    spoken_freq: dict[str, int] = {}
-    for ch in spoken_norm:
-        spoken_freq[ch] = spoken_freq.get(ch, 0) + 1
+# ---------------------------------------------------------------------------
+# Prepared targets
+# The same story lines are read by every student in a class, so everything
+# derived from the target text alone is computed once and kept in a bounded
+# LRU cache; the per-reading hot path only processes the STT side.
+# ---------------------------------------------------------------------------
 
-    matched = 0
-    for ch in target_norm:
-        if spoken_freq.get(ch, 0) > 0:
-            matched += 1
-            spoken_freq[ch] -= 1
+TARGET_CACHE_SIZE = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class PreparedTarget:
+    normalized: str              # punctuation stripped, numbers converted
+    classes: array               # pinyin class id per normalized character
+    counts: dict[str, int]       # character frequencies of `normalized`
+
+
+class _PreparedTargetCache:
+    """Thread-safe LRU of PreparedTarget keyed by target text."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, PreparedTarget] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, target_text: str) -> PreparedTarget:
+        with self._lock:
+            prepared = self._entries.get(target_text)
+            if prepared is not None:
+                self._entries.move_to_end(target_text)
+                self.hits += 1
+                return prepared
+            self.misses += 1
+
+        normalized = _normalize_for_comparison(target_text)
+        prepared = PreparedTarget(normalized, pinyin_classes(normalized), _char_counts(normalized))
+
+        with self._lock:
+            self._entries[target_text] = prepared
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return prepared
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
 
-    return matched / len(target_norm)
+
+_target_cache = _PreparedTargetCache(TARGET_CACHE_SIZE)
+
+
+def prepare_target(target_text: str) -> PreparedTarget:
+    """Return the (cached) preprocessing of a target text."""
+    return _target_cache.get(target_text)
+
+
+def target_cache_info() -> dict:
+    """Hit / miss / eviction counters of the prepared-target cache."""
+    return _target_cache.info()
+
+
+def clear_target_cache() -> None:
+    _target_cache.clear()
 
 
 # ---------------------------------------------------------------------------
@@ -488,7 +703,23 @@ FEEDBACK_KEYS = {
 }
 
 
-def evaluate_reading(stt_text: str, target_text: str) -> dict:
+def _build_result(corrected: str, match_rate: float) -> dict:
+    if match_rate >= 0.8:
+        tier: Tier = 1
+    elif match_rate >= 0.6:
+        tier = 2
+    else:
+        tier = 3
+
+    return {
+        "corrected": corrected,
+        "match_rate": round(match_rate, 4),
+        "tier": tier,
+        "feedback_key": FEEDBACK_KEYS[tier],
+    }
+
+
+def evaluate_reading(stt_text: str, target_text: str, with_errors: bool = False) -> dict:
     """
     Full evaluation pipeline:
       1. Normalize target for alignment (strip punctuation).
@@ -502,22 +733,158 @@ def evaluate_reading(stt_text: str, target_text: str) -> dict:
             "match_rate": float,
             "tier": int (1 | 2 | 3),
             "feedback_key": str,
+            "errors": list[CharacterErrorRecord],   # only when with_errors=True
         }
     """
-    target_for_alignment = _normalize_for_comparison(target_text)
-    corrected = correct_homophones(stt_text, target_for_alignment)
-    match_rate = compute_match_rate(corrected, target_text)
-
-    if match_rate >= 0.8:
-        tier: Tier = 1
-    elif match_rate >= 0.6:
-        tier = 2
+    return _evaluate_prepared(stt_text, prepare_target(target_text), with_errors)
+
+
+def _evaluate_prepared(stt_text: str, prepared: PreparedTarget, with_errors: bool = False) -> dict:
+    norm = prepared.normalized
+    if stt_text == norm:
+        # Already a perfect, punctuation-free reading: nothing to align.
+        result = _build_result(stt_text, 1.0 if norm else 0.0)
+        if with_errors:
+            result["errors"] = []
+        return result
+    if with_errors:
+        # Empty sides included: every target char is an omission / every STT char an insertion.
+        # Unstripped, so error positions follow the reference pairing.
+        corrected, errors = _apply_alignment_with_errors(
+            stt_text, norm, prepared.classes, align(stt_text, norm, strip=False)
+        )
+        match_rate = _overlap_rate(_normalize_for_comparison(corrected), prepared.counts, len(norm))
+        result = _build_result(corrected, match_rate)
+        result["errors"] = errors
+        return result
+    if not stt_text or not norm:
+        corrected = stt_text
     else:
-        tier = 3
+        corrected = _correct(stt_text, norm, prepared.classes)
+    match_rate = _overlap_rate(_normalize_for_comparison(corrected), prepared.counts, len(norm))
+    return _build_result(corrected, match_rate)
 
-    return {
-        "corrected": corrected,
-        "match_rate": round(match_rate, 4),
-        "tier": tier,
-        "feedback_key": FEEDBACK_KEYS[tier],
-    }
+
+def evaluate_reading_batch(
+    pairs: Iterable[tuple[str, str]], with_errors: bool = False
+) -> list[dict]:
+    """
+    Evaluate many (stt_text, target_text) pairs, e.g. a whole class replay.
+
+    Returns one dict per pair, identical to evaluate_reading(), in input order.
+    Targets go through the shared prepared-target cache, repeated
+    (stt, target) pairs are evaluated once, and each result is a fresh dict
+    (error records are immutable and may be shared between results).
+    """
+    evaluated: dict[tuple[str, str], dict] = {}
+    results: list[dict] = []
+
+    for stt_text, target_text in pairs:
+        result = evaluated.get((stt_text, target_text))
+        if result is None:
+            result = evaluated[(stt_text, target_text)] = _evaluate_prepared(
+                stt_text, prepare_target(target_text), with_errors
+            )
+        copy = dict(result)
+        if with_errors:
+            copy["errors"] = list(result["errors"])
+        results.append(copy)
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Streaming evaluation of interim STT results
+# ---------------------------------------------------------------------------
+
+class StreamingReadingEvaluator:
+    """
+    Incremental evaluate_reading() for a transcript that grows chunk by chunk.
+
+    The STT side is the row dimension of the alignment, so appending a chunk
+    only adds DP rows (O(len(chunk)·len(target)/w)); earlier rows are reused.
+    Browser interim results may also revise their tail — update() rewinds to
+    the common prefix with the new transcript and re-extends from there.
+
+    result() only re-walks the part of the alignment path a chunk changed
+    (IncrementalAligner.realign()) and keeps the corrected characters and
+    the matched-character count per path step, so its cost follows the size
+    of the change rather than of the transcript. After every call result()
+    equals evaluate_reading(transcript, target).
+    """
+
+    def __init__(self, target_text: str):
+        self._prepared = prepare_target(target_text)
+        self._aligner = IncrementalAligner(self._prepared.normalized)
+        self._transcript = ""
+        self._result: dict | None = None
+        self._corrected: list[str] = []      # corrected text of each alignment op ("" for omissions)
+        self._counts: dict[str, int] = {}    # characters of the corrected text
+        self._matched = 0                    # of them, found in the target (_overlap_rate)
+        self._digits = 0                     # of them, digits (need _normalize_numbers)
+
+    @property
+    def transcript(self) -> str:
+        return self._transcript
+
+    def append(self, chunk: str) -> dict:
+        """Extend the transcript with newly recognised text."""
+        if chunk:
+            self._aligner.extend(chunk)
+            self._transcript += chunk
+            self._result = None
+        return self.result()
+
+    def update(self, transcript: str) -> dict:
+        """Replace the transcript with a (possibly revised) interim result."""
+        current = self._transcript
+        limit = min(len(current), len(transcript))
+        keep = 0
+        while keep < limit and current[keep] == transcript[keep]:
+            keep += 1
+        if keep < len(current):
+            self._aligner.truncate(keep)
+            self._transcript = current[:keep]
+            self._result = None
+        return self.append(transcript[keep:])
+
+    def result(self) -> dict:
+        """Current corrected text, match rate, tier and feedback key."""
+        if self._result is None:
+            prepared = self._prepared
+            ops, changed = self._aligner.realign()
+            for ch in self._corrected[changed:]:
+                self._count(ch, -1)
+            del self._corrected[changed:]
+            tail = ops[changed:]
+            chars = iter(_apply_alignment(self._transcript, prepared.normalized, prepared.classes, tail))
+            for i, _ in tail:
+                ch = next(chars) if i >= 0 else ""     # one character per STT character
+                self._corrected.append(ch)
+                self._count(ch, 1)
+            text = "".join(self._corrected)
+            if self._digits:
+                match_rate = _overlap_rate(
+                    _normalize_for_comparison(text), prepared.counts, len(prepared.normalized)
+                )
+            else:
+                match_rate = self._matched / len(prepared.normalized) if prepared.normalized else 0.0
+            self._result = _build_result(text, match_rate)
+        return dict(self._result)
+
+    def _count(self, ch: str, delta: int) -> None:
+        """Add (delta=1) or remove (delta=-1) corrected character `ch` from the counts."""
+        if not ch:
+            return
+        n = self._counts.get(ch, 0)
+        if delta > 0:
+            self._matched += n < self._prepared.counts.get(ch, 0)
+        else:
+            self._matched -= n <= self._prepared.counts.get(ch, 0)
+        self._counts[ch] = n + delta
+        self._digits += delta if ch.isdecimal() else 0
+
+
+if __name__ == "__main__":
+    write_pinyin_table()
+    print(f"Wrote {_PINYIN_TABLE_PATH}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Alignment engine benchmark for stt_service.correct_homophones().
+
+Compares the "full", "banded" and "bitparallel" engines on simulated
+readings of 20 / 200 / 2000 characters (~10% STT errors) and checks that
+every engine returns the same corrected text.
+
+Usage:
+    cd backend && python benchmarks/bench_alignment.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes.stories import MOCK_STORIES  # noqa: E402
+from app.services.alignment import ENGINES  # noqa: E402
+from app.services.stt_service import (  # noqa: E402
+    _PINYIN_GROUPS,
+    _normalize_for_comparison,
+    correct_homophones,
+)
+
+SIZES = [20, 200, 2000]
+ERROR_RATE = 0.10
+
+
+def make_pair(size: int, rng: random.Random) -> tuple[str, str]:
+    corpus = _normalize_for_comparison("".join("".join(s["content"]) for s in MOCK_STORIES))
+    target = (corpus * (size // len(corpus) + 1))[:size]
+    vocab = [ch for chars in _PINYIN_GROUPS.values() for ch in chars]
+    stt: list[str] = []
+    for ch in target:
+        r = rng.random()
+        if r < ERROR_RATE / 3:
+            continue                               # omission
+        if r < 2 * ERROR_RATE / 3:
+            stt.append(rng.choice(vocab))          # substitution
+        elif r < ERROR_RATE:
+            stt.extend((ch, rng.choice(vocab)))    # insertion
+        else:
+            stt.append(ch)
+    return "".join(stt), target
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    rng = random.Random(42)
+    print(f"{'size':>6}  " + "  ".join(f"{name:>12}" for name in ENGINES) + "   speedup(best/full)")
+    for size in SIZES:
+        stt, target = make_pair(size, rng)
+        repeat = 200 if size <= 20 else 20 if size <= 200 else 2
+        results = {}
+        outputs = set()
+        for name in ENGINES:
+            results[name] = timeit(lambda n=name: correct_homophones(stt, target, n), repeat)
+            outputs.add(correct_homophones(stt, target, name))
+        assert len(outputs) == 1, "engines disagree"
+        best = min(results.values())
+        cells = "  ".join(f"{results[n] * 1000:>10.3f}ms" for n in ENGINES)
+        print(f"{size:>6}  {cells}   {results['full'] / best:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Model calls and session state under a retry storm of duplicate submissions.
+
+Every session submits the same answer DUPLICATES times at once (frontend
+retries, double-tapped submit). "uncoordinated" runs each request through
+begin → model → finish on its own, which is what process_answer() did
+before; "coalesced" is process_answer() as it runs now. The model is a
+FakeClient with a fixed latency.
+
+Usage:
+    cd backend && python benchmarks/bench_answer_coalescing.py [--sessions 200] [--duplicates 3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings  # noqa: E402
+from app.services import ai_service, socratic_agent  # noqa: E402
+from app.services.session_store import MemorySessionStore  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+EVALUATION = json.dumps(
+    {"understood": True, "feedback": "很好！", "question": "農夫為什麼要拔禾苗？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+async def uncoordinated(agent: socratic_agent.SocraticAgent, session_id: str, answer: str):
+    state, contents = await agent._begin_answer(session_id, answer)
+    try:
+        result = await ai_service.generate_structured_response(
+            system_prompt=agent._build_system_prompt(state),
+            contents=contents,
+            response_schema=socratic_agent.EVALUATION_SCHEMA,
+        )
+    except Exception as e:
+        return await agent._finish_answer(state, None, e)
+    return await agent._finish_answer(state, result)
+
+
+async def storm(coalesced: bool, sessions: int, duplicates: int, latency: float) -> dict:
+    socratic_agent._store = MemorySessionStore()
+    client = FakeClient(delay=latency, text=EVALUATION)
+    ai_service.init_client(client)
+    agent = socratic_agent.SocraticAgent()
+    ids = [f"s{i}" for i in range(sessions)]
+    for session_id in ids:
+        await agent.start_session(session_id, "揠苗助長", "農夫拔禾苗。")
+
+    submit = agent.process_answer if coalesced else (lambda s, a: uncoordinated(agent, s, a))
+    calls = client.calls
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(submit(s, "農夫把禾苗拔高") for s in ids for _ in range(duplicates)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    states = [await socratic_agent._store.get(s) for s in ids]
+    await ai_service.close_client()
+    return {
+        "model_calls": client.calls - calls,
+        "errors": sum(isinstance(r, Exception) for r in results),
+        "wrong_attempts": sum(state.total_attempts != 1 for state in states),
+        "elapsed": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--duplicates", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake model latency, seconds")
+    args = parser.parse_args()
+
+    settings.response_cache_backend = "none"
+    settings.context_cache_enabled = False
+    print(f"{args.sessions} sessions × {args.duplicates} identical submissions, model latency {args.latency * 1000:.0f} ms")
+    for name, coalesced in (("uncoordinated", False), ("coalesced", True)):
+        r = asyncio.run(storm(coalesced, args.sessions, args.duplicates, args.latency))
+        print(
+            f"{name:>14}: {r['model_calls']:5d} model calls, {r['errors']:4d} failed requests, "
+            f"{r['wrong_attempts']:4d} sessions with total_attempts != 1, {r['elapsed'] * 1000:6.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Share of agent-eval answers resolved locally, and the latency saved.
+
+Replays every case of tests/agent-eval/socratic-eval.json through
+SocraticAgent.process_answer() against a fake model with a fixed latency
+(`--model-ms`, default ~ a Gemini 2.5 Flash evaluation call). Answers the
+local screen catches never reach the model.
+
+Usage:
+    cd backend && python benchmarks/bench_answer_screen.py [--model-ms 1500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings  # noqa: E402
+from app.services import ai_service, socratic_agent  # noqa: E402
+from app.services.answer_screen import screen_answer  # noqa: E402
+from app.services.session_store import MemorySessionStore  # noqa: E402
+from app.services.story_table import story_table  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+SUITE = Path(__file__).resolve().parents[2] / "tests" / "agent-eval" / "socratic-eval.json"
+QUESTION = "課文提到玉山的高度，請問玉山大約有多高呢？"
+EVALUATION = json.dumps(
+    {"understood": False, "feedback": "再想想看。", "question": "玉山有多高呢？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+async def replay(suite: dict, model_ms: float) -> list[tuple[dict, float, int]]:
+    client = FakeClient(delay=model_ms / 1000, text=EVALUATION)
+    ai_service.init_client(client)
+    socratic_agent._store = MemorySessionStore()
+    agent = socratic_agent.SocraticAgent()
+    setup = suite["setup"]
+    out = []
+    try:
+        for i, case in enumerate(suite["cases"]):
+            await agent.start_session(f"s{i}", setup["story_title"], setup["story_text"])
+            calls = client.calls
+            start = time.perf_counter()
+            await agent.process_answer(f"s{i}", case["input"])
+            out.append((case, time.perf_counter() - start, client.calls - calls))
+    finally:
+        await ai_service.close_client()
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    settings.response_cache_backend = "none"
+    settings.context_cache_enabled = False
+    suite = json.loads(SUITE.read_text(encoding="utf-8"))
+    story = story_table.intern(suite["setup"]["story_title"], suite["setup"]["story_text"])
+
+    n = 20_000
+    start = time.perf_counter()
+    for i in range(n):
+        screen_answer(suite["cases"][i % len(suite["cases"])]["input"], story, QUESTION)
+    screen_us = (time.perf_counter() - start) / n * 1e6
+
+    results = asyncio.run(replay(suite, args.model_ms))
+    local = [(case, t) for case, t, calls in results if calls == 0]
+    model = [(case, t) for case, t, calls in results if calls > 0]
+    wrong = [case["id"] for case, _ in local if case["expected_understood"] is not False]
+    print(f"{len(results)} eval cases, fake model latency {args.model_ms:.0f}ms, screen_answer {screen_us:.1f}µs/answer")
+    print(f"resolved locally: {len(local)}/{len(results)} ({len(local) / len(results):.0%}) "
+          f"{[case['id'] for case, _ in local]}")
+    print(f"  misjudged locally: {wrong or 'none'}")
+    local_ms = sum(t for _, t in local) / max(1, len(local)) * 1000
+    model_ms = sum(t for _, t in model) / max(1, len(model)) * 1000
+    print(f"mean answer latency: local {local_ms:.2f}ms, model {model_ms:.0f}ms")
+    print(f"total latency: {sum(t for _, t, _ in results):.2f}s "
+          f"(all through the model: {len(results) * model_ms / 1000:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
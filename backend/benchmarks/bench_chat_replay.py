@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Throughput of POST /api/comprehension/chat with the model replayed from a cassette.
+
+Each session starts on the agent-eval story and answers one eval case.
+Model calls are served from a model cassette (model_cassette.py) after a
+synthetic latency (`--latency`, a MODEL_CASSETTE_LATENCY spec), so the run
+needs no credentials and repeats the same requests every time. Without
+`--cassette`, one is first recorded from a fake model through the same
+requests.
+
+Usage:
+    cd backend && python benchmarks/bench_chat_replay.py [--sessions 400] [--concurrency 100]
+        [--latency lognormal:800:3000] [--cassette model_cassette.jsonl]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import ai_service, socratic_agent  # noqa: E402
+from app.services.metrics import metrics  # noqa: E402
+from app.services.session_store import MemorySessionStore  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+SUITE = json.loads(
+    (Path(__file__).resolve().parents[2] / "tests" / "agent-eval" / "socratic-eval.json").read_text(encoding="utf-8")
+)
+EVALUATION = json.dumps(
+    {"understood": False, "feedback": "再想想看。", "question": "玉山有多高呢？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+async def run_sessions(sessions: int, concurrency: int) -> tuple[float, list[float], int]:
+    """(wall seconds, per-request latencies, failed requests)."""
+    setup = SUITE["setup"]
+    story = {"story_title": setup["story_title"], "story_text": setup["story_text"]}
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failed = [], 0
+
+    async def post(http, payload):
+        nonlocal failed
+        start = time.perf_counter()
+        response = await http.post("/api/comprehension/chat", json=payload)
+        latencies.append(time.perf_counter() - start)
+        failed += response.status_code != 200
+
+    async def session(http, i):
+        async with semaphore:
+            sid = f"s{i}"
+            await post(http, {"session_id": sid, **story, "student_answer": None})
+            case = SUITE["cases"][i % len(SUITE["cases"])]
+            await post(http, {"session_id": sid, **story, "student_answer": case["input"]})
+
+    socratic_agent._store = MemorySessionStore()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(session(http, i) for i in range(sessions)))
+        return time.perf_counter() - start, latencies, failed
+
+
+def replay(sessions: int, concurrency: int) -> None:
+    settings.model_cassette_mode = "replay"
+    metrics.reset()
+    ai_service.init_client()
+    wall, latencies, failed = asyncio.run(run_sessions(sessions, concurrency))
+    asyncio.run(ai_service.close_client())
+    ordered = sorted(latencies)
+
+    def pct(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    print(f"{len(ordered)} requests in {wall:.2f}s ({len(ordered) / wall:.0f} req/s, {failed} failed)  "
+          f"p50 {pct(0.5):.0f}ms  p95 {pct(0.95):.0f}ms  p99 {pct(0.99):.0f}ms  "
+          f"cassette hits {metrics.get('cassette.hits'):.0f} / near {metrics.get('cassette.near_hits'):.0f} "
+          f"/ misses {metrics.get('cassette.misses'):.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", default="lognormal:800:3000")
+    parser.add_argument("--cassette", help="replay this cassette instead of recording one")
+    args = parser.parse_args()
+
+    settings.response_cache_backend = "none"
+    settings.context_cache_enabled = False
+    socratic_agent.socratic_agent.question_bank = None
+    if args.cassette:
+        settings.model_cassette_path = args.cassette
+    else:
+        settings.model_cassette_path = os.path.join(tempfile.mkdtemp(), "cassette.jsonl")
+        settings.model_cassette_mode = "record"
+        ai_service.init_client(FakeClient(delay=0.001, text=EVALUATION))
+        asyncio.run(run_sessions(len(SUITE["cases"]), 1))
+        asyncio.run(ai_service.close_client())
+        print(f"recorded {settings.model_cassette_path}")
+
+    settings.model_cassette_latency = args.latency
+    print(f"{args.sessions} sessions × 2 requests, concurrency {args.concurrency}, model latency {args.latency}")
+    for _ in range(2):
+        replay(args.sessions, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Time to first feedback: streamed vs whole structured Socratic answers.
+
+A local stub Gemini server generates the evaluation JSON at a fixed rate:
+streamGenerateContent sends it as SSE chunks spread over --latency-ms,
+generateContent answers once the whole text would have been generated.
+"whole" is SocraticAgent.process_answer(); "stream" is stream_answer(),
+timed to its first feedback piece, first question piece and final result.
+
+Usage:
+    cd backend && python benchmarks/bench_chat_stream.py [--answers 20] [--latency-ms 1500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from google import genai  # noqa: E402
+from google.genai import types as genai_types  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services import ai_service, socratic_agent as agent_module  # noqa: E402
+from app.services.session_store import MemorySessionStore  # noqa: E402
+
+EVALUATION = {
+    "understood": False,
+    "feedback": "你說農夫很認真，這是對的！不過再看看第二段，農夫除了認真，心裡還有什麼感覺呢？",
+    "question": "農夫為什麼覺得禾苗長得太慢？課文裡哪一句話告訴我們他的心情？",
+    "phase": "factual",
+    "referenced_paragraph": 1,
+}
+STORY = ("揠苗助長的故事", "古時候有一個農夫。\n他嫌禾苗長得太慢，心裡很著急。\n他把禾苗一棵一棵往上拔。")
+
+
+# ---------------------------------------------------------------------------
+# Stub model server (runs in a child process)
+# ---------------------------------------------------------------------------
+
+def serve(port: int, latency: float, chunks: int) -> None:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+
+    text = json.dumps(EVALUATION, ensure_ascii=False)
+    size = -(-len(text) // chunks)
+    pieces = [text[i:i + size] for i in range(0, len(text), size)]
+
+    def candidate(piece: str, last: bool) -> dict:
+        body = {"content": {"role": "model", "parts": [{"text": piece}]}}
+        if last:
+            body["finishReason"] = "STOP"
+        return {"candidates": [body]}
+
+    async def sse():
+        for n, piece in enumerate(pieces):
+            await asyncio.sleep(latency / len(pieces))
+            yield f"data: {json.dumps(candidate(piece, n == len(pieces) - 1))}\r\n\r\n"
+
+    async def generate(request):
+        if request.url.path.endswith(":streamGenerateContent"):
+            return StreamingResponse(sse(), media_type="text/event-stream")
+        await asyncio.sleep(latency)
+        return JSONResponse(candidate(text, True))
+
+    async def ping(request):
+        return JSONResponse({})
+
+    app = Starlette(routes=[
+        Route("/ping", ping),
+        Route("/{path:path}", generate, methods=["POST"]),
+    ])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_stub(port: int, latency: float, chunks: int) -> subprocess.Popen:
+    proc = subprocess.Popen([
+        sys.executable, __file__, "--serve", str(port),
+        "--latency-ms", str(latency * 1000), "--chunks", str(chunks),
+    ])
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/ping")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("stub server did not start")
+
+
+# ---------------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------------
+
+async def whole(agent, session_id: str) -> float:
+    start = time.perf_counter()
+    await agent.process_answer(session_id, "農夫很認真")
+    return time.perf_counter() - start
+
+
+async def streamed(agent, session_id: str) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    first = {}
+    async for kind, _ in await agent.stream_answer(session_id, "農夫很認真"):
+        first.setdefault(kind, time.perf_counter() - start)
+    return first["feedback"], first["question"], first["result"]
+
+
+async def bench(base_url: str, answers: int) -> None:
+    http_client = ai_service.pooled_http_client()
+    ai_service.init_client(
+        genai.Client(
+            api_key="stub",
+            http_options=genai_types.HttpOptions(base_url=base_url, httpx_async_client=http_client),
+        ),
+        http_client,
+    )
+    agent = agent_module.SocraticAgent()
+    try:
+        for i in range(answers):
+            await agent.start_session(f"s{i}", *STORY)
+        await whole(agent, "s0")                           # warm-up (first connection)
+        whole_times = [await whole(agent, f"s{i}") for i in range(answers)]
+        stream_times = [await streamed(agent, f"s{i}") for i in range(answers)]
+    finally:
+        await ai_service.close_client()
+
+    def ms(values) -> str:
+        return f"{statistics.median(values) * 1000:8.1f}ms"
+
+    print(f"{'':>8}  {'first feedback':>14}  {'first question':>14}  {'complete':>10}")
+    print(f"{'whole':>8}  {ms(whole_times):>14}  {ms(whole_times):>14}  {ms(whole_times):>10}")
+    print(f"{'stream':>8}  {ms([t[0] for t in stream_times]):>14}  "
+          f"{ms([t[1] for t in stream_times]):>14}  {ms([t[2] for t in stream_times]):>10}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--answers", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=1500.0, help="stub generation time")
+    parser.add_argument("--chunks", type=int, default=30, help="stream chunks per response")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.latency_ms / 1000, args.chunks)
+        return
+
+    settings.response_cache_backend = "none"
+    settings.context_cache_enabled = False
+    agent_module._store = MemorySessionStore()
+    proc = start_stub(args.port, args.latency_ms / 1000, args.chunks)
+    try:
+        print(f"{args.answers} answers, stub generation {args.latency_ms:.0f}ms in {args.chunks} chunks "
+              "(median times)")
+        asyncio.run(bench(f"http://127.0.0.1:{args.port}", args.answers))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
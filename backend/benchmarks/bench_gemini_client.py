@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Load test of generate_structured_response() against a local stub Gemini server.
+
+"before" replays the previous call path (a new genai.Client per call and the
+synchronous generate_content pushed into asyncio.to_thread); "after" uses the
+shared async client with its connection pool and concurrency semaphore.
+The stub answers every generateContent after a fixed delay and records the
+highest number of requests it had in flight at once.
+
+Usage:
+    cd backend && python benchmarks/bench_gemini_client.py [--requests 500] [--latency-ms 100]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from google import genai  # noqa: E402
+from google.genai import types as genai_types  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services import ai_service  # noqa: E402
+
+SCHEMA = {"type": "OBJECT", "properties": {"understood": {"type": "BOOLEAN"}}}
+CONTENTS = [genai_types.Content(role="user", parts=[genai_types.Part(text="農夫把禾苗拔高了")])]
+
+
+# ---------------------------------------------------------------------------
+# Stub model server (runs in a child process)
+# ---------------------------------------------------------------------------
+
+def serve(port: int, latency: float) -> None:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    state = {"in_flight": 0, "max_in_flight": 0}
+    body = {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": json.dumps({"understood": True})}]},
+            "finishReason": "STOP",
+        }],
+    }
+
+    async def generate(request):
+        state["in_flight"] += 1
+        state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+        try:
+            await asyncio.sleep(latency)
+            return JSONResponse(body)
+        finally:
+            state["in_flight"] -= 1
+
+    async def stats(request):
+        result = dict(state)
+        state["max_in_flight"] = state["in_flight"]
+        return JSONResponse(result)
+
+    app = Starlette(routes=[
+        Route("/stats", stats),
+        Route("/{path:path}", generate, methods=["POST"]),
+    ])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+def start_stub(port: int, latency: float) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, __file__, "--serve", str(port), "--latency-ms", str(latency * 1000)])
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("stub server did not start")
+
+
+# ---------------------------------------------------------------------------
+# Call paths
+# ---------------------------------------------------------------------------
+
+def stub_client(base_url: str, http_client: httpx.AsyncClient | None = None) -> genai.Client:
+    return genai.Client(
+        api_key="stub",
+        http_options=genai_types.HttpOptions(base_url=base_url, httpx_async_client=http_client),
+    )
+
+
+async def legacy_call(base_url: str) -> dict:
+    """The call path before the shared client: new client + thread hop per call."""
+    client = stub_client(base_url)
+    response = await asyncio.wait_for(
+        asyncio.to_thread(
+            client.models.generate_content,
+            model="gemini-2.5-flash",
+            contents=CONTENTS,
+            config=genai_types.GenerateContentConfig(
+                system_instruction="stub",
+                response_mime_type="application/json",
+                response_schema=SCHEMA,
+            ),
+        ),
+        timeout=ai_service.GEMINI_TIMEOUT,
+    )
+    return json.loads(response.text)
+
+
+async def shared_call(base_url: str) -> dict:
+    return await ai_service.generate_structured_response("stub", CONTENTS, SCHEMA)
+
+
+async def load(call, base_url: str, requests: int) -> list[float | None]:
+    """Fire `requests` concurrent calls; latency per call, None for a failed call."""
+    async def one() -> float | None:
+        start = time.perf_counter()
+        try:
+            await call(base_url)
+        except (TimeoutError, asyncio.TimeoutError):
+            return None
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one() for _ in range(requests)))
+
+
+async def run(name: str, call, base_url: str, requests: int) -> None:
+    start = time.perf_counter()
+    results = await load(call, base_url, requests)
+    wall = time.perf_counter() - start
+    latencies = sorted(r for r in results if r is not None)
+    stats = httpx.get(f"{base_url}/stats").json()
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<7} wall {wall:7.2f}s  {len(latencies) / wall:7.1f} req/s  "
+        f"p50 {p50 * 1000:8.1f}ms  p99 {p99 * 1000:8.1f}ms  "
+        f"max in-flight {stats['max_in_flight']:4d}  timeouts {len(results) - len(latencies)}"
+    )
+
+
+async def bench(base_url: str, requests: int) -> None:
+    await load(legacy_call, base_url, 4)             # warm-up (imports, first connection)
+    httpx.get(f"{base_url}/stats")
+    await run("before", legacy_call, base_url, requests)
+
+    http_client = ai_service.pooled_http_client()
+    ai_service.init_client(stub_client(base_url, http_client), http_client)
+    try:
+        await load(shared_call, base_url, 4)
+        httpx.get(f"{base_url}/stats")
+        await run("after", shared_call, base_url, requests)
+    finally:
+        await ai_service.close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--concurrency", type=int, default=settings.gemini_max_concurrency,
+                        help="settings.gemini_max_concurrency for the 'after' run")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.latency_ms / 1000)
+        return
+
+    settings.gemini_max_concurrency = args.concurrency
+    proc = start_stub(args.port, args.latency_ms / 1000)
+    try:
+        print(f"{args.requests} concurrent requests, stub latency {args.latency_ms:.0f}ms, "
+              f"semaphore {args.concurrency}, pool {settings.gemini_max_connections}")
+        asyncio.run(bench(f"http://127.0.0.1:{args.port}", args.requests))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Answer latency and model load while the Gemini API is down.
+
+Sessions are started against a healthy local stub Gemini server, then the
+stub answers every generateContent with 503 while waves of students submit
+answers through SocraticAgent.process_answer(), which serves the fallback
+question when the model call fails. "before" replays
+the previous retry policy (3 attempts, 1s / 2s fixed backoff, no breaker,
+no budget); "after" is the circuit breaker, retry budget and jittered
+backoff as configured in settings.
+
+Usage:
+    cd backend && python benchmarks/bench_gemini_outage.py [--sessions 20] [--waves 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from google import genai  # noqa: E402
+from google.genai import types as genai_types  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services import ai_service, circuit_breaker, socratic_agent  # noqa: E402
+from app.services.session_store import MemorySessionStore  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Stub model server (runs in a child process)
+# ---------------------------------------------------------------------------
+
+def serve(port: int) -> None:
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    state = {"calls": 0, "down": False}
+    question = {"understood": False, "feedback": "", "question": "這篇課文的主角是誰？", "phase": "factual"}
+    healthy = {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": json.dumps(question, ensure_ascii=False)}]},
+            "finishReason": "STOP",
+        }],
+    }
+    outage = {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}}
+
+    async def generate(request):
+        state["calls"] += 1
+        await asyncio.sleep(0.02)
+        if state["down"]:
+            return JSONResponse(outage, status_code=503)
+        return JSONResponse(healthy)
+
+    async def stats(request):
+        result = dict(state)
+        state["calls"] = 0
+        return JSONResponse(result)
+
+    async def down(request):
+        state["down"] = True
+        return JSONResponse(state)
+
+    app = Starlette(routes=[
+        Route("/stats", stats),
+        Route("/down", down, methods=["PUT"]),
+        Route("/{path:path}", generate, methods=["POST"]),
+    ])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_stub(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen([sys.executable, __file__, "--serve", str(port)])
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("stub server did not start")
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+
+async def outage(base_url: str, sessions: int, waves: int, legacy: bool) -> list[float]:
+    http_client = ai_service.pooled_http_client()
+    ai_service.init_client(
+        genai.Client(api_key="stub", http_options=genai_types.HttpOptions(
+            base_url=base_url, httpx_async_client=http_client,
+        )),
+        http_client,
+    )
+    if legacy:
+        ai_service._breaker = circuit_breaker.CircuitBreaker(failure_threshold=10**9)
+        ai_service._retry_budget = circuit_breaker.RetryBudget(burst=float("inf"))
+    socratic_agent._store = MemorySessionStore()
+    agent = socratic_agent.SocraticAgent()
+    ids = [f"s{i}" for i in range(sessions)]
+    for session_id in ids:
+        await agent.start_session(session_id, "揠苗助長", "農夫拔禾苗。")
+    httpx.put(f"{base_url}/down")
+    httpx.get(f"{base_url}/stats")
+
+    async def answer(session_id: str, wave: int) -> float:
+        start = time.perf_counter()
+        try:
+            await agent.process_answer(session_id, f"第{wave}次回答")
+        except RuntimeError:
+            pass                # MAX_CONSECUTIVE_ERRORS reached: a 503 to the student
+        return time.perf_counter() - start
+
+    latencies = []
+    try:
+        for wave in range(waves):
+            latencies += await asyncio.gather(*(answer(s, wave) for s in ids))
+    finally:
+        await ai_service.close_client()
+    return latencies
+
+
+def report(name: str, latencies: list[float], calls: int) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<7} answers {len(latencies):4d}  model calls {calls:4d}  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms  "
+        f"total {sum(latencies):7.1f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent students per wave")
+    parser.add_argument("--waves", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    settings.response_cache_backend = "none"
+    settings.context_cache_enabled = False
+    settings.question_bank_enabled = False
+    base_url = f"http://127.0.0.1:{args.port}"
+    proc = start_stub(args.port)
+    try:
+        print(f"{args.waves} waves of {args.sessions} concurrent answers during a 503 outage")
+        ai_service.backoff_delay = lambda attempt, base, cap: base * (2 ** attempt)
+        before = asyncio.run(outage(base_url, args.sessions, args.waves, legacy=True))
+        report("before", before, httpx.get(f"{base_url}/stats").json()["calls"])
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    ai_service.backoff_delay = circuit_breaker.backoff_delay
+    proc = start_stub(args.port)
+    try:
+        after = asyncio.run(outage(base_url, args.sessions, args.waves, legacy=False))
+        report("after", after, httpx.get(f"{base_url}/stats").json()["calls"])
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
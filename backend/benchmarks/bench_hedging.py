@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tail latency of generate_structured_response() with and without hedging.
+
+The fake model answers most calls in ~`--base-ms` but a `--slow-fraction` of
+calls stall for `--slow-ms`, like a Gemini replica under load. "before"
+disables hedging; "after" re-sends a call once it runs past the tracked p95
+(settings.gemini_hedge_min_delay is lowered to match the fake latencies).
+
+Usage:
+    cd backend && python benchmarks/bench_hedging.py [--requests 2000] [--slow-fraction 0.03]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings  # noqa: E402
+from app.services import ai_service  # noqa: E402
+from app.services.metrics import metrics  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+
+def long_tail_client(base: float, slow: float, slow_fraction: float, seed: int) -> FakeClient:
+    client = FakeClient()
+    rng = random.Random(seed)
+
+    async def generate_content(**kwargs):
+        client.calls += 1
+        delay = slow if rng.random() < slow_fraction else rng.uniform(0.8 * base, 1.2 * base)
+        await asyncio.sleep(delay)
+        return SimpleNamespace(text='{"understood": false}', usage_metadata=None)
+
+    client.aio.models.generate_content = generate_content
+    return client
+
+
+async def run(args, hedging: bool) -> tuple[list[float], int]:
+    settings.gemini_hedging_enabled = hedging
+    client = long_tail_client(args.base_ms / 1000, args.slow_ms / 1000, args.slow_fraction, args.seed)
+    ai_service.init_client(client)
+    metrics.reset()
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def one() -> float:
+        async with sem:
+            start = time.perf_counter()
+            await ai_service.generate_structured_response("system", [], {"type": "object"})
+            return time.perf_counter() - start
+
+    try:
+        latencies = sorted(await asyncio.gather(*(one() for _ in range(args.requests))))
+    finally:
+        await ai_service.close_client()
+    return latencies, client.calls
+
+
+def pct(latencies: list[float], q: float) -> float:
+    return latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--base-ms", type=float, default=40.0)
+    parser.add_argument("--slow-ms", type=float, default=400.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.03)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    settings.response_cache_backend = "none"
+    settings.context_cache_enabled = False
+    settings.gemini_hedge_min_delay = args.base_ms / 1000
+    settings.gemini_retry_budget_ratio = 0.1
+    print(f"{args.requests} calls, {args.concurrency} concurrent, ~{args.base_ms:.0f}ms, "
+          f"{args.slow_fraction:.0%} stall for {args.slow_ms:.0f}ms")
+    for name, hedging in (("before", False), ("after", True)):
+        latencies, calls = asyncio.run(run(args, hedging))
+        print(
+            f"{name:<7} p50 {pct(latencies, 0.5):6.1f}ms  p95 {pct(latencies, 0.95):6.1f}ms  "
+            f"p99 {pct(latencies, 0.99):6.1f}ms  model calls {calls} "
+            f"(+{(calls - args.requests) / args.requests:.1%})  hedge wins {metrics.get('gemini.hedge_wins'):.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
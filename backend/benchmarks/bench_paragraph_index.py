@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Prompt size and local cost of paragraph retrieval on a long story.
+
+Builds a synthetic story of `--paragraphs` paragraphs (default 60, ~70
+characters each) and compares the system prompt of a process_answer turn
+with the whole story in it ("full", what the agent sent before) against
+the per-turn excerpt of the EXCERPT_PARAGRAPHS most relevant paragraphs.
+Prompt tokens are counted as characters (~1 token per Chinese character).
+Also times building the index, choosing an excerpt and locating the
+paragraph of a question, and checks that a question about paragraph i is
+located in paragraph i.
+
+Usage:
+    cd backend && python benchmarks/bench_paragraph_index.py [--paragraphs 60]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services import socratic_agent  # noqa: E402
+from app.services.paragraph_index import ParagraphIndex, paragraph_index  # noqa: E402
+from app.services.session_store import SessionState  # noqa: E402
+from app.services.story_table import story_table  # noqa: E402
+
+COMMON = "我們他的是在有一個這也到說去看很大天山水人家時候就要來出上下小好地方會想起走和"
+NAMES = "甲乙丙丁戊己庚辛壬癸子丑寅卯辰巳午未申酉戌亥春夏秋冬松竹梅蘭菊桃李杏"
+TURNS = 2_000
+
+
+def synthetic_story(paragraphs: int, seed: int = 0) -> tuple[str, list[str]]:
+    """Story text, and the keyword only paragraph i mentions."""
+    rng = random.Random(seed)
+    keywords = []
+    while len(keywords) < paragraphs:
+        word = "".join(rng.sample(NAMES, 3))
+        if word not in keywords:
+            keywords.append(word)
+    text = []
+    for word in keywords:
+        filler = "".join(rng.choice(COMMON) for _ in range(60))
+        text.append(f"{filler[:30]}{word}村的人{filler[30:]}。")
+    return "\n".join(text), keywords
+
+
+def turn_state(story, keyword: str) -> SessionState:
+    state = SessionState(session_id="s", story=story, mispronounced_words=["禾"], accuracy=90.0, cpm=180.0)
+    state.conversation.append("ai", f"{keyword}村的人在做什麼？")
+    state.conversation.append("student", "他們在山上走來走去")
+    return state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paragraphs", type=int, default=60)
+    args = parser.parse_args()
+
+    text, keywords = synthetic_story(args.paragraphs)
+    story = story_table.intern("長篇", text)
+    agent = socratic_agent.SocraticAgent()
+    states = [turn_state(story, word) for word in keywords]
+
+    limit = socratic_agent.FULL_TEXT_MAX_PARAGRAPHS
+    socratic_agent.FULL_TEXT_MAX_PARAGRAPHS = 10**9
+    full = sum(len(agent._build_system_prompt(s)) for s in states) / len(states)
+    socratic_agent.FULL_TEXT_MAX_PARAGRAPHS = limit
+    socratic_agent._static_prompt.cache_clear()
+    excerpt = sum(len(agent._build_system_prompt(s)) for s in states) / len(states)
+
+    start = time.perf_counter()
+    for _ in range(50):
+        ParagraphIndex(story.paragraphs)
+    build_ms = (time.perf_counter() - start) / 50 * 1000
+
+    start = time.perf_counter()
+    for i in range(TURNS):
+        agent._build_system_prompt(states[i % len(states)])
+    turn_us = (time.perf_counter() - start) / TURNS * 1e6
+
+    index = paragraph_index(story)
+    start = time.perf_counter()
+    hits = sum(index.best(f"{word}村的人在做什麼？") == i for i, word in enumerate(keywords))
+    locate_us = (time.perf_counter() - start) / len(keywords) * 1e6
+
+    print(f"story: {args.paragraphs} paragraphs, {len(text)} characters; "
+          f"excerpt {socratic_agent.EXCERPT_PARAGRAPHS} paragraphs")
+    print(f"prompt tokens/turn: full {full:,.0f}, excerpt {excerpt:,.0f} ({1 - excerpt / full:.0%} fewer)")
+    print(f"index build {build_ms:.2f}ms once per story; prompt with excerpt {turn_us:.0f}µs/turn; "
+          f"locate paragraph {locate_us:.0f}µs")
+    print(f"located the asked-about paragraph: {hits}/{len(keywords)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Pinyin lookup benchmark: compiled class table vs the legacy char→pinyin dict.
+
+Reports is_homophone() cost, table build/load time, module import time and
+the memory held by each representation.
+
+Usage:
+    cd backend && python -m app.services.stt_service   # optional: generate the binary table
+    cd backend && python benchmarks/bench_pinyin.py
+"""
+
+import os
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, BACKEND)
+
+from app.services import stt_service  # noqa: E402
+from app.services.stt_service import _PINYIN_GROUPS, is_homophone  # noqa: E402
+
+
+def legacy_table() -> dict[str, str]:
+    char_to_pinyin: dict[str, str] = {}
+    for py, chars in _PINYIN_GROUPS.items():
+        for ch in chars:
+            if ch not in char_to_pinyin:
+                char_to_pinyin[ch] = py
+    return char_to_pinyin
+
+
+_LEGACY = legacy_table()
+
+
+def legacy_is_homophone(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    pa, pb = _LEGACY.get(a), _LEGACY.get(b)
+    if pa is None or pb is None:
+        return False
+    return pa == pb
+
+
+def allocated(fn) -> int:
+    tracemalloc.start()
+    result = fn()  # noqa: F841 — keep alive while measuring
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+def import_time() -> float:
+    """Self time of importing stt_service with warm bytecode caches (seconds)."""
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    cmd = [sys.executable, "-X", "importtime", "-c", "import app.services.stt_service"]
+    runs = []
+    for _ in range(8):
+        err = subprocess.run(cmd, cwd=BACKEND, env=env, capture_output=True, text=True).stderr
+        line = next(ln for ln in err.splitlines() if ln.rstrip().endswith("app.services.stt_service"))
+        runs.append(int(line.split(":")[1].split("|")[0]) / 1e6)
+    return min(runs[1:])
+
+
+def main() -> None:
+    pairs = [("和", "禾"), ("好", "壞"), ("河", "河"), ("ß", "和")] * 250
+    n = 200
+
+    def run(fn):
+        return min(timeit.repeat(lambda: [fn(a, b) for a, b in pairs], number=n, repeat=3)) / (n * len(pairs))
+
+    print(f"is_homophone  legacy dict: {run(legacy_is_homophone) * 1e9:7.1f} ns/call")
+    print(f"is_homophone  class table: {run(is_homophone) * 1e9:7.1f} ns/call")
+
+    path = stt_service._PINYIN_TABLE_PATH
+    build = min(timeit.repeat(legacy_table, number=20, repeat=3)) / 20
+    compile_ = min(timeit.repeat(stt_service._compile_pinyin_table, number=20, repeat=3)) / 20
+    print(f"legacy dict build:         {build * 1e3:7.3f} ms")
+    print(f"class table compile:       {compile_ * 1e3:7.3f} ms")
+    if path.exists():
+        load = min(timeit.repeat(lambda: stt_service._load_pinyin_table(path), number=20, repeat=3)) / 20
+        print(f"class table load (.bin):   {load * 1e3:7.3f} ms")
+    else:
+        print("class table load (.bin):   (not generated — run `python -m app.services.stt_service`)")
+    print(f"stt_service import (self): {import_time() * 1e3:7.3f} ms")
+
+    print(f"legacy dict memory:        {allocated(legacy_table) / 1024:7.1f} KiB")
+    print(f"class table memory:        {allocated(stt_service._compile_pinyin_table) / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-question: live Gemini call vs the pre-warmed question bank.
+
+The model is simulated in-process with a fixed latency (real Gemini
+structured calls take 1-3 s); the response cache is disabled so every
+live start_session() pays the model call.
+
+Usage:
+    cd backend && python benchmarks/bench_question_bank.py [--latency-ms 1500] [--sessions 30]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings  # noqa: E402
+from app.services import ai_service  # noqa: E402
+from app.services.question_bank import (  # noqa: E402
+    PHASES,
+    QuestionBank,
+    mock_stories,
+    warm_question_bank,
+)
+from app.services.socratic_agent import SocraticAgent  # noqa: E402
+
+
+class SimulatedModel:
+    """genai.Client stand-in answering both bank and opening-question prompts."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=self.generate_content),
+            aclose=self.aclose,
+        )
+
+    async def generate_content(self, model, contents, config):
+        await asyncio.sleep(self.latency)
+        if "questions" in config.response_schema["properties"]:
+            payload = {"questions": [
+                {"phase": p, "question": f"{p} 問題 {i}？", "referenced_paragraph": i}
+                for p in PHASES for i in range(4)
+            ]}
+        else:
+            payload = {"question": "這篇課文的主角是誰？", "phase": "factual"}
+        return SimpleNamespace(text=json.dumps(payload, ensure_ascii=False))
+
+    async def aclose(self):
+        pass
+
+
+async def time_sessions(agent: SocraticAgent, stories, sessions: int) -> list[float]:
+    latencies = []
+    for i in range(sessions):
+        title, text = stories[i % len(stories)]
+        start = time.perf_counter()
+        await agent.start_session(f"bench-{id(agent)}-{i}", title, text)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    p50 = statistics.median(latencies)
+    print(f"{name:<6} p50 {p50 * 1000:9.3f} ms   max {max(latencies) * 1000:9.3f} ms")
+
+
+async def bench(latency: float, sessions: int) -> None:
+    settings.response_cache_backend = "none"
+    ai_service.init_client(SimulatedModel(latency))
+    stories = mock_stories()
+    try:
+        report("live", await time_sessions(SocraticAgent(), stories, sessions))
+
+        bank = QuestionBank()
+        start = time.perf_counter()
+        await warm_question_bank(bank, stories)
+        print(f"warm-up job: {len(bank)} stories in {time.perf_counter() - start:.2f} s (before class)")
+        report("bank", await time_sessions(SocraticAgent(bank), stories, sessions))
+    finally:
+        await ai_service.close_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=float, default=1500.0)
+    parser.add_argument("--sessions", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(bench(args.latency_ms / 1000, args.sessions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Rate limiter soak test: memory and time per call over many distinct sessions.
+
+"lists" is the previous limiter, a dict of per-session timestamp lists that
+never forgets a session; "window" is MemoryRateLimiter (sliding-window
+counter with idle-key eviction). Both see the same simulated traffic: a new
+session id every --interval seconds, each making --requests calls spread
+over its first minute. Memory is measured with tracemalloc.
+
+Usage:
+    cd backend && python benchmarks/bench_rate_limiter.py [--sessions 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.rate_limiter import MemoryRateLimiter  # noqa: E402
+
+RATE_LIMIT = 30
+RATE_WINDOW = 60
+
+
+class TimestampListLimiter:
+    """The previous limiter: one list of request timestamps per session."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._rate_counts: dict[str, list[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rate_counts)
+
+    def allow_at(self, key: str, now: float) -> bool:
+        timestamps = self._rate_counts.get(key, [])
+        timestamps = [t for t in timestamps if now - t < self.window]
+        if len(timestamps) >= self.limit:
+            return False
+        timestamps.append(now)
+        self._rate_counts[key] = timestamps
+        return True
+
+
+def traffic(sessions: int, requests: int, interval: float):
+    """(session id, time) calls in time order; session i starts at i × interval."""
+    spacing = RATE_WINDOW / requests
+    per_step = max(1, round(spacing / interval))   # sessions started between two calls of one session
+    for i in range(sessions + per_step * requests):
+        for r in range(requests):
+            j = i - r * per_step
+            if 0 <= j < sessions:
+                yield f"session-{j}", i * interval
+
+
+def soak(limiter, sessions: int, requests: int, interval: float) -> dict:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    calls, peak_keys = 0, 0
+    start = time.perf_counter()
+    for key, now in traffic(sessions, requests, interval):
+        limiter.allow_at(key, now)
+        calls += 1
+        if calls % 4096 == 0:
+            peak_keys = max(peak_keys, len(limiter))
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    keys = len(limiter)
+    return {
+        "calls": calls,
+        "ns_per_call": elapsed / calls * 1e9,
+        "keys": keys,
+        "peak_keys": max(peak_keys, keys),
+        "mb": (current - base) / 1e6,
+        "bytes_per_key": (current - base) / keys if keys else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=3, help="calls per session")
+    parser.add_argument("--interval", type=float, default=0.005, help="seconds between new sessions")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions × {args.requests} calls, one new session every {args.interval}s "
+          f"({args.sessions * args.interval / 60:.0f} simulated minutes)")
+    print(f"{'limiter':>8}  {'ns/call*':>8}  {'keys kept':>10}  {'peak keys':>10}  "
+          f"{'memory':>9}  {'B/key':>6}")
+    for name, limiter in (
+        ("lists", TimestampListLimiter(RATE_LIMIT, RATE_WINDOW)),
+        ("window", MemoryRateLimiter(RATE_LIMIT, RATE_WINDOW)),
+    ):
+        r = soak(limiter, args.sessions, args.requests, args.interval)
+        print(f"{name:>8}  {r['ns_per_call']:>8.0f}  {r['keys']:>10}  {r['peak_keys']:>10}  "
+              f"{r['mb']:>7.1f}MB  {r['bytes_per_key']:>6.0f}")
+    print("* timed with tracemalloc running, which inflates both columns alike")
+
+
+if __name__ == "__main__":
+    main()
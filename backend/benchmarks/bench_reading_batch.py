@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: evaluate_reading() loop vs evaluate_reading_batch().
+
+Simulates a class replay over MOCK_STORIES: every line is read by many
+students, with a mix of fluent readings and readings with a few
+homophone / omission / substitution errors.
+
+Usage:
+    cd backend && python benchmarks/bench_reading_batch.py [--pairs 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes.stories import MOCK_STORIES  # noqa: E402
+from app.services.stt_service import (  # noqa: E402
+    _PINYIN_GROUPS,
+    _normalize_for_comparison,
+    evaluate_reading,
+    evaluate_reading_batch,
+    get_pinyin,
+)
+
+_VOCAB = [ch for chars in _PINYIN_GROUPS.values() for ch in chars]
+
+
+def simulate_stt(line: str, rng: random.Random) -> str:
+    """Browser STT output: no punctuation, occasionally a few errors."""
+    chars = list(_normalize_for_comparison(line))
+    if rng.random() < 0.4:
+        return "".join(chars)
+    for _ in range(rng.randint(1, 3)):
+        k = rng.randrange(len(chars))
+        r = rng.random()
+        py = get_pinyin(chars[k])
+        if r < 0.5 and py:
+            chars[k] = rng.choice(_PINYIN_GROUPS[py])       # homophone
+        elif r < 0.75:
+            chars[k] = rng.choice(_VOCAB)                    # misread
+        elif len(chars) > 1:
+            del chars[k]                                    # skipped
+    return "".join(chars)
+
+
+def build_corpus(size: int, rng: random.Random) -> list[tuple[str, str]]:
+    lines = [line for story in MOCK_STORIES for line in story["content"]]
+    return [(simulate_stt(line, rng), line) for line in (lines[i % len(lines)] for i in range(size))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pairs", type=int, default=5000)
+    args = parser.parse_args()
+
+    pairs = build_corpus(args.pairs, random.Random(42))
+    distinct = len(set(pairs))
+
+    start = time.perf_counter()
+    loop_results = [evaluate_reading(s, t) for s, t in pairs]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = evaluate_reading_batch(pairs)
+    batch_time = time.perf_counter() - start
+
+    assert batch_results == loop_results, "batch results differ from per-call results"
+
+    print(f"pairs: {len(pairs)} ({distinct} distinct)")
+    print(f"per-call loop: {loop_time * 1000:8.1f} ms  ({len(pairs) / loop_time:10.0f} pairs/s)")
+    print(f"batch:         {batch_time * 1000:8.1f} ms  ({len(pairs) / batch_time:10.0f} pairs/s)")
+    print(f"speedup:       {loop_time / batch_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
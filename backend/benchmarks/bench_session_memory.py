@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Bytes per in-memory session: dict-based SessionState vs the compact one.
+
+"dict" is the previous SessionState, a plain dataclass carrying its own copy
+of the story text and a list of {role, text} dicts truncated by slicing;
+"compact" is the slotted SessionState referencing an interned Story with a
+Conversation ring buffer. Sessions are spread over the three mock stories,
+story text arrives freshly decoded per session (as from a request body), and
+each session holds a full history. Memory is measured with tracemalloc.
+
+Usage:
+    cd backend && python benchmarks/bench_session_memory.py [--sessions 10000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes.stories import MOCK_STORIES  # noqa: E402
+from app.services.session_store import HISTORY_TURNS, SessionState  # noqa: E402
+from app.services.story_table import story_table  # noqa: E402
+
+ANSWERS = 8  # student answers per session, enough to fill the history
+
+
+@dataclass
+class DictSessionState:
+    """The previous session record."""
+
+    session_id: str
+    story_title: str
+    story_text: str
+    conversation: list[dict] = field(default_factory=list)
+    understood_count: int = 0
+    total_attempts: int = 0
+    current_phase: str = "factual"
+    created_at: float = field(default_factory=time.time)
+    consecutive_errors: int = 0
+    mispronounced_words: list[str] | None = None
+    accuracy: float | None = None
+    cpm: float | None = None
+    version: int = 0
+
+
+def request_story(i: int) -> tuple[str, str]:
+    story = MOCK_STORIES[i % len(MOCK_STORIES)]
+    # json.loads returns new str objects, like decoding a request body
+    return json.loads(json.dumps([story["title"], "\n".join(story["content"])]))
+
+
+def turns(i: int) -> list[tuple[str, str]]:
+    out = [("ai", f"故事裡的主角是誰？他做了什麼事？（{i}）")]
+    for n in range(ANSWERS):
+        out.append(("student", f"我覺得是因為他想要讓禾苗長得更快一點{n}"))
+        out.append(("ai", f"很好！那你覺得他這樣做的結果是什麼呢？{n}"))
+    return out
+
+
+def make_dict_session(i: int) -> DictSessionState:
+    title, text = request_story(i)
+    state = DictSessionState(session_id=f"session-{i}", story_title=title, story_text=text)
+    for role, text in turns(i):
+        state.conversation.append({"role": role, "text": text})
+        if role == "student" and len(state.conversation) > HISTORY_TURNS:
+            state.conversation = [state.conversation[0]] + state.conversation[-(HISTORY_TURNS - 1):]
+    return state
+
+
+def make_compact_session(i: int) -> SessionState:
+    title, text = request_story(i)
+    state = SessionState(session_id=f"session-{i}", story=story_table.intern(title, text))
+    for role, text in turns(i):
+        state.conversation.append(role, text)
+    return state
+
+
+def measure(make, sessions: int) -> float:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    kept = [make(i) for i in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del kept
+    return used / sessions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions over {len(MOCK_STORIES)} stories, "
+          f"{HISTORY_TURNS}-turn history")
+    for name, make in (("dict", make_dict_session), ("compact", make_compact_session)):
+        per_session = measure(make, args.sessions)
+        print(f"{name:>8}  {per_session:>7.0f} B/session  "
+              f"{per_session * args.sessions / 1e6:>6.1f} MB total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+SessionStore.get() latency vs number of live sessions.
+
+"scan" is the previous in-memory store, whose get() walked every session to
+find expired ones; "heap" is MemorySessionStore with min-heap expiry and a
+sliding TTL. Both stores are filled with N live sessions, then random
+sessions are read.
+
+Usage:
+    cd backend && python benchmarks/bench_session_store.py
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.session_store import Conversation, MemorySessionStore, SessionState  # noqa: E402
+from app.services.story_table import story_table  # noqa: E402
+
+SIZES = [100, 1_000, 10_000, 100_000]
+
+
+class ScanSessionStore:
+    """The previous store: full expiry scan on every get()."""
+
+    TTL_SECONDS = 30 * 60
+
+    def __init__(self):
+        self._sessions: dict[str, SessionState] = {}
+
+    def get(self, session_id: str) -> SessionState | None:
+        now = time.time()
+        expired = [sid for sid, s in self._sessions.items() if now - s.created_at > self.TTL_SECONDS]
+        for sid in expired:
+            del self._sessions[sid]
+        return self._sessions.get(session_id)
+
+    def save(self, state: SessionState) -> None:
+        self._sessions[state.session_id] = state
+
+
+def make_state(i: int) -> SessionState:
+    return SessionState(
+        session_id=f"s{i}",
+        story=story_table.intern("揠苗助長的故事", "古時候有一個農夫。\n他把禾苗往上拔。"),
+        conversation=Conversation([("ai", "故事裡的農夫每天去田裡做什麼？")]),
+    )
+
+
+def per_get(fn, ids: list[str]) -> float:
+    start = time.perf_counter()
+    for sid in ids:
+        fn(sid)
+    return (time.perf_counter() - start) / len(ids)
+
+
+async def bench_heap(size: int, ids: list[str]) -> float:
+    store = MemorySessionStore()
+    for i in range(size):
+        await store.save(make_state(i))
+    start = time.perf_counter()
+    for sid in ids:
+        await store.get(sid)
+    return (time.perf_counter() - start) / len(ids)
+
+
+def main() -> None:
+    rng = random.Random(1)
+    print(f"{'sessions':>9}  {'scan get':>12}  {'heap get':>12}")
+    for size in SIZES:
+        scan = ScanSessionStore()
+        for i in range(size):
+            scan.save(make_state(i))
+        scan_ids = [f"s{rng.randrange(size)}" for _ in range(max(20, 200_000 // size))]
+        heap_ids = [f"s{rng.randrange(size)}" for _ in range(20_000)]
+        scan_time = per_get(scan.get, scan_ids)
+        heap_time = asyncio.run(bench_heap(size, heap_ids))
+        print(f"{size:>9}  {scan_time * 1e6:>10.1f}µs  {heap_time * 1e6:>10.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Streaming evaluation benchmark: cost per interim STT chunk.
+
+Feeds a full-text reading to StreamingReadingEvaluator in small chunks and
+reports, at several points of the transcript, the time to extend the DP by
+one chunk and to produce the full result, next to re-running
+evaluate_reading() on the whole transcript so far.
+
+Usage:
+    cd backend && python benchmarks/bench_streaming.py [--chunk 8]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes.stories import MOCK_STORIES  # noqa: E402
+from app.services.stt_service import (  # noqa: E402
+    StreamingReadingEvaluator,
+    _normalize_for_comparison,
+    clear_target_cache,
+    evaluate_reading,
+)
+from bench_reading_batch import simulate_stt  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk", type=int, default=8)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    lines = [line for story in MOCK_STORIES for line in story["content"]] * 6
+    target = "".join(lines)
+    stt = "".join(simulate_stt(line, rng) for line in lines)
+    print(f"target: {len(_normalize_for_comparison(target))} chars, transcript: {len(stt)} chars, "
+          f"chunk: {args.chunk} chars\n")
+    print(f"{'transcript':>10}  {'extend':>10}  {'extend+result':>14}  {'evaluate_reading':>17}")
+
+    clear_target_cache()
+    evaluator = StreamingReadingEvaluator(target)
+    report_every = max(1, len(stt) // args.chunk // 8)
+    for n, start in enumerate(range(0, len(stt), args.chunk)):
+        chunk = stt[start:start + args.chunk]
+        t0 = time.perf_counter()
+        evaluator._aligner.extend(chunk)
+        t1 = time.perf_counter()
+        evaluator._aligner.truncate(start)
+        t2 = time.perf_counter()
+        streamed = evaluator.append(chunk)
+        t3 = time.perf_counter()
+        full = evaluate_reading(evaluator.transcript, target)
+        t4 = time.perf_counter()
+        assert streamed == full
+        if n % report_every == 0:
+            print(f"{start + len(chunk):>10}  {(t1 - t0) * 1e3:>8.3f}ms  {(t3 - t2) * 1e3:>12.3f}ms  "
+                  f"{(t4 - t3) * 1e3:>15.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+System prompt assembly time per process_answer turn.
+
+"rebuilt" clears the prompt caches before every call, which is what the
+agent did before: split and number the story and format the whole template
+each turn. "cached" is SocraticAgent._build_system_prompt() as it runs now,
+where only the phase / progress suffix is formatted per turn.
+
+Usage:
+    cd backend && python benchmarks/bench_system_prompt.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes.stories import MOCK_STORIES  # noqa: E402
+from app.services import socratic_agent  # noqa: E402
+from app.services.session_store import SessionState  # noqa: E402
+from app.services.story_table import story_table  # noqa: E402
+
+TURNS = 20_000
+
+
+def sessions() -> list[SessionState]:
+    out = []
+    for i, story in enumerate(MOCK_STORIES):
+        state = SessionState(
+            session_id=f"s{i}",
+            story=story_table.intern(story["title"], "\n".join(story["content"])),
+            mispronounced_words=["禾", "苗"],
+            accuracy=91.5,
+            cpm=180.0,
+        )
+        out.append(state)
+    return out
+
+
+def per_turn(build, states: list[SessionState], clear: bool) -> float:
+    start = time.perf_counter()
+    for i in range(TURNS):
+        if clear:
+            socratic_agent._static_prompt.cache_clear()
+        state = states[i % len(states)]
+        state.understood_count = i % 5
+        build(state)
+    return (time.perf_counter() - start) / TURNS
+
+
+def main() -> None:
+    agent = socratic_agent.SocraticAgent()
+    states = sessions()
+    size = len(agent._build_system_prompt(states[0]).encode("utf-8"))
+    rebuilt = per_turn(agent._build_system_prompt, states, clear=True)
+    cached = per_turn(agent._build_system_prompt, states, clear=False)
+    print(f"prompt size: {size} bytes, {TURNS} turns over {len(states)} stories")
+    print(f"rebuilt  {rebuilt * 1e6:6.2f} µs/turn")
+    print(f"cached   {cached * 1e6:6.2f} µs/turn  ({rebuilt / cached:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
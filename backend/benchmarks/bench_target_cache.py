@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Prepared-target cache benchmark: one MOCK_STORIES line read 10,000 times.
+
+Compares evaluate_reading() with the cache cleared before every call (the
+target is re-normalised and re-derived each time) against the warm cache.
+
+Usage:
+    cd backend && python benchmarks/bench_target_cache.py [--reads 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes.stories import MOCK_STORIES  # noqa: E402
+from app.services.stt_service import (  # noqa: E402
+    clear_target_cache,
+    evaluate_reading,
+    target_cache_info,
+)
+from bench_reading_batch import simulate_stt  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reads", type=int, default=10_000)
+    args = parser.parse_args()
+
+    target = MOCK_STORIES[0]["content"][0]
+    rng = random.Random(42)
+    readings = [simulate_stt(target, rng) for _ in range(args.reads)]
+
+    start = time.perf_counter()
+    for stt in readings:
+        clear_target_cache()
+        evaluate_reading(stt, target)
+    cold = time.perf_counter() - start
+
+    clear_target_cache()
+    start = time.perf_counter()
+    for stt in readings:
+        evaluate_reading(stt, target)
+    warm = time.perf_counter() - start
+
+    print(f"target: {target}")
+    print(f"uncached: {cold * 1e6 / args.reads:7.2f} us/read")
+    print(f"cached:   {warm * 1e6 / args.reads:7.2f} us/read   ({cold / warm:.2f}x)")
+    print(f"cache:    {target_cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+In-process fakes shared by the backend tests.
+"""
+import asyncio
+import fnmatch
+import time
+from types import SimpleNamespace
+
+from google.genai import errors as genai_errors
+from redis.exceptions import WatchError
+
+from app.services.rate_limiter import _SLIDING_WINDOW_LUA, sliding_window_step
+
+
+def cache_not_found(name: str) -> genai_errors.ClientError:
+    """What Gemini answers a request referencing an expired or deleted cache."""
+    message = f"CachedContent not found (or permission denied): {name}"
+    return genai_errors.ClientError(403, {"error": {"code": 403, "message": message, "status": "PERMISSION_DENIED"}})
+
+
+class FakeCaches:
+    """Stands in for client.aio.caches (explicit context caching)."""
+
+    def __init__(self):
+        self.entries: dict[str, str] = {}    # name -> cached system instruction
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+
+    async def create(self, model, config):
+        self.created += 1
+        name = f"cachedContents/{self.created}"
+        self.entries[name] = config.system_instruction
+        return SimpleNamespace(
+            name=name, usage_metadata=SimpleNamespace(total_token_count=self.tokens(name))
+        )
+
+    async def update(self, name, config):
+        self.updated += 1
+        if name not in self.entries:
+            raise RuntimeError(f"404 {name} not found")
+
+    async def delete(self, name):
+        self.deleted += 1
+        self.entries.pop(name, None)
+
+    def tokens(self, name: str) -> int:
+        return len(self.entries[name])       # ~1 token per Chinese character
+
+
+class FakeClient:
+    """
+    Stands in for genai.Client. Both the sync and the async generate_content
+    take `delay` seconds; the sync one blocks the thread like the real SDK.
+    Async calls are recorded in `requests`; with context_caching=False the
+    client has no caches API. A streamed response is `text` cut into
+    `stream_chunks` pieces spread over `delay`; `fail_after` chunks, the
+    stream breaks off. While `error` is set, async calls raise it after
+    `delay` (a model outage).
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.01,
+        text: str = '{"ok": true}',
+        context_caching: bool = True,
+        stream_chunks: int = 8,
+    ):
+        self.delay = delay
+        self.text = text
+        self.stream_chunks = stream_chunks
+        self.fail_after: int | None = None
+        self.error: Exception | None = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.requests: list[dict] = []
+        self.closed = False
+        self.caches = FakeCaches() if context_caching else None
+        self.models = SimpleNamespace(generate_content=self._generate_content_sync)
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(
+                generate_content=self._generate_content,
+                generate_content_stream=self._generate_content_stream,
+            ),
+            aclose=self._aclose,
+        )
+        if context_caching:
+            self.aio.caches = self.caches
+
+    def _generate_content_sync(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return SimpleNamespace(text=self.text)
+
+    async def _generate_content(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            cached = getattr(kwargs.get("config"), "cached_content", None)
+            if cached is None:
+                return SimpleNamespace(text=self.text, usage_metadata=None)
+            if self.caches is None or cached not in self.caches.entries:
+                raise cache_not_found(cached)
+            usage = SimpleNamespace(cached_content_token_count=self.caches.tokens(cached))
+            return SimpleNamespace(text=self.text, usage_metadata=usage)
+        finally:
+            self.in_flight -= 1
+
+    async def _generate_content_stream(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        if self.error is not None:
+            await asyncio.sleep(self.delay)
+            raise self.error
+        cached = getattr(kwargs.get("config"), "cached_content", None)
+        if cached is not None and (self.caches is None or cached not in self.caches.entries):
+            raise cache_not_found(cached)
+        size = -(-len(self.text) // self.stream_chunks)
+        pieces = [self.text[i:i + size] for i in range(0, len(self.text), size)]
+
+        async def chunks():
+            for n, piece in enumerate(pieces):
+                if n == self.fail_after:
+                    raise RuntimeError("stream interrupted")
+                await asyncio.sleep(self.delay / len(pieces))
+                yield SimpleNamespace(text=piece, usage_metadata=None)
+
+        return chunks()
+
+    async def _aclose(self):
+        self.closed = True
+
+
+class FakeRedis:
+    """The subset of redis.asyncio.Redis used by the app, kept in a dict."""
+
+    def __init__(self):
+        self.data: dict[str, object] = {}
+        self.ttls: dict[str, int] = {}
+        self.expires_at: dict[str, float] = {}
+        self.revisions: dict[str, int] = {}   # bumped on every write (for WATCH)
+        self.closed = False
+
+    def _touch(self, name):
+        self.revisions[name] = self.revisions.get(name, 0) + 1
+
+    def _live(self, name):
+        if name in self.expires_at and self.expires_at[name] <= time.time():
+            self.data.pop(name, None)
+            self.expires_at.pop(name, None)
+            self._touch(name)
+        return self.data.get(name)
+
+    async def get(self, name):
+        value = self._live(name)
+        return value if value is None or isinstance(value, bytes) else None
+
+    async def getex(self, name, ex=None):
+        value = await self.get(name)
+        if value is not None and ex is not None:
+            self.expires_at[name] = time.time() + ex
+        return value
+
+    async def set(self, name, value, ex=None, exat=None):
+        self.data[name] = value.encode() if isinstance(value, str) else value
+        self.expires_at.pop(name, None)
+        if ex is not None:
+            self.expires_at[name] = time.time() + ex
+        if exat is not None:
+            self.expires_at[name] = exat
+        self._touch(name)
+        return True
+
+    async def lrange(self, name, start, end):
+        items = self._live(name) or []
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    async def rpush(self, name, *values):
+        items = self.data.setdefault(name, [])
+        items.extend(v.encode() if isinstance(v, str) else v for v in values)
+        self._touch(name)
+        return len(items)
+
+    async def ltrim(self, name, start, end):
+        items = self.data.get(name, [])
+        self.data[name] = items[start:] if end == -1 else items[start:end + 1]
+        self._touch(name)
+        return True
+
+    async def zadd(self, name, mapping):
+        zset = self.data.setdefault(name, {})
+        added = sum(member not in zset for member in mapping)
+        zset.update(mapping)
+        self._touch(name)
+        return added
+
+    async def zremrangebyscore(self, name, min_score, max_score):
+        zset = self._live(name) or {}
+        doomed = [m for m, score in zset.items() if min_score <= score <= max_score]
+        for member in doomed:
+            del zset[member]
+        self._touch(name)
+        return len(doomed)
+
+    async def zcard(self, name):
+        return len(self._live(name) or {})
+
+    async def expire(self, name, seconds):
+        if self._live(name) is None:
+            return False
+        self.ttls[name] = seconds
+        self.expires_at[name] = time.time() + seconds
+        return True
+
+    async def delete(self, *names):
+        removed = 0
+        for name in names:
+            removed += self.data.pop(name, None) is not None
+            self.ttls.pop(name, None)
+            self.expires_at.pop(name, None)
+            self._touch(name)
+        return removed
+
+    async def scan_iter(self, match="*"):
+        for name in list(self.data):
+            if fnmatch.fnmatchcase(name, match):
+                yield name
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        """Lua is not interpreted: known scripts map to a Python port below."""
+        handler = _SCRIPTS[script]
+
+        async def run(keys=(), args=()):
+            return handler(self, list(keys), list(args))
+
+        return run
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakePipeline:
+    """
+    Queues commands and runs them in order on execute(). After watch() and
+    until multi() commands run immediately, like redis-py; execute() raises
+    WatchError if a watched key was written in between.
+    """
+
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self._commands: list = []
+        self._watched: dict[str, int] = {}
+        self._immediate = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands.clear()
+        self._watched.clear()
+
+    async def watch(self, *names):
+        self._watched.update({n: self._redis.revisions.get(n, 0) for n in names})
+        self._immediate = True
+
+    def multi(self):
+        self._immediate = False
+
+    def __getattr__(self, name):
+        method = getattr(self._redis, name)
+
+        def queue(*args, **kwargs):
+            if self._immediate:
+                return method(*args, **kwargs)
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        changed = any(self._redis.revisions.get(n, 0) != rev for n, rev in self._watched.items())
+        self._watched.clear()
+        if changed:
+            self._commands.clear()
+            raise WatchError("Watched variable changed.")
+        results = [await method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands.clear()
+        return results
+
+
+def _sliding_window_script(redis: FakeRedis, keys, args):
+    key = keys[0]
+    limit, window, now = int(args[0]), float(args[1]), float(args[2])
+    data = redis._live(key)
+    state = (data["w"], data["p"], data["c"]) if data else None
+    allowed, (w, p, c) = sliding_window_step(state, now, limit, window)
+    if allowed:
+        redis.data[key] = {"w": w, "p": p, "c": c}
+        redis.expires_at[key] = time.time() + window * 2
+        redis._touch(key)
+    return int(allowed)
+
+
+_SCRIPTS = {_SLIDING_WINDOW_LUA: _sliding_window_script}
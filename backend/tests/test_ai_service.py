@@ -0,0 +1,105 @@
+"""
+Tests for backend/app/services/ai_service.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import time
+
+import httpx
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.main import app
+from app.services import ai_service
+from tests.fakes import FakeClient
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr(settings, "gemini_max_concurrency", 3)
+    client = FakeClient()
+    ai_service.init_client(client)
+    yield client
+    asyncio.run(ai_service.close_client())
+
+
+# ---------------------------------------------------------------------------
+# Shared client lifecycle
+# ---------------------------------------------------------------------------
+
+def test_get_client_returns_installed_client(fake_client):
+    assert ai_service.get_client() is fake_client
+
+
+def test_close_client_closes_and_forgets_client():
+    client = FakeClient()
+    ai_service.init_client(client)
+    asyncio.run(ai_service.close_client())
+    assert client.closed
+    assert ai_service._client is None
+
+
+# ---------------------------------------------------------------------------
+# generate_structured_response
+# ---------------------------------------------------------------------------
+
+def test_generate_structured_response_parses_json(fake_client):
+    fake_client.text = '{"understood": true}'
+    result = asyncio.run(ai_service.generate_structured_response("sys", [], {}))
+    assert result == {"understood": True}
+
+
+def test_generate_structured_response_bounded_by_semaphore(fake_client):
+    async def burst():
+        return await asyncio.gather(
+            *(ai_service.generate_structured_response("sys", [], {}) for _ in range(10))
+        )
+
+    results = asyncio.run(burst())
+    assert len(results) == 10
+    assert fake_client.calls == 10
+    assert fake_client.max_in_flight == 3
+
+
+# ---------------------------------------------------------------------------
+# generate_socratic_question (POST /api/comprehension/question)
+# ---------------------------------------------------------------------------
+
+def test_generate_socratic_question_strips_text(fake_client):
+    fake_client.text = "  農夫為什麼要拔禾苗？\n"
+    question = asyncio.run(ai_service.generate_socratic_question("揠苗助長", "農夫拔禾苗。", []))
+    assert question == "農夫為什麼要拔禾苗？"
+
+
+def test_comprehension_question_does_not_block_event_loop(monkeypatch):
+    """50 concurrent requests against a slow model take about one call's latency, not 50x."""
+    latency = 0.2
+    monkeypatch.setattr(settings, "gemini_max_concurrency", 64)
+    client = FakeClient(delay=latency, text="農夫為什麼要拔禾苗？")
+    ai_service.init_client(client)
+    payload = {"story_title": "揠苗助長", "story_text": "農夫拔禾苗。", "conversation": []}
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            start = time.perf_counter()
+            responses = await asyncio.gather(
+                *(http.post("/api/comprehension/question", json=payload) for _ in range(50))
+            )
+            return time.perf_counter() - start, responses
+
+    try:
+        wall, responses = asyncio.run(burst())
+    finally:
+        asyncio.run(ai_service.close_client())
+
+    assert all(r.status_code == 200 for r in responses)
+    assert {r.json()["question"] for r in responses} == {"農夫為什麼要拔禾苗？"}
+    assert client.max_in_flight == 50
+    assert wall < latency * 5       # blocking calls would take ~50 × latency
@@ -0,0 +1,147 @@
+"""
+Tests for backend/app/services/alignment.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import random
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.alignment import (
+    ENGINES,
+    IncrementalAligner,
+    align,
+    align_banded,
+    align_full,
+    edit_distance,
+)
+from app.services.stt_service import correct_homophones
+
+_ALPHABET = "和禾河大小的地得是時十農夫天田"
+
+
+def _noisy_pair(rng: random.Random, size: int) -> tuple[str, str]:
+    target = "".join(rng.choice(_ALPHABET) for _ in range(size))
+    stt = list(target)
+    for _ in range(rng.randint(0, max(1, size // 4))):
+        r = rng.random()
+        if stt and r < 0.33:
+            del stt[rng.randrange(len(stt))]
+        elif r < 0.66:
+            stt.insert(rng.randint(0, len(stt)), rng.choice(_ALPHABET))
+        elif stt:
+            stt[rng.randrange(len(stt))] = rng.choice(_ALPHABET)
+    return "".join(stt), target
+
+
+def _reference_distance(s: str, t: str) -> int:
+    prev = list(range(len(t) + 1))
+    for i in range(1, len(s) + 1):
+        cur = [i] + [0] * len(t)
+        for j in range(1, len(t) + 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (s[i - 1] != t[j - 1]))
+        prev = cur
+    return prev[-1]
+
+
+# ---------------------------------------------------------------------------
+# Engines agree with the reference backtrace
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_engines_match_full_alignment(engine):
+    rng = random.Random(7)
+    for size in (1, 5, 40, 150):   # 150 > leaf size exercises the divide-and-conquer path
+        for _ in range(40):
+            stt, target = _noisy_pair(rng, size)
+            if not stt:
+                continue
+            assert ENGINES[engine](stt, target) == align_full(stt, target)
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_engines_give_identical_corrections(engine):
+    rng = random.Random(11)
+    for _ in range(100):
+        stt, target = _noisy_pair(rng, rng.randint(0, 80))
+        assert correct_homophones(stt, target, engine) == correct_homophones(stt, target, "full")
+
+
+def test_banded_budget_grows_until_exact():
+    """A budget far smaller than the real distance must still give the exact path."""
+    stt = "大小大小大小大小大小大小"
+    target = "農夫天田農夫天田"
+    assert align_banded(stt, target, budget=1) == align_full(stt, target)
+
+
+def test_unstripped_align_is_the_reference_pairing():
+    rng = random.Random(13)
+    for _ in range(300):
+        stt, target = _noisy_pair(rng, rng.randint(1, 30))
+        if stt:
+            assert align(stt, target, strip=False) == align_full(stt, target)
+    # Stripping the common prefix pairs the first 衣 differently, same cost.
+    assert align("衣衣十得", "衣我是") != align_full("衣衣十得", "衣我是")
+    assert align("衣衣十得", "衣我是", strip=False) == align_full("衣衣十得", "衣我是")
+
+
+def test_alignment_marks_gaps():
+    # 禾 is extra in STT, 田 is missing from STT
+    assert align("農禾夫天", "農夫天田", "full") == [(0, 0), (1, -1), (2, 1), (3, 2), (-1, 3)]
+
+
+def test_align_empty_inputs():
+    assert align("", "ab") == [(-1, 0), (-1, 1)]
+    assert align("ab", "") == [(0, -1), (1, -1)]
+
+
+def test_align_unknown_engine():
+    with pytest.raises(ValueError):
+        align("a", "b", "quantum")
+
+
+# ---------------------------------------------------------------------------
+# edit_distance (bit-parallel)
+# ---------------------------------------------------------------------------
+
+def test_edit_distance_matches_reference():
+    rng = random.Random(3)
+    for _ in range(200):
+        a = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 120)))
+        b = "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 120)))
+        assert edit_distance(a, b) == _reference_distance(a, b)
+
+
+def test_edit_distance_empty():
+    assert edit_distance("", "農夫") == 2
+    assert edit_distance("農夫", "") == 2
+
+
+# ---------------------------------------------------------------------------
+# IncrementalAligner
+# ---------------------------------------------------------------------------
+
+def test_incremental_aligner_matches_full_alignment():
+    rng = random.Random(5)
+    for _ in range(30):
+        stt, target = _noisy_pair(rng, 60)
+        aligner = IncrementalAligner(target)
+        for k in range(0, len(stt), 7):
+            aligner.extend(stt[k:k + 7])
+        assert aligner.distance() == edit_distance(stt, target)
+        if stt:
+            assert aligner.alignment() == align_full(stt, target)
+
+
+def test_incremental_aligner_truncate():
+    aligner = IncrementalAligner("農夫天田")
+    aligner.extend("農夫大小")
+    aligner.truncate(2)
+    aligner.extend("天田")
+    assert len(aligner) == 4
+    assert aligner.distance() == 0
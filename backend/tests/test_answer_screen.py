@@ -0,0 +1,171 @@
+"""
+Tests for backend/app/services/answer_screen.py and its use by SocraticAgent
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.answer_screen import OFF_TOPIC, PERFUNCTORY, hint_feedback, hint_paragraph, screen_answer
+from app.services.metrics import metrics
+from app.services.session_store import MemorySessionStore
+from app.services.socratic_agent import SocraticAgent
+from app.services.story_table import story_table
+from tests.fakes import FakeClient
+
+EVAL_SUITE = Path(__file__).resolve().parents[2] / "tests" / "agent-eval" / "socratic-eval.json"
+YUSHAN = json.loads(EVAL_SUITE.read_text(encoding="utf-8"))["setup"]
+STORY = story_table.intern(YUSHAN["story_title"], YUSHAN["story_text"])
+
+
+# ---------------------------------------------------------------------------
+# screen_answer
+# ---------------------------------------------------------------------------
+
+HEIGHT = "課文提到玉山的高度，請問玉山大約有多高呢？"      # open question
+YES_NO = "玉山的山頂冬天會覆蓋白雪嗎？"
+A_NOT_A = "玉山有沒有特有的植物？"
+CHOICE = "你覺得保護山林的人是開心還是難過？"
+FEELING = "看到玉山的白雪，你有什麼感覺？"
+
+
+@pytest.mark.parametrize("answer, question, kind", [
+    ("不知道", HEIGHT, PERFUNCTORY),
+    ("我不知道啦", HEIGHT, PERFUNCTORY),
+    ("隨便。", HEIGHT, PERFUNCTORY),
+    ("嗯", HEIGHT, PERFUNCTORY),
+    ("哈哈", HEIGHT, PERFUNCTORY),
+    ("？？？", HEIGHT, PERFUNCTORY),
+    ("PASS", HEIGHT, PERFUNCTORY),
+    ("不知道", YES_NO, PERFUNCTORY),          # never an answer, whatever the question
+    ("沒有", HEIGHT, PERFUNCTORY),            # a refusal after an open question ...
+    ("我不想", HEIGHT, PERFUNCTORY),
+    ("好", HEIGHT, OFF_TOPIC),
+    ("貓狗", HEIGHT, OFF_TOPIC),
+    ("高山", HEIGHT, None),                   # too vague, but about the story: the model judges it
+    ("四百", HEIGHT, None),
+    ("400", HEIGHT, None),
+    ("12", HEIGHT, None),                     # a number is an attempt
+    ("三", HEIGHT, None),
+    ("玉山在日本", HEIGHT, None),
+    ("不知道玉山多高", HEIGHT, None),
+])
+def test_screen_answer(answer, question, kind):
+    assert screen_answer(answer, STORY, question) == kind
+
+
+@pytest.mark.parametrize("answer, question", [
+    ("沒有", A_NOT_A),                        # ... but a plain "no" to a yes/no question
+    ("不會", YES_NO),
+    ("對", YES_NO),
+    ("好", YES_NO),
+    ("是", A_NOT_A),
+    ("難過", CHOICE),
+    ("開心", CHOICE),
+    ("笨", "你覺得農夫是聰明還是笨？"),
+    ("難過", FEELING),                        # the student's own view
+    ("黑熊", "課文外，玉山還住著哪一種熊？"),     # shares a character with the question
+    ("生氣", ""),                             # question unknown: only never-valid answers are screened
+    ("沒有", ""),
+])
+def test_short_answers_that_may_be_right_reach_the_model(answer, question):
+    assert screen_answer(answer, STORY, question) is None
+
+
+def test_screened_eval_cases_are_all_expected_not_understood():
+    cases = json.loads(EVAL_SUITE.read_text(encoding="utf-8"))["cases"]
+    screened = [c for c in cases if screen_answer(c["input"], STORY, HEIGHT) is not None]
+    assert screened
+    assert all(c["expected_understood"] is False for c in screened)
+
+
+def test_hint_points_at_the_paragraph_the_question_is_about():
+    assert hint_paragraph(STORY, "課文提到玉山的高度，請問玉山大約有多高呢？") == 0
+    assert hint_paragraph(STORY, "在玉山可以看到什麼特有的植物？") == 1
+    feedback = hint_feedback(PERFUNCTORY, STORY, 1)
+    assert "第1段" in feedback and "玉山擁有豐富的生態環境" in feedback
+    assert "保護這片美麗的山林" not in hint_feedback(PERFUNCTORY, STORY, 1, again=True)
+
+
+# ---------------------------------------------------------------------------
+# SocraticAgent
+# ---------------------------------------------------------------------------
+
+OPENING = json.dumps(
+    {"understood": False, "feedback": "", "question": "玉山擁有什麼樣的植物？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(settings, "context_cache_enabled", False)
+    monkeypatch.setattr(agent_module, "_store", MemorySessionStore())
+    metrics.reset()
+    yield SocraticAgent()
+    asyncio.run(ai_service.close_client())
+
+
+def test_non_answers_are_evaluated_without_the_model(agent):
+    client = FakeClient(text=OPENING)
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", YUSHAN["story_title"], YUSHAN["story_text"])
+        calls = client.calls
+        first = await agent.process_answer("s1", "不知道")
+        second = await agent.process_answer("s1", "隨便啦")
+        return first, second, client.calls - calls, await agent_module._store.get("s1")
+
+    first, second, model_calls, state = asyncio.run(run())
+    assert model_calls == 0
+    assert first.understood is False and first.referenced_paragraph == 1
+    assert "第1段" in first.feedback and first.question == "玉山擁有什麼樣的植物？"
+    assert second.feedback != first.feedback                  # narrower hint the second time
+    assert state.total_attempts == 2 and state.understood_count == 0
+    assert metrics.get("answer_screen.perfunctory") == 2
+    assert metrics.get("socratic.route.local.calls") == 2
+
+
+def test_streamed_non_answer_yields_the_hint(agent):
+    client = FakeClient(text=OPENING)
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", YUSHAN["story_title"], YUSHAN["story_text"])
+        calls = client.calls
+        events = [event async for event in await agent.stream_answer("s1", "嗯")]
+        return events, client.calls - calls
+
+    events, model_calls = asyncio.run(run())
+    assert model_calls == 0
+    assert [kind for kind, _ in events] == ["feedback", "question", "result"]
+    assert events[0][1] == events[-1][1].feedback
+
+
+def test_short_answer_to_a_yes_no_question_goes_to_the_model(agent):
+    opening = json.dumps(
+        {"understood": False, "feedback": "", "question": A_NOT_A, "phase": "factual"}, ensure_ascii=False
+    )
+    client = FakeClient(text=opening)
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", YUSHAN["story_title"], YUSHAN["story_text"])
+        calls = client.calls
+        await agent.process_answer("s1", "沒有")
+        return client.calls - calls
+
+    assert asyncio.run(run()) == 1
+    assert metrics.get("answer_screen.perfunctory") == 0
@@ -0,0 +1,105 @@
+"""
+Tests for backend/app/services/character_error_service.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import migrate
+from app.models import Base, CharacterError
+from app.services.character_error_service import record_reading, save_character_errors
+from app.services.stt_service import extract_character_errors
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements: list[tuple[str, bool]] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _log(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, executemany))
+
+    with Session(engine) as session:
+        session.statements = statements
+        yield session
+
+
+def _inserts(db) -> list[tuple[str, bool]]:
+    return [s for s in db.statements if s[0].startswith("INSERT INTO character_errors")]
+
+
+# ---------------------------------------------------------------------------
+# save_character_errors
+# ---------------------------------------------------------------------------
+
+def test_save_character_errors_single_executemany(db):
+    errors = extract_character_errors("農大每天田裡和苗長高了啊", "農夫每天去田裡，禾苗長高了。")
+    assert save_character_errors(db, 1, errors) == 4
+    inserts = _inserts(db)
+    assert len(inserts) == 1
+    assert inserts[0][1] is True
+
+    rows = db.scalars(select(CharacterError).order_by(CharacterError.id)).all()
+    assert [(r.error_type, r.character, r.spoken, r.position) for r in rows] == [
+        ("substitution", "夫", "大", 1),
+        ("omission", "去", None, 4),
+        ("homophone", "禾", "和", 7),
+        ("insertion", "啊", "啊", 12),
+    ]
+    assert {r.session_id for r in rows} == {1}
+
+
+def test_save_character_errors_nothing_to_write(db):
+    assert save_character_errors(db, 1, []) == 0
+    assert _inserts(db) == []
+
+
+# ---------------------------------------------------------------------------
+# record_reading
+# ---------------------------------------------------------------------------
+
+def test_record_reading_persists_and_returns_result(db):
+    result = record_reading(db, 7, "農夫每天去田裡看和苗", "農夫每天去田裡看禾苗。")
+    assert result["corrected"] == "農夫每天去田裡看禾苗"
+    assert result["tier"] == 1
+    rows = db.scalars(select(CharacterError)).all()
+    assert [(r.session_id, r.error_type, r.character) for r in rows] == [(7, "homophone", "禾")]
+
+
+# ---------------------------------------------------------------------------
+# database.migrate (position / spoken added to an existing table)
+# ---------------------------------------------------------------------------
+
+def test_migrate_adds_missing_character_error_columns():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE character_errors (id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL, "
+            "character VARCHAR(4) NOT NULL, error_type VARCHAR(50) NOT NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO character_errors (session_id, character, error_type) VALUES (1, '禾', 'homophone')"
+        ))
+
+    assert migrate(engine) == ["character_errors.position", "character_errors.spoken"]
+    assert migrate(engine) == []
+
+    with Session(engine) as session:
+        save_character_errors(session, 2, extract_character_errors("農大", "農夫"))
+        session.commit()
+        rows = session.scalars(select(CharacterError).order_by(CharacterError.id)).all()
+    assert [(r.character, r.spoken, r.position) for r in rows] == [("禾", None, None), ("夫", "大", 1)]
+
+
+def test_migrate_skips_tables_that_do_not_exist():
+    assert migrate(create_engine("sqlite://")) == []
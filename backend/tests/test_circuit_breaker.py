@@ -0,0 +1,204 @@
+"""
+Tests for backend/app/services/circuit_breaker.py and its use by ai_service
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+import random
+import time
+
+import pytest
+from google.genai import errors as genai_errors
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryBudget,
+    backoff_delay,
+)
+from app.services.metrics import metrics
+from app.services.session_store import MemorySessionStore
+from app.services.socratic_agent import SocraticAgent
+from tests.fakes import FakeClient
+
+OUTAGE = genai_errors.ServerError(503, {"error": {"code": 503, "message": "overloaded", "status": "UNAVAILABLE"}})
+BAD_REQUEST = genai_errors.ClientError(400, {"error": {"code": 400, "message": "bad", "status": "INVALID_ARGUMENT"}})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ---------------------------------------------------------------------------
+# CircuitBreaker / RetryBudget / backoff_delay
+# ---------------------------------------------------------------------------
+
+def test_breaker_opens_after_consecutive_failures_and_probes_after_timeout():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(2):
+        breaker.check()
+        breaker.record_failure()
+    breaker.record_success()                              # not consecutive: stays closed
+    for _ in range(3):
+        breaker.check()
+        breaker.record_failure()
+    assert breaker.state == OPEN and breaker.trips == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    breaker.check()                                       # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.check()                                   # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.trips == 2
+
+    clock.now = 20
+    breaker.check()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.check()
+
+
+def test_retry_budget_is_a_fraction_of_first_attempts_plus_a_floor():
+    clock = Clock()
+    budget = RetryBudget(ratio=0.5, min_per_second=0.1, burst=2, clock=clock)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    clock.now = 10                                        # one retry's worth of floor
+    assert budget.withdraw()
+    clock.now = 1000
+    assert budget.tokens == 2                             # capped at burst
+
+
+def test_backoff_is_jittered_and_capped():
+    rng = random.Random(1)
+    delays = [backoff_delay(1, base=1.0, cap=8.0, rng=rng) for _ in range(200)]
+    assert all(0 <= d <= 2.0 for d in delays)
+    assert len({round(d, 3) for d in delays}) > 100       # workers don't retry in lockstep
+    assert max(backoff_delay(10, base=1.0, cap=8.0, rng=rng) for _ in range(200)) <= 8.0
+
+
+# ---------------------------------------------------------------------------
+# ai_service / SocraticAgent against a failing model
+# ---------------------------------------------------------------------------
+
+EVALUATION = json.dumps(
+    {"understood": True, "feedback": "很好！", "question": "農夫為什麼要拔禾苗？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(settings, "context_cache_enabled", False)
+    monkeypatch.setattr(settings, "gemini_breaker_failure_threshold", 3)
+    monkeypatch.setattr(ai_service, "RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(agent_module, "_store", MemorySessionStore())
+    metrics.reset()
+    client = FakeClient(delay=0.001, text=EVALUATION)
+    yield client
+    asyncio.run(ai_service.close_client())
+
+
+def _call() -> dict:
+    return ai_service.generate_structured_response("system", [], {"type": "object"})
+
+
+def test_outage_opens_the_circuit_and_calls_fail_fast(client):
+    client.error = OUTAGE
+
+    async def run():
+        ai_service.init_client(client)
+        with pytest.raises(genai_errors.ServerError):
+            await _call()                                 # 3 attempts, then the circuit opens
+        calls = client.calls
+        start = time.perf_counter()
+        with pytest.raises(CircuitOpenError):
+            await _call()
+        return client.calls - calls, time.perf_counter() - start
+
+    extra_calls, elapsed = asyncio.run(run())
+    assert client.calls == 3 and extra_calls == 0
+    assert elapsed < 0.01
+    assert metrics.get("gemini.breaker.trips") == 1
+    assert metrics.get("gemini.breaker.rejected") == 1
+    assert metrics.snapshot()["gemini.breaker.state"] == 2
+
+
+def test_rejected_requests_do_not_trip_the_circuit(client):
+    client.error = BAD_REQUEST
+
+    async def run():
+        ai_service.init_client(client)
+        for _ in range(3):
+            with pytest.raises(genai_errors.ClientError):
+                await _call()
+        return ai_service._breaker.state
+
+    assert asyncio.run(run()) == CLOSED
+
+
+def test_spent_retry_budget_stops_retrying(client, monkeypatch):
+    monkeypatch.setattr(settings, "gemini_breaker_failure_threshold", 100)
+    client.error = OUTAGE
+
+    async def run():
+        ai_service.init_client(client)
+        ai_service._retry_budget = RetryBudget(ratio=0, min_per_second=0, burst=2)
+        for _ in range(3):
+            with pytest.raises(genai_errors.ServerError):
+                await _call()
+
+    asyncio.run(run())
+    assert client.calls == 3 + 1 + 1                      # 2 retries, then first attempts only
+    assert metrics.get("gemini.retries") == 2
+    assert metrics.get("gemini.retries_denied") == 2
+
+
+def test_agent_serves_the_fallback_question_while_the_circuit_is_open(client):
+    agent = SocraticAgent()
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "揠苗助長", "農夫拔禾苗。")
+        client.error = OUTAGE
+        await agent.process_answer("s1", "農夫把禾苗拔高")   # trips the circuit
+        calls = client.calls
+        start = time.perf_counter()
+        response = await agent.process_answer("s1", "禾苗都枯死了")
+        elapsed = time.perf_counter() - start
+
+        client.error = None
+        ai_service._breaker.clock = lambda: time.monotonic() + settings.gemini_breaker_reset_seconds
+        recovered = await agent.process_answer("s1", "農夫想讓禾苗長快一點")
+        return response, client.calls - calls, elapsed, recovered
+
+    response, calls, elapsed, recovered = asyncio.run(run())
+    assert calls == 1                                     # only the recovery probe
+    assert elapsed < 0.05
+    assert response.understood is False and response.question
+    assert recovered.understood is True
+    assert ai_service._breaker.state == CLOSED
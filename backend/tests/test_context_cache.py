@@ -0,0 +1,287 @@
+"""
+Tests for backend/app/services/context_cache.py and its use by ai_service
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.context_cache import CacheableContext, ContextCacheRegistry
+from app.services.metrics import metrics
+from app.services.session_store import MemorySessionStore
+from app.services.socratic_agent import SocraticAgent
+from tests.fakes import FakeCaches, FakeClient, cache_not_found
+
+PREFIX = "課文：農夫拔禾苗。" * 10
+TTL = 1800
+
+
+class FakeProvider:
+    """ContextCacheProvider on top of FakeCaches, without a client."""
+
+    def __init__(self, fail: bool = False):
+        self.caches = FakeCaches()
+        self.fail = fail
+        self.extended: list[str] = []
+
+    async def create(self, prefix, ttl):
+        if self.fail:
+            raise RuntimeError("400 cached content is too small")
+        cached = await self.caches.create("m", type("C", (), {"system_instruction": prefix}))
+        return cached.name, cached.usage_metadata.total_token_count
+
+    async def extend(self, name, ttl):
+        self.extended.append(name)
+
+    async def delete(self, name):
+        await self.caches.delete(name)
+
+
+async def _settle():
+    """Let background create / extend / delete tasks finish."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+# ---------------------------------------------------------------------------
+# ContextCacheRegistry
+# ---------------------------------------------------------------------------
+
+def test_handle_is_created_once_and_shared():
+    provider = FakeProvider()
+    registry = ContextCacheRegistry(provider, TTL)
+
+    async def run():
+        assert registry.handle(PREFIX, "s1", now=0) is None       # creating in the background
+        assert registry.handle(PREFIX, "s2", now=0) is None
+        await _settle()
+        return registry.handle(PREFIX, "s1", now=1), registry.handle(PREFIX, "s2", now=1)
+
+    first, second = asyncio.run(run())
+    assert first == second == "cachedContents/1"
+    assert provider.caches.created == 1
+    assert len(registry) == 1
+
+
+def test_failed_create_falls_back_and_is_not_retried_immediately():
+    provider = FakeProvider(fail=True)
+    registry = ContextCacheRegistry(provider, TTL)
+
+    async def run():
+        registry.handle(PREFIX, "s1")
+        await _settle()
+        return registry.handle(PREFIX, "s1")
+
+    assert asyncio.run(run()) is None
+    assert len(registry) == 0
+
+
+def test_cache_is_deleted_when_last_session_releases_it():
+    provider = FakeProvider()
+    registry = ContextCacheRegistry(provider, TTL)
+
+    async def run():
+        registry.handle(PREFIX, "s1", now=0)
+        await _settle()
+        registry.handle(PREFIX, "s2", now=1)
+        registry.release(PREFIX, "s1")
+        assert provider.caches.entries
+        registry.release(PREFIX, "s2")
+        await _settle()
+
+    asyncio.run(run())
+    assert provider.caches.entries == {}
+    assert len(registry) == 0
+
+
+def test_references_lapse_with_the_session_ttl():
+    provider = FakeProvider()
+    registry = ContextCacheRegistry(provider, TTL)
+
+    async def run():
+        registry.handle(PREFIX, "s1", now=0)
+        await _settle()
+        registry.sweep(now=TTL - 1)
+        assert provider.caches.entries                          # session may still come back
+        registry.sweep(now=TTL + 1)
+        await _settle()
+
+    asyncio.run(run())
+    assert provider.caches.entries == {}
+
+
+def test_provider_expiry_is_extended_past_the_last_use():
+    provider = FakeProvider()
+    registry = ContextCacheRegistry(provider, TTL)
+
+    async def run():
+        registry.handle(PREFIX, "s1")
+        await _settle()
+        entry = next(iter(registry._entries.values()))
+        entry.expires_at -= registry.EXTEND_SLACK + 1          # less than TTL left
+        assert registry.handle(PREFIX, "s1") is not None
+        await _settle()
+        return entry
+
+    entry = asyncio.run(run())
+    assert provider.extended == ["cachedContents/1"]
+    assert entry.expires_at >= entry.refs["s1"] + TTL
+
+
+# ---------------------------------------------------------------------------
+# SocraticAgent / ai_service
+# ---------------------------------------------------------------------------
+
+EVALUATION = json.dumps(
+    {"understood": True, "feedback": "很好！", "question": "農夫為什麼要拔禾苗？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(settings, "context_cache_enabled", True)
+    monkeypatch.setattr(ai_service, "RETRY_BASE_DELAY", 0)
+    monkeypatch.setattr(agent_module, "_store", MemorySessionStore())
+    metrics.reset()
+    yield SocraticAgent()
+    asyncio.run(ai_service.close_client())
+
+
+def _session(client: FakeClient, agent: SocraticAgent, answers: int = 1, setup=None):
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "揠苗助長", "農夫拔禾苗。", mispronounced_words=["禾"])
+        await _settle()                                          # cache creation in the background
+        if setup is not None:
+            setup()
+        for _ in range(answers):
+            await agent.process_answer("s1", "農夫把禾苗拔高")
+    asyncio.run(run())
+
+
+def test_answers_reference_the_cached_story_prefix(agent):
+    client = FakeClient(text=EVALUATION)
+    _session(client, agent, answers=2)
+    [cached_prefix] = client.caches.entries.values()
+    assert "農夫拔禾苗。" in cached_prefix
+    assert "讀錯的字" not in cached_prefix                      # shared by every session on the story
+
+    evaluation = client.requests[-1]
+    assert evaluation["config"].cached_content == "cachedContents/1"
+    assert evaluation["config"].system_instruction is None
+    instructions = evaluation["contents"][0].parts[0].text
+    assert "讀錯的字：禾" in instructions and "目前階段：factual" in instructions
+    assert evaluation["contents"][0].parts[1].text == "請開始提問。"
+
+    assert metrics.get("context_cache.hits") == 2
+    assert metrics.get("context_cache.tokens_saved") == 2 * len(cached_prefix)
+
+
+def test_without_caching_api_the_full_prompt_is_sent(agent):
+    client = FakeClient(text=EVALUATION, context_caching=False)
+    _session(client, agent)
+    evaluation = client.requests[-1]
+    state = asyncio.run(agent_module._store.get("s1"))
+    state.current_phase, state.understood_count = "factual", 0
+    assert evaluation["config"].system_instruction == agent._build_system_prompt(state)
+    assert evaluation["config"].cached_content is None
+    assert metrics.get("context_cache.create_failures") == 1
+    assert metrics.get("context_cache.fallbacks") == 1
+
+
+def test_rejected_handle_falls_back_to_the_full_prompt(agent):
+    client = FakeClient(text=EVALUATION)
+    _session(client, agent, setup=lambda: client.caches.entries.clear())    # expired on the server
+    response_config = client.requests[-1]["config"]
+    assert response_config.cached_content is None
+    assert "農夫拔禾苗。" in response_config.system_instruction
+    assert ai_service._context_caches.handle(
+        agent._cacheable_context(asyncio.run(agent_module._store.get("s1"))).prefix, "s1"
+    ) is None
+
+
+CONTEXT = CacheableContext(prefix=PREFIX, instructions="目前階段：factual", session_id="s1")
+OUTAGE = genai_errors.ServerError(503, {"error": {"code": 503, "message": "overloaded", "status": "UNAVAILABLE"}})
+
+
+def _cached_call(client: FakeClient, stream: bool = False):
+    """One call with CONTEXT once its cache is ready: (result or error, configs sent)."""
+    contents = [genai_types.Content(role="user", parts=[genai_types.Part(text="拔高")])]
+
+    async def run():
+        ai_service.init_client(client)
+        ai_service.warm_context_cache(CONTEXT)
+        await _settle()
+        client.requests.clear()
+        try:
+            if stream:
+                events = [e async for e in ai_service.stream_structured_response(
+                    "system", contents, {"type": "object"}, context=CONTEXT)]
+                return events[-1].value
+            return await ai_service.generate_structured_response(
+                "system", contents, {"type": "object"}, context=CONTEXT)
+        except Exception as e:
+            return e
+
+    result = asyncio.run(run())
+    return result, [request["config"] for request in client.requests]
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_only_a_rejected_handle_is_invalidated(agent, stream):
+    client = FakeClient(text=EVALUATION)
+    result, configs = _cached_call(client, stream)
+    assert result["understood"] is True
+    assert [c.cached_content for c in configs] == ["cachedContents/1"]
+
+    client = FakeClient(text=EVALUATION)
+    original = client.caches.create
+
+    async def expired(model, config):                      # deleted on the server right away
+        cached = await original(model, config)
+        client.caches.entries.clear()
+        return cached
+
+    client.caches.create = expired
+    result, configs = _cached_call(client, stream)
+    assert result["understood"] is True
+    assert [c.cached_content for c in configs] == ["cachedContents/1", None]    # not retried
+    assert configs[1].system_instruction == "system"
+    assert ai_service._context_caches.handle(PREFIX, "s1") is None
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_other_failures_keep_the_handle_and_are_not_sent_twice(agent, stream):
+    client = FakeClient(text=EVALUATION, delay=0)
+    client.error = OUTAGE
+    error, configs = _cached_call(client, stream)
+    assert error is OUTAGE
+    assert len(configs) == ai_service.MAX_RETRIES             # one retry loop, no full-prompt rerun
+    assert all(c.cached_content == "cachedContents/1" for c in configs)
+    assert ai_service._context_caches.handle(PREFIX, "s1") == "cachedContents/1"
+
+
+def test_cache_rejections_are_told_from_other_client_errors():
+    assert ai_service._cache_rejected(cache_not_found("cachedContents/1"))
+    expired = genai_errors.ClientError(
+        400, {"error": {"code": 400, "message": "Cached content is expired.", "status": "INVALID_ARGUMENT"}}
+    )
+    assert ai_service._cache_rejected(expired)
+    bad_schema = genai_errors.ClientError(
+        400, {"error": {"code": 400, "message": "Invalid JSON schema", "status": "INVALID_ARGUMENT"}}
+    )
+    assert not ai_service._cache_rejected(bad_schema)
+    assert not ai_service._cache_rejected(OUTAGE)
@@ -0,0 +1,242 @@
+"""
+Tests for backend/app/routes/learning.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import contextlib
+import json
+
+import httpx
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.main import app
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.session_store import MemorySessionStore
+from tests.fakes import FakeClient
+
+EVALUATION = {
+    "understood": True,
+    "feedback": "很好！你注意到農夫很心急，想讓禾苗快點長高。",
+    "question": "農夫把禾苗拔高以後，發生了什麼事？",
+    "phase": "factual",
+}
+START = {"session_id": "s1", "story_title": "揠苗助長", "story_text": "農夫拔禾苗。\n禾苗枯死了。"}
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(agent_module.socratic_agent, "question_bank", None)
+    monkeypatch.setattr(agent_module, "_store", MemorySessionStore())
+    client = FakeClient(text=json.dumps(EVALUATION, ensure_ascii=False), stream_chunks=12)
+    yield client
+    asyncio.run(ai_service.close_client())
+
+
+def _chat(client: FakeClient, *answers: str) -> list[httpx.Response]:
+    async def run():
+        ai_service.init_client(client)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            responses = [await http.post("/api/comprehension/chat/stream", json=START)]
+            for answer in answers:
+                responses.append(await http.post(
+                    "/api/comprehension/chat/stream", json={**START, "student_answer": answer}
+                ))
+            return responses
+
+    return asyncio.run(run())
+
+
+# ---------------------------------------------------------------------------
+# POST /api/comprehension/chat/stream
+# ---------------------------------------------------------------------------
+
+def test_chat_stream_sends_feedback_then_question_then_done(fake_client):
+    start, answer = _chat(fake_client, "農夫把禾苗拔高")
+    assert start.headers["content-type"].startswith("text/event-stream")
+    assert [kind for kind, _ in parse_sse(start.text)] == ["question", "done"]
+
+    events = parse_sse(answer.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds.count("feedback") > 1                        # streamed in pieces
+    assert kinds.index("feedback") < kinds.index("question") < kinds.index("done") == len(kinds) - 1
+    assert "".join(d["text"] for k, d in events if k == "feedback") == EVALUATION["feedback"]
+    assert "".join(d["text"] for k, d in events if k == "question") == EVALUATION["question"]
+    done = events[-1][1]
+    assert done["understood_count"] == 1
+    assert done["is_complete"] is False
+    assert done["question"] == EVALUATION["question"]
+
+
+def test_chat_stream_rejects_unknown_session_before_streaming(fake_client):
+    async def run():
+        ai_service.init_client(fake_client)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.post(
+                "/api/comprehension/chat/stream", json={**START, "student_answer": "農夫"}
+            )
+
+    response = asyncio.run(run())
+    assert response.status_code == 422
+    assert "not found" in response.json()["detail"]
+
+
+def test_chat_stream_falls_back_when_the_stream_breaks(fake_client):
+    fake_client.fail_after = 4
+    _, answer = _chat(fake_client, "農夫把禾苗拔高")
+    kind, done = parse_sse(answer.text)[-1]
+    assert kind == "done"
+    assert done["understood"] is False
+    assert done["feedback"] == "讓我再想一下，請你再回答一次好嗎？"
+    assert done["understood_count"] == 0
+
+
+def test_chat_stream_reports_ai_outage_as_error_event(fake_client):
+    fake_client.fail_after = 4
+    *_, answer = _chat(fake_client, "一", "二", "三")
+    kind, error = parse_sse(answer.text)[-1]
+    assert kind == "error"
+    assert error["status"] == 503
+
+
+
+@pytest.mark.parametrize("spec_version", ["2.3", "2.4"])
+def test_chat_stream_releases_the_session_when_the_client_disconnects(fake_client, spec_version):
+    body = json.dumps({**START, "student_answer": "農夫把禾苗拔高"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/api/comprehension/chat/stream", "raw_path": b"",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+
+    async def run():
+        ai_service.init_client(fake_client)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            await http.post("/api/comprehension/chat", json=START)
+        gone = asyncio.Event()
+        requests = iter([{"type": "http.request", "body": body, "more_body": False}])
+
+        async def receive():
+            request = next(requests, None)
+            if request is not None:
+                return request
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message["body"]:
+                gone.set()                                    # the first event arrived; hang up
+                if spec_version == "2.4":
+                    raise OSError("connection reset")
+
+        fake_client.delay, fake_client.stream_chunks = 1.0, 50   # still writing when the client goes
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(app(scope, receive, send), timeout=2)
+        return len(agent_module.socratic_agent._session_locks)
+
+    assert asyncio.run(run()) == 0                            # next answer is not blocked
+
+# ---------------------------------------------------------------------------
+# Session snapshots / forks
+# ---------------------------------------------------------------------------
+
+def test_fork_continues_a_session_without_model_calls(fake_client):
+    async def run():
+        ai_service.init_client(fake_client)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            await http.post("/api/comprehension/chat", json=START)
+            await http.post("/api/comprehension/chat", json={**START, "student_answer": "農夫把禾苗拔高"})
+            calls = fake_client.calls
+            snapshot = await http.get("/api/comprehension/sessions/s1/snapshot")
+            forked = await http.post("/api/comprehension/sessions/fork",
+                                     json={"session_id": "s2", "source_session_id": "s1"})
+            restored = await http.post("/api/comprehension/sessions/fork",
+                                       json={"session_id": "s3", "snapshot": snapshot.json()})
+            model_calls = fake_client.calls - calls
+            answer = await http.post("/api/comprehension/chat", json={**START, "session_id": "s2",
+                                                                      "student_answer": "禾苗都枯死了"})
+            return snapshot, forked, restored, model_calls, answer
+
+    snapshot, forked, restored, model_calls, answer = asyncio.run(run())
+    assert model_calls == 0
+    assert snapshot.json()["understood_count"] == 1
+    assert [turn["role"] for turn in snapshot.json()["conversation"]] == ["ai", "student", "ai"]
+    assert forked.status_code == restored.status_code == 201
+    assert forked.json() == restored.json()
+    assert forked.json()["question"] == EVALUATION["question"]
+    assert forked.json()["understood_count"] == 1
+    assert answer.json()["understood_count"] == 2
+
+
+def test_fork_errors(fake_client):
+    fork = "/api/comprehension/sessions/fork"
+
+    async def run():
+        ai_service.init_client(fake_client)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            await http.post("/api/comprehension/chat", json=START)
+            snapshot = (await http.get("/api/comprehension/sessions/s1/snapshot")).json()
+            return (
+                await http.get("/api/comprehension/sessions/missing/snapshot"),
+                await http.post(fork, json={"session_id": "s2", "source_session_id": "missing"}),
+                await http.post(fork, json={"session_id": "s2"}),
+                await http.post(fork, json={"session_id": "s1", "source_session_id": "s1"}),
+                await http.post(fork, json={"session_id": "s2", "snapshot": {**snapshot, "understood_count": 6,
+                                                                             "total_attempts": 9}}),
+                await http.post(fork, json={"session_id": "s2", "snapshot": {**snapshot, "understood_count": 2,
+                                                                             "total_attempts": 1}}),
+            )
+
+    snapshot, unknown, no_source, existing, too_many, too_few_attempts = asyncio.run(run())
+    assert snapshot.status_code == 404
+    assert unknown.status_code == 404 and "not found" in unknown.json()["detail"]
+    assert no_source.status_code == 422
+    assert existing.status_code == 409                     # a fork never overwrites a session
+    assert too_many.status_code == too_few_attempts.status_code == 422
+
+
+def test_fork_is_rate_limited_per_source(fake_client):
+    limit = agent_module._store.RATE_LIMIT
+
+    async def run():
+        ai_service.init_client(fake_client)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            await http.post("/api/comprehension/chat", json=START)
+            snapshot = (await http.get("/api/comprehension/sessions/s1/snapshot")).json()
+            forks = [
+                (await http.post("/api/comprehension/sessions/fork",
+                                 json={"session_id": f"f{i}", "source_session_id": "s1"})).status_code
+                for i in range(limit + 1)
+            ]
+            restores = [
+                (await http.post("/api/comprehension/sessions/fork",
+                                 json={"session_id": f"r{i}", "snapshot": snapshot})).status_code
+                for i in range(limit + 1)
+            ]
+            return forks, restores
+
+    forks, restores = asyncio.run(run())
+    assert forks == [201] * limit + [429]                  # every fork has a fresh id
+    assert restores == [201] * limit + [429]               # snapshots: limited per story
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Tests for backend/app/services/model_cassette.py and record / replay in ai_service
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import pytest
+from google.genai import types as genai_types
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service
+from app.services.circuit_breaker import CLOSED
+from app.services.metrics import metrics
+from app.services.model_cassette import Cassette, CassetteMissError, latency_sampler
+from tests.fakes import FakeClient
+
+SCHEMA = {"type": "object"}
+
+
+def _contents(answer: str) -> list[genai_types.Content]:
+    return [
+        genai_types.Content(role="model", parts=[genai_types.Part(text="玉山有多高？")]),
+        genai_types.Content(role="user", parts=[genai_types.Part(text=answer)]),
+    ]
+
+
+@pytest.fixture
+def cassette_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(settings, "model_cassette_path", str(tmp_path / "cassette.jsonl"))
+    monkeypatch.setattr(settings, "model_cassette_latency", "none")
+    metrics.reset()
+    yield settings
+    asyncio.run(ai_service.close_client())
+
+
+def _record(client: FakeClient, *answers: str, system: str = "system") -> list[dict]:
+    async def run():
+        ai_service.init_client(client)
+        results = [await ai_service.generate_structured_response(system, _contents(a), SCHEMA) for a in answers]
+        await ai_service.close_client()
+        return results
+
+    return asyncio.run(run())
+
+
+# ---------------------------------------------------------------------------
+# Latency specs
+# ---------------------------------------------------------------------------
+
+def test_latency_specs():
+    rng = random.Random(1)
+    assert latency_sampler("recorded")(0.42) == 0.42
+    assert latency_sampler("none")(0.42) == 0.0
+    assert latency_sampler("fixed:800")(0.42) == 0.8
+    assert 0.3 <= latency_sampler("uniform:300:500", rng)(0.0) <= 0.5
+    samples = sorted(latency_sampler("lognormal:800:4000", rng)(0.0) for _ in range(20_000))
+    assert statistics.median(samples) == pytest.approx(0.8, rel=0.05)
+    assert samples[int(0.99 * len(samples))] == pytest.approx(4.0, rel=0.1)
+    for spec in ("fixed", "uniform:300", "lognormal:900:800", "gaussian:1:2"):
+        with pytest.raises(ValueError):
+            latency_sampler(spec)
+
+
+# ---------------------------------------------------------------------------
+# Record / replay through ai_service
+# ---------------------------------------------------------------------------
+
+def test_record_then_replay_without_a_client(cassette_settings, monkeypatch):
+    monkeypatch.setattr(settings, "model_cassette_mode", "record")
+    recorder = FakeClient(delay=0.05, text='{"understood": true}')
+    assert _record(recorder, "將近四千公尺") == [{"understood": True}]
+    recorder.text = '{"understood": false}'
+    _record(recorder, "400", "400")
+    assert len(Cassette(settings.model_cassette_path)) == 3
+
+    monkeypatch.setattr(settings, "model_cassette_mode", "replay")
+    monkeypatch.setattr(settings, "model_cassette_latency", "recorded")
+    silent = FakeClient()
+
+    async def run():
+        ai_service.init_client(silent)
+        start = time.perf_counter()
+        first = await ai_service.generate_structured_response("system", _contents("將近四千公尺"), SCHEMA)
+        elapsed = time.perf_counter() - start
+        other = await ai_service.generate_structured_response("system", _contents("400"), SCHEMA)
+        return first, elapsed, other
+
+    first, elapsed, other = asyncio.run(run())
+    assert first == {"understood": True} and other == {"understood": False}
+    assert elapsed >= 0.04                                    # recorded latency replayed
+    assert silent.calls == 0
+    assert metrics.get("cassette.hits") == 2
+
+
+def test_unrecorded_prompt_falls_back_to_the_same_answer(cassette_settings, monkeypatch):
+    monkeypatch.setattr(settings, "model_cassette_mode", "record")
+    _record(FakeClient(text='{"understood": false}'), "400", system="目前階段：factual")
+
+    monkeypatch.setattr(settings, "model_cassette_mode", "replay")
+
+    async def run():
+        ai_service.init_client()
+        near = await ai_service.generate_structured_response("目前階段：inferential", _contents("400"), SCHEMA)
+        with pytest.raises(CassetteMissError):
+            await ai_service.generate_structured_response("目前階段：factual", _contents("300"), SCHEMA)
+        return near
+
+    assert asyncio.run(run()) == {"understood": False}
+    assert metrics.get("cassette.near_hits") == 1
+    assert metrics.get("cassette.misses") == 1               # not retried
+    assert ai_service._breaker.state == CLOSED
+
+
+def test_streams_are_recorded_and_replayed(cassette_settings, monkeypatch):
+    text = json.dumps({"feedback": "很好！", "question": "為什麼玉山冬天會下雪？"}, ensure_ascii=False)
+
+    async def stream(client):
+        ai_service.init_client(client)
+        events = [e async for e in ai_service.stream_structured_response("system", _contents("四千"), SCHEMA)]
+        await ai_service.close_client()
+        return events
+
+    monkeypatch.setattr(settings, "model_cassette_mode", "record")
+    recorded = asyncio.run(stream(FakeClient(text=text, stream_chunks=5)))
+    monkeypatch.setattr(settings, "model_cassette_mode", "replay")
+    replayed = asyncio.run(stream(None))
+    assert replayed[-1] == recorded[-1]
+    assert replayed[-1].value == json.loads(text)
+    assert sum(1 for e in replayed if e.kind == "delta") > 1
@@ -0,0 +1,145 @@
+"""
+Tests for backend/app/services/model_router.py and hedged calls in ai_service
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.metrics import metrics
+from app.services.model_router import DEFAULT_ROUTE, FAST_ROUTE, LatencyTracker, route_answer
+from app.services.session_store import MemorySessionStore
+from app.services.socratic_agent import SocraticAgent
+from tests.fakes import FakeClient
+
+EVALUATION = json.dumps(
+    {"understood": False, "feedback": "沒關係！", "question": "農夫為什麼要拔禾苗？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(settings, "context_cache_enabled", True)
+    monkeypatch.setattr(settings, "gemini_fast_model", "gemini-fast")
+    monkeypatch.setattr(settings, "gemini_hedging_enabled", True)
+    monkeypatch.setattr(settings, "gemini_hedge_min_delay", 0.02)
+    monkeypatch.setattr(agent_module, "_store", MemorySessionStore())
+    metrics.reset()
+    client = FakeClient(delay=0.001, text=EVALUATION)
+    yield client
+    asyncio.run(ai_service.close_client())
+
+
+# ---------------------------------------------------------------------------
+# Routing
+# ---------------------------------------------------------------------------
+
+def test_short_answers_take_the_fast_route(client):
+    assert route_answer(" 不知道 ") == route_answer("400")
+    assert route_answer("不知道").name == FAST_ROUTE
+    assert route_answer("不知道").model == "gemini-fast"
+    assert route_answer("農夫想讓禾苗長快一點").name == DEFAULT_ROUTE
+    assert route_answer("農夫想讓禾苗長快一點").model == settings.gemini_model
+
+
+def test_without_a_fast_model_everything_takes_the_default_route(client, monkeypatch):
+    monkeypatch.setattr(settings, "gemini_fast_model", "")
+    assert route_answer("不知道").name == DEFAULT_ROUTE
+
+
+def test_agent_sends_each_route_to_its_model(client):
+    agent = SocraticAgent()
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "揠苗助長", "農夫拔禾苗。" * 20)
+        for _ in range(5):
+            await asyncio.sleep(0)                         # context cache created
+        await agent.process_answer("s1", "拔禾苗")       # short, but an attempt: not answered locally
+        fast = client.requests[-1]
+        await agent.process_answer("s1", "農夫想讓禾苗長快一點")
+        return fast, client.requests[-1]
+
+    fast, default = asyncio.run(run())
+    assert fast["model"] == "gemini-fast"
+    assert fast["config"].cached_content is None         # caches belong to the default model
+    assert default["model"] == settings.gemini_model
+    assert default["config"].cached_content is not None
+    assert metrics.get("socratic.route.fast.calls") == 1
+    assert metrics.get("socratic.route.default.calls") == 1
+
+
+# ---------------------------------------------------------------------------
+# LatencyTracker / hedging
+# ---------------------------------------------------------------------------
+
+def test_latency_quantile_needs_enough_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.quantile(0.95) is None
+    for i in range(9, 200):
+        tracker.record(i / 100)
+    assert len(tracker) == 100
+    assert tracker.quantile(0.95) == pytest.approx(1.94)
+
+
+def _slow_then_fast(client: FakeClient, delays: list[float]):
+    """generate_content that takes delays[n] seconds on the n-th call."""
+    async def generate_content(**kwargs):
+        n = client.calls
+        client.calls += 1
+        client.in_flight += 1
+        try:
+            await asyncio.sleep(delays[n])
+            return type("R", (), {"text": f'{{"call": {n}}}', "usage_metadata": None})()
+        finally:
+            client.in_flight -= 1
+    client.aio.models.generate_content = generate_content
+
+
+def _warm_tracker(seconds: float) -> None:
+    tracker = ai_service._latency.setdefault(settings.gemini_model, LatencyTracker())
+    for _ in range(tracker.min_samples):
+        tracker.record(seconds)
+
+
+def test_slow_call_is_hedged_and_the_loser_cancelled(client):
+    _slow_then_fast(client, [1.0, 0.01])
+
+    async def run():
+        ai_service.init_client(client)
+        _warm_tracker(0.01)
+        result = await ai_service.generate_structured_response("system", [], {"type": "object"})
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == {"call": 1}
+    assert client.calls == 2 and client.in_flight == 0
+    assert metrics.get("gemini.hedges") == 1
+    assert metrics.get("gemini.hedge_wins") == 1
+
+
+def test_no_hedge_before_the_deadline_or_without_history(client):
+    _slow_then_fast(client, [0.05, 0.05, 0.05])
+
+    async def run():
+        ai_service.init_client(client)
+        first = await ai_service.generate_structured_response("system", [], {"type": "object"})
+        _warm_tracker(0.2)                                 # deadline 0.2s > 0.05s
+        second = await ai_service.generate_structured_response("system", [], {"type": "object"})
+        return first, second
+
+    assert asyncio.run(run()) == ({"call": 0}, {"call": 1})
+    assert metrics.get("gemini.hedges") == 0
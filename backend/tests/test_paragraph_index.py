@@ -0,0 +1,158 @@
+"""
+Tests for backend/app/services/paragraph_index.py and its use by SocraticAgent
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.metrics import metrics
+from app.services.paragraph_index import ParagraphIndex, paragraph_index
+from app.services.session_store import MemorySessionStore
+from app.services.socratic_agent import EXCERPT_PARAGRAPHS, SocraticAgent
+from app.services.story_table import story_table
+from tests.fakes import FakeClient
+
+PLACES = ["台北", "花蓮", "台東", "墾丁", "阿里山", "日月潭", "澎湖", "金門", "馬祖", "蘭嶼",
+          "綠島", "太魯閣", "合歡山", "雪霸", "陽明山", "淡水", "九份", "鹿港", "安平", "旗津",
+          "三仙台", "清境", "奮起湖", "野柳", "龜山島", "小琉球", "梨山", "武陵", "司馬庫斯", "拉拉山"]
+LONG_TEXT = "\n".join(
+    f"第{i + 1}天我們到了{place}，導遊說{place}最有名的是第{i + 1}號步道。" for i, place in enumerate(PLACES)
+)
+
+
+# ---------------------------------------------------------------------------
+# ParagraphIndex
+# ---------------------------------------------------------------------------
+
+def test_rank_finds_the_paragraph_a_question_is_about():
+    index = ParagraphIndex(["農夫每天到田裡看禾苗。", "", "他把禾苗一棵一棵往上拔。", "第二天禾苗都枯死了。"])
+    assert index.best("農夫對禾苗做了什麼？往上拔") == 2
+    assert index.rank("禾苗枯死了嗎", 2)[0] == 3
+    assert 1 not in index.scores("禾苗")                 # empty paragraphs never match
+    assert index.best("火車") is None
+
+
+def test_numbers_match_across_writing_systems():
+    index = ParagraphIndex(["玉山很美。", "玉山高度將近四千公尺。"])
+    assert index.best("4000公尺") == 1
+
+
+def test_select_keeps_story_order_and_fills_from_the_start():
+    index = ParagraphIndex(LONG_TEXT.split("\n"))
+    chosen = index.select("野柳有什麼？", 5)
+    assert chosen == sorted(chosen) and len(chosen) == 5
+    assert 23 in chosen and 24 in chosen                 # best match and the paragraph after it
+    assert index.select("", 3) == [0, 1, 2]
+    assert ParagraphIndex(["甲", "", "乙"]).select("乙", 5) == [0, 2]
+
+
+def test_one_index_per_story():
+    story = story_table.intern("環島", LONG_TEXT)
+    assert paragraph_index(story) is paragraph_index(story_table.intern("環島", LONG_TEXT))
+
+
+# ---------------------------------------------------------------------------
+# SocraticAgent
+# ---------------------------------------------------------------------------
+
+def _evaluation(**fields) -> str:
+    result = {"understood": False, "feedback": "再找找看。", "question": "你們在野柳看到了什麼？", "phase": "factual"}
+    return json.dumps({**result, **fields}, ensure_ascii=False)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(settings, "context_cache_enabled", False)
+    monkeypatch.setattr(agent_module, "_store", MemorySessionStore())
+    metrics.reset()
+    yield SocraticAgent()
+    asyncio.run(ai_service.close_client())
+
+
+def test_long_stories_send_an_excerpt_instead_of_the_whole_text(agent):
+    client = FakeClient(text=_evaluation())
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "環島", LONG_TEXT)
+        await agent.process_answer("s1", "我們看到很多石頭")
+        return client.requests[-1]["config"].system_instruction
+
+    prompt = asyncio.run(run())
+    assert prompt.count("段] ") == EXCERPT_PARAGRAPHS
+    assert "[第23段] 第24天我們到了野柳" in prompt        # original indices
+    assert "拉拉山" not in prompt
+
+
+def test_short_stories_are_sent_whole(agent):
+    client = FakeClient(text=_evaluation())
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "環島", "\n".join(LONG_TEXT.split("\n")[:10]))
+        await agent.process_answer("s1", "我們看到很多石頭")
+        return client.requests[-1]["config"].system_instruction
+
+    prompt = asyncio.run(run())
+    assert prompt.count("段] ") == 10 and "課文相關段落" not in prompt
+
+
+def test_a_cached_prefix_keeps_the_whole_long_story(agent, monkeypatch):
+    monkeypatch.setattr(settings, "context_cache_enabled", True)
+    client = FakeClient(text=_evaluation())
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "環島", LONG_TEXT)
+        for _ in range(5):
+            await asyncio.sleep(0)                           # cache creation in the background
+        await agent.process_answer("s1", "我們看到很多石頭")
+        return client.requests[-1]
+
+    evaluation = asyncio.run(run())
+    [cached_prefix] = client.caches.entries.values()
+    assert cached_prefix.count("段] ") == len(PLACES)
+    assert evaluation["config"].cached_content is not None
+    assert "課文相關段落" not in evaluation["contents"][0].parts[0].text
+
+
+@pytest.mark.parametrize("referenced", [None, 99, "第3段"])
+def test_missing_referenced_paragraph_is_located_locally(agent, referenced):
+    client = FakeClient(text=_evaluation())
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "環島", LONG_TEXT)
+        client.text = _evaluation(referenced_paragraph=referenced)
+        return await agent.process_answer("s1", "在野柳看到石頭")
+
+    response = asyncio.run(run())
+    assert response.referenced_paragraph == 23
+    assert metrics.get("socratic.referenced_paragraph_located") == 1
+
+
+def test_model_referenced_paragraph_is_kept(agent):
+    client = FakeClient(text=_evaluation(referenced_paragraph=4))
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "環島", LONG_TEXT)
+        wrong = await agent.process_answer("s1", "在野柳看到石頭")
+        client.text = _evaluation(understood=True, referenced_paragraph=None)
+        right = await agent.process_answer("s1", "女王頭")
+        return wrong, right
+
+    wrong, right = asyncio.run(run())
+    assert wrong.referenced_paragraph == 4
+    assert right.referenced_paragraph is None
@@ -0,0 +1,72 @@
+"""
+Tests for backend/app/services/partial_json.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import json
+import random
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.partial_json import IncrementalObjectParser, JsonEvent
+
+OBJ = {
+    "understood": True,
+    "feedback": "很好！你說的「拔高」是對的，\"農夫\"很心急。\n😀",
+    "question": "農夫為什麼要拔禾苗？",
+    "phase": "factual",
+    "referenced_paragraph": None,
+    "score": -1.5e3,
+    "extra": {"a": [1, "}"]},
+}
+
+
+def _run(pieces):
+    parser = IncrementalObjectParser()
+    deltas, values = {}, {}
+    for piece in pieces:
+        for event in parser.feed(piece):
+            if event.kind == "delta":
+                deltas[event.key] = deltas.get(event.key, "") + event.value
+            else:
+                values[event.key] = event.value
+    return parser, deltas, values
+
+
+@pytest.mark.parametrize("ensure_ascii", [False, True])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_any_chunking_yields_the_same_fields(ensure_ascii, indent):
+    text = json.dumps(OBJ, ensure_ascii=ensure_ascii, indent=indent)
+    rng = random.Random(7)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(text)), rng.randint(0, 40)))
+        pieces = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+        parser, deltas, values = _run(pieces)
+        assert values == OBJ
+        assert deltas == {k: v for k, v in OBJ.items() if isinstance(v, str)}
+        assert parser.done
+        assert parser.result() == OBJ
+
+
+def test_string_is_reported_while_it_is_written():
+    parser = IncrementalObjectParser()
+    assert parser.feed('{"understood": true, "feedback": "很好') == [
+        JsonEvent("value", "understood", True),
+        JsonEvent("delta", "feedback", "很好"),
+    ]
+    assert [e.value for e in parser.feed('！再想\\')] == ["！再想"]      # escape not complete yet
+    events = parser.feed('n一下", "question"')
+    assert [(e.kind, e.value) for e in events] == [("delta", "\n一下"), ("value", "很好！再想\n一下")]
+    assert not parser.done
+
+
+def test_split_unicode_escape_is_held_back():
+    parser = IncrementalObjectParser()
+    assert [e.value for e in parser.feed('{"feedback": "\\u597d\\ud83d')] == ["好"]
+    assert [e.value for e in parser.feed('\\ude00"}')] == ["😀", "好😀"]
+
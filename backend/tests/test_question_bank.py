@@ -0,0 +1,159 @@
+"""
+Tests for backend/app/services/question_bank.py and its use in SocraticAgent
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service
+from app.services.question_bank import (
+    BankQuestion,
+    QuestionBank,
+    generate_questions,
+    warm_question_bank,
+)
+from app.services.socratic_agent import SocraticAgent
+from tests.fakes import FakeClient
+
+TITLE = "揠苗助長的故事"
+TEXT = "古時候有一個農夫。\n他把禾苗往上拔。\n禾苗全部都枯死了。"
+
+QUESTIONS = [
+    BankQuestion("factual", "故事裡的農夫每天去田裡做什麼？", 0),
+    BankQuestion("factual", "農夫想到了什麼辦法讓禾苗長高？", 1),
+    BankQuestion("inferential", "農夫為什麼會覺得禾苗長得太慢？", 0),
+    BankQuestion("evaluative", "如果你是農夫，你會怎麼照顧禾苗？", None),
+]
+
+
+@pytest.fixture
+def bank():
+    bank = QuestionBank()
+    bank.put(TITLE, TEXT, QUESTIONS)
+    return bank
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    client = FakeClient()
+    ai_service.init_client(client)
+    yield client
+    asyncio.run(ai_service.close_client())
+
+
+# ---------------------------------------------------------------------------
+# QuestionBank
+# ---------------------------------------------------------------------------
+
+def test_pick_filters_by_phase_and_excludes_asked(bank):
+    picked = bank.pick(TITLE, TEXT, "factual", exclude=[QUESTIONS[0].question])
+    assert picked == QUESTIONS[1]
+    assert bank.pick(TITLE, TEXT, "factual", exclude=[q.question for q in QUESTIONS]) is None
+
+
+def test_pick_prefers_paragraphs(bank):
+    for _ in range(10):
+        assert bank.pick(TITLE, TEXT, "factual", prefer_paragraphs=[1]) == QUESTIONS[1]
+
+
+def test_pick_unknown_story(bank):
+    assert bank.pick(TITLE, TEXT + "。", "factual") is None
+
+
+def test_save_and_load_round_trip(bank, tmp_path):
+    path = tmp_path / "bank.json"
+    bank.save(path)
+    loaded = QuestionBank()
+    assert loaded.load(path) == 1
+    assert loaded.get(TITLE, TEXT) == QUESTIONS
+
+
+def test_load_rejects_unknown_version(tmp_path):
+    path = tmp_path / "bank.json"
+    path.write_text(json.dumps({"version": 99, "stories": {}}))
+    with pytest.raises(ValueError):
+        QuestionBank().load(path)
+
+
+# ---------------------------------------------------------------------------
+# Generation
+# ---------------------------------------------------------------------------
+
+def test_generate_questions_drops_invalid_items(fake_client):
+    fake_client.text = json.dumps({"questions": [
+        {"phase": "factual", "question": "農夫做了什麼？", "referenced_paragraph": 1},
+        {"phase": "factual", "question": "農夫做了什麼？", "referenced_paragraph": 1},   # duplicate
+        {"phase": "summary", "question": "請摘要。"},                                   # bad phase
+        {"phase": "inferential", "question": "  "},                                     # empty
+        {"phase": "evaluative", "question": "你覺得呢？", "referenced_paragraph": 9},    # bad index
+    ]}, ensure_ascii=False)
+    questions = asyncio.run(generate_questions(TITLE, TEXT))
+    assert questions == [
+        BankQuestion("factual", "農夫做了什麼？", 1),
+        BankQuestion("evaluative", "你覺得呢？", None),
+    ]
+
+
+def test_warm_question_bank_fills_missing_stories(bank, fake_client):
+    fake_client.text = json.dumps({"questions": [
+        {"phase": phase, "question": f"{phase} 問題？"} for phase in ("factual", "inferential", "evaluative")
+    ]})
+    stories = [(TITLE, TEXT), ("神祕的玉山", "玉山是臺灣最高的山。")]
+    generated = asyncio.run(warm_question_bank(bank, stories))
+    assert generated == 1
+    assert fake_client.calls == 1
+    assert bank.get(TITLE, TEXT) == QUESTIONS          # existing entry untouched
+    assert len(bank.get("神祕的玉山", "玉山是臺灣最高的山。")) == 3
+
+
+def test_warm_question_bank_skips_incomplete_results(fake_client):
+    fake_client.text = json.dumps({"questions": [{"phase": "factual", "question": "誰？"}]})
+    bank = QuestionBank()
+    assert asyncio.run(warm_question_bank(bank, [(TITLE, TEXT)])) == 0
+    assert len(bank) == 0
+
+
+# ---------------------------------------------------------------------------
+# SocraticAgent with a bank
+# ---------------------------------------------------------------------------
+
+def test_start_session_serves_opening_question_from_bank(bank, fake_client):
+    agent = SocraticAgent(bank)
+    response = asyncio.run(agent.start_session("bank-1", TITLE, TEXT))
+    assert response.question in {q.question for q in QUESTIONS[:2]}
+    assert response.phase == "factual"
+    assert fake_client.calls == 0
+
+
+def test_start_session_focuses_on_mispronounced_paragraph(bank, fake_client):
+    agent = SocraticAgent(bank)
+    response = asyncio.run(agent.start_session("bank-2", TITLE, TEXT, mispronounced_words=["拔"]))
+    assert response.question == QUESTIONS[1].question
+
+
+def test_start_session_without_bank_entry_calls_model(bank, fake_client):
+    fake_client.text = json.dumps({"question": "玉山有多高？", "phase": "factual"}, ensure_ascii=False)
+    agent = SocraticAgent(bank)
+    response = asyncio.run(agent.start_session("bank-3", "神祕的玉山", "玉山是臺灣最高的山。"))
+    assert response.question == "玉山有多高？"
+    assert fake_client.calls == 1
+
+
+def test_fallback_question_comes_from_bank(bank, fake_client, monkeypatch):
+    monkeypatch.setattr(ai_service, "RETRY_BASE_DELAY", 0)
+    agent = SocraticAgent(bank)
+    opening = asyncio.run(agent.start_session("bank-4", TITLE, TEXT))
+    fake_client.text = "not json"                     # evaluation call fails
+    response = asyncio.run(agent.process_answer("bank-4", "農夫"))
+    factual = {q.question for q in QUESTIONS if q.phase == "factual"}
+    assert response.question in factual - {opening.question}
@@ -0,0 +1,94 @@
+"""
+Tests for backend/app/services/rate_limiter.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.services.rate_limiter import (
+    RATE_KEY_PREFIX,
+    MemoryRateLimiter,
+    RedisRateLimiter,
+    sliding_window_step,
+)
+from tests.fakes import FakeRedis
+
+
+# ---------------------------------------------------------------------------
+# sliding_window_step
+# ---------------------------------------------------------------------------
+
+def test_limit_within_one_window():
+    state = None
+    results = []
+    for i in range(4):
+        allowed, state = sliding_window_step(state, 60.0 + i, limit=3, window=60)
+        results.append(allowed)
+    assert results == [True, True, True, False]
+    assert state == (1, 0, 3)
+
+
+def test_previous_window_is_weighted_by_overlap():
+    # 3 requests in window 1; 15 s into window 2, 3/4 of them still count
+    state = (1, 0, 3)
+    allowed, state = sliding_window_step(state, 120.0 + 15, limit=3, window=60)
+    assert allowed                         # 3 × 0.75 + 0 = 2.25
+    assert state == (2, 3, 1)
+    allowed, state = sliding_window_step(state, 120.0 + 15, limit=3, window=60)
+    assert not allowed                     # 3 × 0.75 + 1 = 3.25
+
+
+def test_counts_fade_out_over_the_next_window():
+    state = (1, 0, 3)
+    allowed, state = sliding_window_step(state, 120.0 + 30, limit=3, window=60)
+    assert allowed                         # 3 × 0.5 = 1.5 < 3
+    allowed, state = sliding_window_step(state, 120.0 + 31, limit=3, window=60)
+    assert allowed                         # 3 × 0.48 + 1 = 2.45 < 3
+    allowed, state = sliding_window_step(state, 120.0 + 32, limit=3, window=60)
+    assert not allowed                     # 3 × 0.47 + 2 = 3.4
+
+
+def test_old_windows_are_forgotten():
+    allowed, state = sliding_window_step((1, 5, 5), 600.0, limit=3, window=60)
+    assert allowed
+    assert state == (10, 0, 1)
+
+
+# ---------------------------------------------------------------------------
+# MemoryRateLimiter
+# ---------------------------------------------------------------------------
+
+def test_memory_limiter_evicts_idle_keys():
+    limiter = MemoryRateLimiter(limit=3, window=60)
+    for i in range(1000):
+        limiter.allow_at(f"s{i}", i * 0.5)          # one new session every half second
+    # only keys seen in the current or previous window can still matter
+    assert len(limiter) <= 2 * 60 / 0.5 + 1
+    assert limiter.allow_at("s999", 499.6)
+
+
+def test_memory_limiter_is_per_key():
+    limiter = MemoryRateLimiter(limit=2, window=60)
+    assert [limiter.allow_at("a", 1.0) for _ in range(3)] == [True, True, False]
+    assert limiter.allow_at("b", 1.0)
+
+
+# ---------------------------------------------------------------------------
+# RedisRateLimiter
+# ---------------------------------------------------------------------------
+
+def test_redis_limiter_is_shared_between_workers():
+    redis = FakeRedis()
+    worker_a = RedisRateLimiter(redis, limit=3, window=60)
+    worker_b = RedisRateLimiter(redis, limit=3, window=60)
+
+    async def run():
+        return [await limiter.allow("s1") for limiter in (worker_a, worker_b, worker_a, worker_b)]
+
+    assert asyncio.run(run()) == [True, True, True, False]
+    assert RATE_KEY_PREFIX + "s1" in redis.expires_at
@@ -0,0 +1,160 @@
+"""
+Tests for backend/app/routes/reading.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import get_db
+from app.main import app
+from app.models import Base, CharacterError, LearningSession
+from app.routes.reading import MAX_BATCH_CHARS, MAX_TEXT_CHARS
+from app.services.stt_service import evaluate_reading
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+
+    def _get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+
+
+def test_evaluate_batch_route():
+    items = [
+        {"stt_text": "禾", "target_text": "和"},
+        {"stt_text": "蘋果香蕉", "target_text": "古時候有一個農夫"},
+    ]
+    resp = client.post("/api/reading/evaluate-batch", json={"items": items})
+    assert resp.status_code == 200
+    assert resp.json()["results"] == [
+        evaluate_reading(i["stt_text"], i["target_text"]) for i in items
+    ]
+
+
+def test_evaluate_batch_route_rejects_missing_items():
+    resp = client.post("/api/reading/evaluate-batch", json={})
+    assert resp.status_code == 422
+
+
+def test_evaluate_batch_route_limits_text_sizes():
+    too_long = {"stt_text": "禾", "target_text": "和" * (MAX_TEXT_CHARS + 1)}
+    resp = client.post("/api/reading/evaluate-batch", json={"items": [too_long]})
+    assert resp.status_code == 422
+
+    item = {"stt_text": "禾" * MAX_TEXT_CHARS, "target_text": "和" * MAX_TEXT_CHARS}
+    items = [item] * (MAX_BATCH_CHARS // (2 * MAX_TEXT_CHARS) + 1)
+    resp = client.post("/api/reading/evaluate-batch", json={"items": items})
+    assert resp.status_code == 422
+    assert "Batch too large" in resp.text
+
+
+def test_reading_stream_pushes_updates():
+    target = "農夫每天去田裡"
+    with client.websocket_connect("/api/reading/stream") as ws:
+        ws.send_json({"target_text": target})
+        ws.send_json({"chunk": "農夫"})
+        assert ws.receive_json() == evaluate_reading("農夫", target)
+        ws.send_json({"transcript": "農夫每天去田禮"})
+        ws.send_json({"transcript": "農夫每天去田裡"})   # interim tail revised
+        assert ws.receive_json() == evaluate_reading("農夫每天去田禮", target)
+        final = ws.receive_json()
+        assert final == evaluate_reading("農夫每天去田裡", target)
+        assert final["tier"] == 1
+
+
+# ---------------------------------------------------------------------------
+# /learning-sessions/{id}/readings
+# ---------------------------------------------------------------------------
+
+def test_record_session_reading_stores_character_errors(db_session_factory):
+    with db_session_factory() as db:
+        db.add(LearningSession(id=3, student_id=1, text_id=1))
+        db.commit()
+
+    resp = client.post(
+        "/api/learning-sessions/3/readings",
+        json={"stt_text": "農大每天田裡和苗", "target_text": "農夫每天去田裡，禾苗。"},
+    )
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["corrected"] == "農大每天田裡禾苗"
+    assert [(e["error_type"], e["character"], e["position"]) for e in body["errors"]] == [
+        ("substitution", "夫", 1),
+        ("omission", "去", 4),
+        ("homophone", "禾", 7),
+    ]
+    with db_session_factory() as db:
+        rows = db.scalars(select(CharacterError).order_by(CharacterError.id)).all()
+        assert [(r.session_id, r.error_type, r.spoken) for r in rows] == [
+            (3, "substitution", "大"), (3, "omission", None), (3, "homophone", "和"),
+        ]
+
+
+def test_record_session_reading_unknown_session(db_session_factory):
+    resp = client.post(
+        "/api/learning-sessions/99/readings", json={"stt_text": "農夫", "target_text": "農夫"}
+    )
+    assert resp.status_code == 404
+    with db_session_factory() as db:
+        assert db.scalars(select(CharacterError)).all() == []
+
+
+# ---------------------------------------------------------------------------
+# /reading/stream
+# ---------------------------------------------------------------------------
+
+def test_reading_stream_requires_target():
+    with client.websocket_connect("/api/reading/stream") as ws:
+        ws.send_json({"chunk": "農夫"})
+        assert "error" in ws.receive_json()
+
+
+def test_reading_stream_rejects_oversized_text_and_keeps_the_line():
+    target = "農夫每天去田裡"
+    with client.websocket_connect("/api/reading/stream") as ws:
+        ws.send_json({"target_text": "農" * (MAX_TEXT_CHARS + 1)})
+        assert "error" in ws.receive_json()
+        ws.send_json({"target_text": target})
+        ws.send_json({"transcript": "農" * (MAX_TEXT_CHARS + 1)})
+        assert "error" in ws.receive_json()
+        ws.send_json({"chunk": "農" * MAX_TEXT_CHARS})
+        ws.receive_json()
+        ws.send_json({"chunk": "夫"})                       # over the limit in total
+        assert "too long" in ws.receive_json()["error"]
+        ws.send_json({"transcript": "農夫"})
+        assert ws.receive_json() == evaluate_reading("農夫", target)
+
+
+def test_reading_stream_survives_a_non_json_frame():
+    with client.websocket_connect("/api/reading/stream") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json() == {"error": "Expected a JSON object"}
+        ws.send_json(["農夫"])
+        assert ws.receive_json() == {"error": "Expected a JSON object"}
+        ws.send_json({"target_text": "農夫", "chunk": "農夫"})
+        assert ws.receive_json()["tier"] == 1
@@ -0,0 +1,165 @@
+"""
+Tests for backend/app/services/response_cache.py and its use in ai_service
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from google.genai import types as genai_types
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.main import app
+from app.services import ai_service, response_cache
+from app.services.metrics import metrics
+from app.services.response_cache import (
+    MemoryResponseCache,
+    RedisResponseCache,
+    REDIS_KEY_PREFIX,
+    cache_key,
+)
+from app.services.socratic_agent import socratic_agent
+from tests.fakes import FakeClient, FakeRedis
+
+
+def _contents(text: str) -> list[genai_types.Content]:
+    return [genai_types.Content(role="user", parts=[genai_types.Part(text=text)])]
+
+
+# ---------------------------------------------------------------------------
+# cache_key
+# ---------------------------------------------------------------------------
+
+def test_cache_key_is_stable_and_content_addressed():
+    key = cache_key("m", "sys", _contents("請開始提問。"), {"a": 1, "b": 2}, temperature=0.7)
+    assert key == cache_key("m", "sys", _contents("請開始提問。"), {"b": 2, "a": 1}, temperature=0.7)
+    assert key != cache_key("m", "sys2", _contents("請開始提問。"), {"a": 1, "b": 2}, temperature=0.7)
+    assert key != cache_key("m", "sys", _contents("請繼續提問。"), {"a": 1, "b": 2}, temperature=0.7)
+    assert key != cache_key("m", "sys", _contents("請開始提問。"), {"a": 1}, temperature=0.7)
+    assert key != cache_key("m", "sys", _contents("請開始提問。"), {"a": 1, "b": 2}, temperature=0.2)
+
+
+# ---------------------------------------------------------------------------
+# MemoryResponseCache
+# ---------------------------------------------------------------------------
+
+def test_memory_cache_keeps_last_variants():
+    cache = MemoryResponseCache(max_entries=10, ttl=60, max_variants=2)
+
+    async def run():
+        for v in ("a", "b", "c"):
+            await cache.add_variant("k", v)
+        return await cache.get_variants("k")
+
+    assert asyncio.run(run()) == ["b", "c"]
+
+
+def test_memory_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+    cache = MemoryResponseCache(max_entries=10, ttl=60, max_variants=2)
+    asyncio.run(cache.add_variant("k", "a"))
+    now[0] += 61
+    assert asyncio.run(cache.get_variants("k")) == []
+    assert len(cache) == 0
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryResponseCache(max_entries=2, ttl=60, max_variants=1)
+
+    async def run():
+        await cache.add_variant("a", "1")
+        await cache.add_variant("b", "2")
+        await cache.get_variants("a")      # a is now most recently used
+        await cache.add_variant("c", "3")  # evicts b
+        return [await cache.get_variants(k) for k in "abc"]
+
+    assert asyncio.run(run()) == [["1"], [], ["3"]]
+
+
+# ---------------------------------------------------------------------------
+# RedisResponseCache
+# ---------------------------------------------------------------------------
+
+def test_redis_cache_trims_and_sets_ttl():
+    redis = FakeRedis()
+    cache = RedisResponseCache(redis, ttl=600, max_variants=2)
+
+    async def run():
+        for v in ("a", "b", "c"):
+            await cache.add_variant("k", v)
+        return await cache.get_variants("k")
+
+    assert asyncio.run(run()) == ["b", "c"]
+    assert redis.ttls[REDIS_KEY_PREFIX + "k"] == 600
+
+
+# ---------------------------------------------------------------------------
+# ai_service with cache=True
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "memory")
+    monkeypatch.setattr(settings, "response_cache_variants", 3)
+    client = FakeClient(delay=0.05, text='{"question": "農夫為什麼要拔禾苗？", "phase": "factual"}')
+    ai_service.init_client(client)
+    metrics.reset()
+    yield client
+    asyncio.run(ai_service.close_client())
+
+
+def test_class_opening_same_story_shares_model_calls(fake_client):
+    async def open_story():
+        return await asyncio.gather(*(
+            socratic_agent.start_session(f"s{i}", "揠苗助長", "農夫拔禾苗。\n禾苗枯死了。")
+            for i in range(30)
+        ))
+
+    responses = asyncio.run(open_story())
+    assert {r.question for r in responses} == {"農夫為什麼要拔禾苗？"}
+    assert fake_client.calls == 1                 # concurrent openers wait for the first call
+
+    async def open_one_by_one():
+        for i in range(30):
+            await socratic_agent.start_session(f"t{i}", "揠苗助長", "農夫拔禾苗。\n禾苗枯死了。")
+
+    asyncio.run(open_one_by_one())                # later sessions fill the variant pool, then hit
+    assert fake_client.calls == 3
+    snapshot = metrics.snapshot()
+    assert snapshot["response_cache.misses"] == 3
+    assert snapshot["response_cache.hits"] == 57
+    assert snapshot["response_cache.hit_ratio"] == pytest.approx(0.95)
+    assert snapshot["response_cache.saved_latency_seconds"] > 0
+
+
+def test_different_reading_stats_do_not_share_entries(fake_client):
+    async def run():
+        await socratic_agent.start_session("a", "揠苗助長", "農夫拔禾苗。", accuracy=90.0)
+        await socratic_agent.start_session("b", "揠苗助長", "農夫拔禾苗。", accuracy=50.0)
+
+    asyncio.run(run())
+    assert fake_client.calls == 2
+
+
+def test_uncached_calls_bypass_cache(fake_client):
+    async def run():
+        for _ in range(3):
+            await ai_service.generate_structured_response("sys", _contents("x"), {})
+
+    asyncio.run(run())
+    assert fake_client.calls == 3
+    assert metrics.get("response_cache.misses") == 0
+
+
+def test_metrics_endpoint_reports_hit_ratio(fake_client):
+    metrics.incr("response_cache.hits", 3)
+    metrics.incr("response_cache.misses", 1)
+    body = TestClient(app).get("/api/metrics").json()
+    assert body["response_cache.hit_ratio"] == 0.75
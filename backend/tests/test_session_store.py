@@ -0,0 +1,295 @@
+"""
+Tests for backend/app/services/session_store.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+import time
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.session_store import (
+    SESSION_KEY_PREFIX,
+    STORY_KEY_PREFIX,
+    Conversation,
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionConflictError,
+    SessionState,
+    dump_state,
+    load_state,
+    snapshot_state,
+    state_from_snapshot,
+)
+from app.services.socratic_agent import SocraticAgent
+from app.services.story_table import StoryTable, story_table
+from tests.fakes import FakeClient, FakeRedis
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemorySessionStore()
+    return RedisSessionStore(FakeRedis())
+
+
+def _state(**kwargs) -> SessionState:
+    return SessionState(session_id="s1", story=story_table.intern("揠苗助長", "農夫拔禾苗。"), **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------------------------
+
+def test_dump_state_omits_defaults_and_round_trips():
+    state = _state(accuracy=0.0, conversation=Conversation([("ai", "誰拔了禾苗？")]))
+    data = json.loads(dump_state(state))
+    assert "understood_count" not in data
+    assert "mispronounced_words" not in data
+    assert "story_text" not in data and data["story"] == state.story.key
+    assert data["conversation"] == [["ai", "誰拔了禾苗？"]]
+    assert data["accuracy"] == 0.0
+    loaded = load_state(dump_state(state))
+    assert loaded == state
+    assert loaded.story is state.story
+
+
+def test_snapshot_is_self_contained_and_round_trips():
+    state = _state(understood_count=2, current_phase="inferential", mispronounced_words=["禾"],
+                   conversation=Conversation([("ai", "誰拔了禾苗？"), ("student", "農夫")]))
+    snapshot = json.loads(json.dumps(snapshot_state(state), ensure_ascii=False))
+    assert snapshot["story_text"] == "農夫拔禾苗。"
+    assert snapshot["conversation"][1] == {"role": "student", "text": "農夫"}
+    assert "session_id" not in snapshot and "version" not in snapshot
+    restored = state_from_snapshot("s2", snapshot)
+    assert restored.session_id == "s2" and restored.version == 0
+    assert restored.story is state.story
+    assert restored.conversation == state.conversation
+    assert (restored.understood_count, restored.current_phase) == (2, "inferential")
+
+
+# ---------------------------------------------------------------------------
+# Conversation buffer / story table
+# ---------------------------------------------------------------------------
+
+def test_conversation_keeps_first_turn_and_latest_turns():
+    conversation, legacy = Conversation(capacity=4), []
+    for i in range(11):
+        turn = ("ai" if i % 2 == 0 else "student", f"t{i}")
+        conversation.append(*turn)
+        # previous policy: keep first turn + last capacity-1 turns
+        legacy.append(turn)
+        if len(legacy) > 4:
+            legacy = [legacy[0]] + legacy[-3:]
+        assert list(conversation) == legacy
+    assert len(conversation) == 4
+
+
+def test_conversation_copy_is_independent():
+    conversation = Conversation([("ai", "q1"), ("student", "a1")], capacity=3)
+    copy = conversation.copy()
+    copy.append("ai", "q2")
+    copy.append("student", "a2")
+    assert list(conversation) == [("ai", "q1"), ("student", "a1")]
+    assert list(copy) == [("ai", "q1"), ("ai", "q2"), ("student", "a2")]
+
+
+def test_conversation_copy_shares_turns_until_written():
+    conversation = Conversation([("ai", "q1"), ("student", "a1"), ("ai", "q2")], capacity=3)
+    copy = conversation.copy()
+    assert copy._ring is conversation._ring
+    conversation.append("student", "a2")
+    assert copy._ring is not conversation._ring
+    assert list(copy) == [("ai", "q1"), ("student", "a1"), ("ai", "q2")]
+    assert list(conversation) == [("ai", "q1"), ("ai", "q2"), ("student", "a2")]
+
+
+def test_story_table_interns_one_story_per_text():
+    table = StoryTable(keep_recent=1)
+    first = table.intern("揠苗助長", "".join(["農夫", "拔禾苗。"]))
+    second = table.intern("揠苗助長", "農夫拔禾苗。")
+    assert first is second
+    assert table.get(first.key) is first
+    assert first.paragraphs == ("農夫拔禾苗。",)
+    table.intern("守株待兔", "農夫等兔子。")        # pushes the first story out of keep_recent
+    key = first.key
+    del first, second
+    assert table.get(key) is None                      # no session references it any more
+
+
+# ---------------------------------------------------------------------------
+# Both backends
+# ---------------------------------------------------------------------------
+
+def test_save_and_get(store):
+    state = _state(mispronounced_words=["禾"])
+    asyncio.run(store.save(state))
+    loaded = asyncio.run(store.get("s1"))
+    assert loaded == state
+    assert loaded.version == 1
+    assert asyncio.run(store.get("missing")) is None
+
+
+def test_unsaved_changes_are_not_shared(store):
+    asyncio.run(store.save(_state()))
+    loaded = asyncio.run(store.get("s1"))
+    loaded.conversation.append("student", "農夫")
+    assert list(asyncio.run(store.get("s1")).conversation) == []
+
+
+def test_concurrent_update_conflicts(store):
+    asyncio.run(store.save(_state()))
+    first = asyncio.run(store.get("s1"))
+    second = asyncio.run(store.get("s1"))
+    first.understood_count = 1
+    asyncio.run(store.save(first))
+    second.understood_count = 2
+    with pytest.raises(SessionConflictError):
+        asyncio.run(store.save(second))
+    assert asyncio.run(store.get("s1")).understood_count == 1
+
+
+def test_new_state_replaces_existing_session(store):
+    asyncio.run(store.save(_state(understood_count=3)))
+    asyncio.run(store.save(_state()))
+    assert asyncio.run(store.get("s1")).understood_count == 0
+
+
+def test_exclusive_save_does_not_replace_a_session(store):
+    asyncio.run(store.save(_state(understood_count=3)))
+    with pytest.raises(SessionConflictError):
+        asyncio.run(store.save(_state(), exclusive=True))
+    assert asyncio.run(store.get("s1")).understood_count == 3
+    asyncio.run(store.save(asyncio.run(store.get("s1")).fork("s2"), exclusive=True))
+    assert asyncio.run(store.get("s2")).understood_count == 3
+
+
+def test_forked_session_is_independent(store):
+    asyncio.run(store.save(_state(understood_count=2, conversation=Conversation([("ai", "q1")]))))
+    fork = asyncio.run(store.get("s1")).fork("s2")
+    assert fork.version == 0
+    fork.conversation.append("student", "a1")
+    asyncio.run(store.save(fork))
+    assert list(asyncio.run(store.get("s1")).conversation) == [("ai", "q1")]
+    assert asyncio.run(store.get("s2")).understood_count == 2
+    assert asyncio.run(store.get("s2")).conversation == fork.conversation
+
+
+def test_sessions_expire_after_idle_ttl(store, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    asyncio.run(store.save(_state()))
+    now[0] += store.TTL_SECONDS - 1
+    assert asyncio.run(store.get("s1")) is not None       # access refreshes the TTL
+    now[0] += store.TTL_SECONDS - 1
+    assert asyncio.run(store.get("s1")) is not None
+    now[0] += store.TTL_SECONDS + 1
+    assert asyncio.run(store.get("s1")) is None
+
+
+def test_rate_limit(store):
+    results = [asyncio.run(store.check_rate_limit("s1")) for _ in range(store.RATE_LIMIT + 1)]
+    assert results[:-1] == [False] * store.RATE_LIMIT
+    assert results[-1] is True
+    assert asyncio.run(store.check_rate_limit("s2")) is False
+
+
+# ---------------------------------------------------------------------------
+# Redis specifics
+# ---------------------------------------------------------------------------
+
+def test_memory_store_purges_only_expired_sessions(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    store = MemorySessionStore()
+    for i in range(100):
+        asyncio.run(store.save(SessionState(session_id=f"s{i}", story=story_table.intern("", ""))))
+        now[0] += 1
+    for _ in range(500):                                   # refreshes must not grow the heap unbounded
+        asyncio.run(store.get("s0"))
+    assert len(store._expiry_heap) <= 2 * len(store) + 64
+    now[0] = 1_000_000.0 + store.TTL_SECONDS + 49.5      # s1..s49 are idle past their TTL
+    assert store.purge_expired() == 49
+    assert len(store) == 51
+    assert asyncio.run(store.get("s0")) is not None
+
+
+def test_redis_session_key_ttl_is_refreshed_on_access():
+    redis = FakeRedis()
+    store = RedisSessionStore(redis)
+    asyncio.run(store.save(_state()))
+    key = SESSION_KEY_PREFIX + "s1"
+    redis.expires_at[key] = time.time() + 5
+    asyncio.run(store.get("s1"))
+    assert redis.expires_at[key] == pytest.approx(time.time() + RedisSessionStore.TTL_SECONDS, abs=5)
+
+
+def test_redis_story_is_stored_once_and_reloaded():
+    redis = FakeRedis()
+    store = RedisSessionStore(redis)
+    for i in range(3):
+        asyncio.run(store.save(SessionState(
+            session_id=f"s{i}", story=story_table.intern("揠苗助長", "農夫拔禾苗。")
+        )))
+    story = story_table.intern("揠苗助長", "農夫拔禾苗。")
+    assert redis.revisions[STORY_KEY_PREFIX + story.key] == 1
+    assert "農夫拔禾苗".encode() not in redis.data[SESSION_KEY_PREFIX + "s0"]
+
+    # another worker that has never seen the story
+    story_key = story.key
+    story_table.clear()
+    del story
+    loaded = asyncio.run(RedisSessionStore(redis).get("s1"))
+    assert loaded.story.key == story_key
+    assert loaded.story_text == "農夫拔禾苗。"
+
+
+def test_redis_story_outlives_a_session_kept_alive_by_reads(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    redis = FakeRedis()
+    asyncio.run(RedisSessionStore(redis).save(_state()))
+    story_key = STORY_KEY_PREFIX + _state().story.key
+    reader = RedisSessionStore(redis)                          # another worker, only reads the session
+    for _ in range(5):
+        now[0] += RedisSessionStore.TTL_SECONDS * 0.9
+        assert asyncio.run(reader.get("s1")) is not None
+    assert redis._live(story_key) is not None
+    assert redis.expires_at[story_key] >= redis.expires_at[SESSION_KEY_PREFIX + "s1"]
+
+    del redis.data[story_key]                                  # evicted: rewritten from the story table
+    for _ in range(2):
+        now[0] += RedisSessionStore.TTL_SECONDS * 0.9
+        asyncio.run(reader.get("s1"))
+    assert redis._live(story_key) is not None
+
+
+def test_session_continues_on_another_worker(monkeypatch):
+    """Two workers share Redis: start on one, answer on the other."""
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    redis = FakeRedis()
+    client = FakeClient(text=json.dumps(
+        {"understood": True, "feedback": "很好！", "question": "農夫為什麼要拔禾苗？", "phase": "factual"},
+        ensure_ascii=False,
+    ))
+    ai_service.init_client(client)
+    agent = SocraticAgent()
+    try:
+        monkeypatch.setattr(agent_module, "_store", RedisSessionStore(redis))
+        asyncio.run(agent.start_session("w1", "揠苗助長", "農夫拔禾苗。"))
+        monkeypatch.setattr(agent_module, "_store", RedisSessionStore(redis))
+        response = asyncio.run(agent.process_answer("w1", "農夫把禾苗拔高"))
+    finally:
+        asyncio.run(ai_service.close_client())
+    assert response.understood_count == 1
+    stored = load_state(redis.data[SESSION_KEY_PREFIX + "w1"])
+    assert stored.version == 2
+    assert [role for role, _ in stored.conversation] == ["ai", "student", "ai"]
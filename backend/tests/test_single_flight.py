@@ -0,0 +1,160 @@
+"""
+Tests for backend/app/services/single_flight.py and its use by SocraticAgent
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.config import settings
+from app.services import ai_service, socratic_agent as agent_module
+from app.services.metrics import metrics
+from app.services.session_store import MemorySessionStore
+from app.services.single_flight import KeyedLock, SingleFlight
+from app.services.socratic_agent import SocraticAgent
+from tests.fakes import FakeClient
+
+
+# ---------------------------------------------------------------------------
+# SingleFlight / KeyedLock
+# ---------------------------------------------------------------------------
+
+def test_concurrent_calls_with_one_key_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("a", lambda: work("a")),
+            flight.do("a", lambda: work("a")),
+            flight.do("b", lambda: work("b")),
+        )
+
+    first, duplicate, other = asyncio.run(run())
+    assert calls == ["a", "b"]
+    assert first == duplicate
+    assert len(flight) == 0
+
+
+def test_errors_are_shared_and_cancelled_leader_is_taken_over():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def shared_error():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    assert [type(r) for r in asyncio.run(shared_error())] == [ValueError, ValueError]
+
+    async def leader_cancelled():
+        leader = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(1, "leader")))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(0, "follower")))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(leader_cancelled()) == "follower"
+    assert len(flight) == 0
+
+
+def test_keyed_lock_serializes_one_key_and_is_dropped_when_idle():
+    locks = KeyedLock()
+    order = []
+
+    async def hold(key, name):
+        async with locks(key):
+            order.append(f"{name}+")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-")
+
+    async def run():
+        await asyncio.gather(hold("s1", "a"), hold("s1", "b"), hold("s2", "c"))
+
+    asyncio.run(run())
+    assert order.index("a-") < order.index("b+")         # s1 took turns
+    assert order.index("c+") < order.index("a-")         # s2 did not wait for s1
+    assert len(locks) == 0
+
+
+# ---------------------------------------------------------------------------
+# SocraticAgent
+# ---------------------------------------------------------------------------
+
+EVALUATION = json.dumps(
+    {"understood": True, "feedback": "很好！", "question": "農夫為什麼要拔禾苗？", "phase": "factual"},
+    ensure_ascii=False,
+)
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(settings, "response_cache_backend", "none")
+    monkeypatch.setattr(settings, "context_cache_enabled", False)
+    monkeypatch.setattr(agent_module, "_store", MemorySessionStore())
+    metrics.reset()
+    yield SocraticAgent()
+    asyncio.run(ai_service.close_client())
+
+
+def _answer_concurrently(agent: SocraticAgent, client: FakeClient, *answers: str):
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "揠苗助長", "農夫拔禾苗。")
+        before = client.calls
+        results = await asyncio.gather(*(agent.process_answer("s1", a) for a in answers))
+        return results, client.calls - before, await agent_module._store.get("s1")
+    return asyncio.run(run())
+
+
+def test_duplicate_submissions_share_one_model_call(agent):
+    client = FakeClient(delay=0.05, text=EVALUATION)
+    (first, retry, tap), model_calls, state = _answer_concurrently(
+        agent, client, "農夫把禾苗拔高", "農夫把禾苗拔高", " 農夫把禾苗拔高 "
+    )
+    assert model_calls == 1
+    assert first == retry == tap
+    assert state.total_attempts == 1
+    assert [role for role, _ in state.conversation].count("student") == 1
+    assert metrics.get("socratic.coalesced") == 2
+
+
+def test_different_answers_for_one_session_are_serialized(agent):
+    client = FakeClient(delay=0.05, text=EVALUATION)
+    results, model_calls, state = _answer_concurrently(agent, client, "農夫把禾苗拔高", "禾苗都枯死了")
+    assert model_calls == 2
+    assert client.max_in_flight == 1
+    assert state.total_attempts == 2
+    assert state.understood_count == 2                    # neither save lost to a version conflict
+    assert [r.understood_count for r in results] == [1, 2]
+
+
+def test_duplicate_of_a_streamed_answer_gets_its_result(agent):
+    client = FakeClient(delay=0.05, text=EVALUATION)
+
+    async def run():
+        ai_service.init_client(client)
+        await agent.start_session("s1", "揠苗助長", "農夫拔禾苗。")
+        before = client.calls
+        stream = await agent.stream_answer("s1", "農夫把禾苗拔高")
+        duplicate = asyncio.create_task(agent.process_answer("s1", "農夫把禾苗拔高"))
+        events = [event async for event in stream]
+        return events, await duplicate, client.calls - before
+
+    events, duplicate, model_calls = asyncio.run(run())
+    assert events[-1] == ("result", duplicate)
+    assert model_calls == 1
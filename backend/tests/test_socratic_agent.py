@@ -0,0 +1,161 @@
+"""
+Tests for backend/app/services/socratic_agent.py
+
+Run with:  cd backend && pytest tests/ -v
+"""
+import sys
+import os
+import gc
+import weakref
+
+import pytest
+
+# Allow running pytest from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.routes.stories import MOCK_STORIES
+from app.services import socratic_agent as agent_module
+from app.services.session_store import SessionState
+from app.services.socratic_agent import SocraticAgent, _story_block
+from app.services.story_table import StoryTable, story_table
+
+
+# ---------------------------------------------------------------------------
+# System prompt
+# ---------------------------------------------------------------------------
+
+def legacy_system_prompt(state: SessionState, required: int = SocraticAgent.REQUIRED_UNDERSTOOD) -> str:
+    """_build_system_prompt() before the static prefix was cached."""
+    paragraphs = state.story_text.split("\n")
+    numbered_text = "\n".join(
+        f"[第{i}段] {p}" for i, p in enumerate(paragraphs) if p.strip()
+    )
+
+    # Build reading info section if data is available (Issue #17)
+    reading_info = ""
+    if state.mispronounced_words or state.accuracy is not None or state.cpm is not None:
+        reading_info = "\n學生朗讀資訊：\n"
+        if state.accuracy is not None:
+            reading_info += f"- 正確率：{state.accuracy:.1f}%\n"
+        if state.cpm is not None:
+            reading_info += f"- 語速：{state.cpm:.0f} 字/分鐘\n"
+        if state.mispronounced_words:
+            reading_info += f"- 讀錯的字：{', '.join(state.mispronounced_words)}\n"
+        reading_info += "→ 提問時可以特別關注這些字相關的段落和內容\n"
+
+    return f"""你是一位溫暖、鼓勵學生的繁體中文閱讀助教，擅長用蘇格拉底式問答引導學生深入理解課文。
+
+課文標題：{state.story_title}
+
+課文內容（每段前標有段落索引）：
+{numbered_text}
+{reading_info}
+你的任務：
+1. 評估學生的回答是否展現了對問題的理解
+2. 給予簡短、溫暖的回饋（1-2句）
+3. 提出下一個蘇格拉底式問題，問題必須緊扣課文的關鍵內容
+
+提問品質要求：
+- 問題必須針對課文的核心訊息、角色動機、或重要細節，不要問太表面的問題
+- factual 階段：聚焦課文中最重要的事件或細節，而非瑣碎資訊
+- inferential 階段：引導學生思考因果關係、角色心理、或作者意圖
+- evaluative 階段：讓學生連結自身經驗，表達對課文主題的看法
+- 每個問題應指向課文中特定的段落或句子，幫助學生深入閱讀
+- 不要重複問過的問題，每題都應該引導學生看到課文的新面向
+
+評估規則：
+- understood = true 的條件：學生的回答包含問題要求的**關鍵資訊**，且資訊正確
+- understood = false 的條件：回答缺少關鍵資訊、資訊錯誤、太模糊籠統、或敷衍
+- 「方向正確但不精確」不算理解。例如：問「玉山的稱號是什麼？」回答「高山」→ false（太籠統，沒有說出「東北亞第一高峰」）
+- 學生必須展現他**讀過並理解課文**，而非只是用常識猜測。如果答案可以不看課文就說出來，要特別嚴格判斷
+- 數字必須精確：課文說「四千公尺」，回答「400」或「300」→ false（差距太大）
+- 數字容許小幅誤差：「將近四千」回答「3952」或「大約四千」→ true
+- 人名、地名、專有名詞必須正確，不可張冠李戴
+- 如果 understood = false，用不同方式重新問同一層次的問題（換個角度或給提示）
+- 如果 understood = true，進入下一個層次的問題
+- 當 understood=false 時，在 referenced_paragraph 填入答案所在段落的索引（從 0 開始）
+- 當 understood=true 時，referenced_paragraph 設為 null
+
+偵測敷衍回答：
+- 如果學生回答「不知道」「不懂」「隨便」「沒有」等敷衍詞 → understood = false
+- 回饋時不要責備，而是用更具體的提示引導，例如：「沒關係！讓我給你一個提示：看看第X段，作者提到了……你覺得這代表什麼？」
+- 如果學生連續敷衍，縮小問題範圍，給更明確的選項式提示（例如：「你覺得主角是開心還是難過？從哪裡可以看出來？」）
+- 如果學生的回答只有1-2個字且與課文無關 → understood = false，給予鼓勵並提供具體線索
+
+問題層次（由淺入深）：
+- factual：事實性問題（誰、什麼、在哪裡、發生什麼事）— 理解計數 1-2
+- inferential：推論性問題（為什麼、怎麼會這樣、有什麼影響）— 理解計數 3-4
+- evaluative：評估性問題（你覺得、如果是你、這個故事告訴我們什麼）— 理解計數 5
+
+目前階段：{state.current_phase}
+學生已理解的問題數：{state.understood_count}/{required}
+
+回饋風格：
+- 語氣溫暖、友善，適合小學高年級至國中生
+- 只用繁體中文
+- 回饋要簡短（1-2句），然後直接問下一個問題
+- 問題長度：15-40 個字"""
+
+
+STORIES = [(s["title"], "\n".join(s["content"])) for s in MOCK_STORIES] + [
+    ("空段落", "第一段。\n\n  \n第四段。"),
+]
+
+READINGS = [
+    {},
+    {"accuracy": 87.25},
+    {"cpm": 152.6},
+    {"mispronounced_words": []},
+    {"mispronounced_words": ["禾", "苗"], "accuracy": 0.0, "cpm": 0.0},
+]
+
+
+@pytest.mark.parametrize("title,text", STORIES)
+@pytest.mark.parametrize("reading", READINGS)
+def test_system_prompt_is_byte_identical_to_uncached_builder(title, text, reading):
+    agent = SocraticAgent()
+    state = SessionState(session_id="s1", story=story_table.intern(title, text), **reading)
+    for phase, count in (("factual", 0), ("inferential", 2), ("evaluative", 4)):
+        state.current_phase, state.understood_count = phase, count
+        prompt = agent._build_system_prompt(state)
+        assert prompt.encode("utf-8") == legacy_system_prompt(state).encode("utf-8")
+
+
+def test_static_prefix_is_shared_across_turns_and_sessions():
+    agent = SocraticAgent()
+    story = story_table.intern(*STORIES[0])
+    first = SessionState(session_id="a", story=story, mispronounced_words=["禾"])
+    second = SessionState(session_id="b", story=story, mispronounced_words=["禾"],
+                          current_phase="evaluative", understood_count=4)
+    prefix_a, suffix_a = agent._system_prompt_parts(first)
+    prefix_b, suffix_b = agent._system_prompt_parts(second)
+    assert prefix_a is prefix_b
+    assert suffix_a != suffix_b
+    assert "目前階段" not in prefix_a and "目前階段：evaluative" in suffix_b
+
+
+def test_static_prefix_is_keyed_on_the_printed_reading_numbers():
+    agent = SocraticAgent()
+    story = story_table.intern(*STORIES[0])
+    first = SessionState(session_id="a", story=story, accuracy=91.52, cpm=180.2)
+    second = SessionState(session_id="b", story=story, accuracy=91.48, cpm=179.9)
+    assert agent._system_prompt_parts(first)[0] is agent._system_prompt_parts(second)[0]
+
+
+def test_cached_prompts_do_not_keep_stories_alive(monkeypatch):
+    table = StoryTable(keep_recent=0)
+    monkeypatch.setattr(agent_module, "story_table", table)
+    agent = SocraticAgent()
+    state = SessionState(session_id="a", story=table.intern("短暫", "只讀一次的故事。"), accuracy=90.0)
+    agent._build_system_prompt(state)
+    ref = weakref.ref(state.story)
+    del state
+    gc.collect()
+    assert ref() is None
+
+
+def test_story_block_counts_non_empty_paragraphs():
+    story = story_table.intern(*STORIES[-1])
+    numbered, count = _story_block(story)
+    assert count == 2
+    assert numbered == "[第0段] 第一段。\n[第3段] 第四段。"
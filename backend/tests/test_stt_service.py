@@ -5,6 +5,7 @@ Run with:  cd backend && pytest tests/ -v
 """
 import sys
 import os
+import random
 
 # Allow running pytest from the repo root
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -13,8 +14,21 @@ from app.services.stt_service import (
     correct_homophones,
     compute_match_rate,
     evaluate_reading,
+    evaluate_reading_batch,
     is_homophone,
     get_pinyin,
+    pinyin_class,
+    pinyin_classes,
+    write_pinyin_table,
+    _compile_pinyin_table,
+    _load_pinyin_table,
+    _PreparedTargetCache,
+    StreamingReadingEvaluator,
+    CharacterErrorRecord,
+    clear_target_cache,
+    extract_character_errors,
+    prepare_target,
+    target_cache_info,
 )
 
 
@@ -46,6 +60,34 @@ def test_is_homophone_different():
     assert is_homophone("好", "壞") is False
 
 
+def test_is_homophone_unknown_chars():
+    assert is_homophone("ß", "a") is False
+    assert is_homophone("ab", "和") is False
+
+
+def test_pinyin_class_ids():
+    assert pinyin_class("和") == pinyin_class("禾") != 0
+    assert pinyin_class("好") != pinyin_class("壞")
+    assert pinyin_class("ß") == 0
+    assert list(pinyin_classes("和禾ß")) == [pinyin_class("和")] * 2 + [0]
+
+
+def test_pinyin_table_roundtrip(tmp_path):
+    path = tmp_path / "pinyin_classes.bin"
+    write_pinyin_table(path)
+    assert _load_pinyin_table(path) == _compile_pinyin_table()
+
+
+def test_pinyin_table_rejects_bad_file(tmp_path):
+    path = tmp_path / "pinyin_classes.bin"
+    assert _load_pinyin_table(path) is None          # missing
+    write_pinyin_table(path)
+    data = bytearray(path.read_bytes())
+    data[4] ^= 0xFF                                  # corrupt fingerprint
+    path.write_bytes(bytes(data))
+    assert _load_pinyin_table(path) is None
+
+
 # ---------------------------------------------------------------------------
 # correct_homophones
 # ---------------------------------------------------------------------------
@@ -164,3 +206,157 @@ def test_evaluate_reading_returns_corrected_field():
     result = evaluate_reading("禾", "和")
     assert "corrected" in result
     assert result["corrected"] == "和"
+
+
+# ---------------------------------------------------------------------------
+# character errors
+# ---------------------------------------------------------------------------
+
+def test_extract_character_errors_all_types():
+    # 大 replaces 夫, 去 is skipped, 和 is a homophone of 禾, 啊 is extra
+    errors = extract_character_errors("農大每天田裡和苗長高了啊", "農夫每天去田裡，禾苗長高了。")
+    assert errors == [
+        CharacterErrorRecord("substitution", "夫", "大", 1, 1),
+        CharacterErrorRecord("omission", "去", None, 4, -1),
+        CharacterErrorRecord("homophone", "禾", "和", 7, 6),
+        CharacterErrorRecord("insertion", "啊", "啊", 12, 11),
+    ]
+
+
+def test_extract_character_errors_use_the_reference_pairing():
+    # Prefix stripping would pair the first 衣 and report the second as extra.
+    assert extract_character_errors("衣衣十得", "衣我是") == [
+        CharacterErrorRecord("insertion", "衣", "衣", 0, 0),
+        CharacterErrorRecord("substitution", "我", "十", 1, 2),
+        CharacterErrorRecord("substitution", "是", "得", 2, 3),
+    ]
+
+
+def test_extract_character_errors_perfect_reading():
+    assert extract_character_errors("農夫每天", "農夫，每天。") == []
+
+
+def test_extract_character_errors_empty_sides():
+    assert [e.error_type for e in extract_character_errors("", "農夫")] == ["omission"] * 2
+    assert [e.error_type for e in extract_character_errors("農夫", "。")] == ["insertion"] * 2
+
+
+def test_evaluate_reading_with_errors_keeps_result():
+    target = "古時候有一個農夫，他每天都去田裡看禾苗長高了沒有。"
+    for spoken in ("古時候有一個農夫他每天都去田裡看和苗", "蘋果香蕉", "", target.replace("，", "")[:-1]):
+        detailed = evaluate_reading(spoken, target, with_errors=True)
+        errors = detailed.pop("errors")
+        assert detailed == evaluate_reading(spoken, target)
+        assert errors == extract_character_errors(spoken, target)
+
+
+def test_evaluate_reading_batch_with_errors():
+    pairs = [("禾", "和"), ("禾", "和"), ("農", "農夫")]
+    results = evaluate_reading_batch(pairs, with_errors=True)
+    assert results == [evaluate_reading(s, t, with_errors=True) for s, t in pairs]
+    results[0]["errors"].clear()
+    assert len(results[1]["errors"]) == 1
+
+
+# ---------------------------------------------------------------------------
+# evaluate_reading_batch
+# ---------------------------------------------------------------------------
+
+def test_evaluate_reading_batch_matches_single_calls():
+    target = "古時候有一個農夫，他每天都去田裡看禾苗長高了沒有。"
+    pairs = [
+        ("古時候有一個農夫他每天都去田裡看禾苗長高了沒有", target),
+        ("古時候有一個農夫他每天都去田裡看和苗", target),
+        ("蘋果香蕉", target),
+        ("禾", "和"),
+        ("", target),
+        ("古時候有一個農夫他每天都去田裡看和苗", target),  # duplicate pair
+    ]
+    assert evaluate_reading_batch(pairs) == [evaluate_reading(s, t) for s, t in pairs]
+
+
+def test_evaluate_reading_batch_results_are_independent():
+    results = evaluate_reading_batch([("禾", "和"), ("禾", "和")])
+    results[0]["corrected"] = "changed"
+    assert results[1]["corrected"] == "和"
+
+
+def test_evaluate_reading_batch_empty():
+    assert evaluate_reading_batch([]) == []
+
+
+# ---------------------------------------------------------------------------
+# prepared-target cache
+# ---------------------------------------------------------------------------
+
+def test_prepare_target_contents():
+    prepared = prepare_target("有12棵禾苗。")
+    assert prepared.normalized == "有十二棵禾苗"
+    assert prepared.counts["禾"] == 1
+    assert len(prepared.classes) == len(prepared.normalized)
+
+
+def test_prepare_target_counts_hits_and_misses():
+    clear_target_cache()
+    evaluate_reading("農夫", "農夫每天去田裡")
+    evaluate_reading("農夫每天", "農夫每天去田裡")
+    info = target_cache_info()
+    assert info["misses"] == 1
+    assert info["hits"] == 1
+    assert info["size"] == 1
+
+
+def test_prepared_target_cache_evicts_least_recently_used():
+    cache = _PreparedTargetCache(maxsize=2)
+    cache.get("甲")
+    cache.get("乙")
+    cache.get("甲")          # 甲 is now most recently used
+    cache.get("丙")          # evicts 乙
+    cache.get("甲")
+    info = cache.info()
+    assert info["evictions"] == 1
+    assert info["size"] == 2
+    assert info["hits"] == 2
+    assert info["misses"] == 3
+
+
+# ---------------------------------------------------------------------------
+# StreamingReadingEvaluator
+# ---------------------------------------------------------------------------
+
+def test_streaming_evaluator_matches_full_evaluation():
+    target = "古時候有一個農夫，他每天都去田裡看禾苗長高了沒有。"
+    spoken = "古時候有一個農夫他每天都去田裡看和苗長搞了沒有"
+    evaluator = StreamingReadingEvaluator(target)
+    for end in range(0, len(spoken) + 1, 3):
+        evaluator.update(spoken[:end])
+        assert evaluator.result() == evaluate_reading(spoken[:end], target)
+    assert evaluator.update(spoken) == evaluate_reading(spoken, target)
+
+
+def test_streaming_evaluator_handles_revised_interim_results():
+    target = "農夫每天去田裡"
+    evaluator = StreamingReadingEvaluator(target)
+    evaluator.append("農夫每田")
+    result = evaluator.update("農夫每天去")     # STT revised its guess
+    assert evaluator.transcript == "農夫每天去"
+    assert result == evaluate_reading("農夫每天去", target)
+
+
+def test_streaming_evaluator_empty_transcript():
+    evaluator = StreamingReadingEvaluator("農夫")
+    assert evaluator.result() == evaluate_reading("", "農夫")
+
+
+def test_streaming_evaluator_matches_full_evaluation_on_random_revisions():
+    rng = random.Random(7)
+    alphabet = "農夫每天去田裡看禾苗和長高搞了沒有，。12"
+    for _ in range(200):
+        target = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        evaluator = StreamingReadingEvaluator(target)
+        transcript = ""
+        for _ in range(8):
+            if transcript and rng.random() < 0.3:
+                transcript = transcript[:rng.randint(0, len(transcript))]
+            transcript += "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6)))
+            assert evaluator.update(transcript) == evaluate_reading(transcript, target)
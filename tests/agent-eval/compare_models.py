@@ -2,14 +2,38 @@
 """
 Direct model comparison: gemini-2.0-flash vs gemini-2.5-flash-preview
 Tests the same prompt + schema + input against both models locally.
+
+Reports accuracy and call latency (p50 / p95) per model. With --routed, each
+answer is routed like the backend does: an obvious non-answer is judged
+locally without a model call (the local route, see
+backend/app/services/answer_screen.py), any other answer goes to the model
+the router picks for it (see backend/app/services/model_router.py; set
+GEMINI_FAST_MODEL to enable the fast route). Accuracy covers every route
+and latency is reported per route.
+
+Usage:
+    python3 tests/agent-eval/compare_models.py [--models gemini-2.5-flash gemini-2.5-flash-lite]
+    GEMINI_FAST_MODEL=gemini-2.5-flash-lite python3 tests/agent-eval/compare_models.py --routed
 """
 
+import argparse
 import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
 from google import genai
 from google.genai import types as genai_types
 
-client = genai.Client(vertexai=True, project="lingoleap-dev", location="us-central1")
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from app.config import settings  # noqa: E402
 
+client = genai.Client(vertexai=True, project=settings.gemini_project, location=settings.gemini_location)
+
+STORY_TITLE = "神祕的玉山"
 STORY = """玉山是台灣最高的一座山，也是東北亞的第一高峰。它的高度將近四千公尺，山頂在冬天時常會覆蓋著白雪。
 玉山擁有豐富的生態環境，可以看到許多特有的植物。保護這片美麗的山林，是我們每一個人的責任。"""
 
@@ -91,37 +115,58 @@ MODELS = [
     "gemini-2.5-flash",
 ]
 
+QUESTION = "課文提到玉山的高度，請問玉山大約有多高呢？"
+
 
 def build_contents(student_answer: str) -> list[genai_types.Content]:
     return [
         genai_types.Content(role="user", parts=[genai_types.Part(text="請開始提問。")]),
-        genai_types.Content(role="model", parts=[genai_types.Part(text="課文提到玉山的高度，請問玉山大約有多高呢？")]),
+        genai_types.Content(role="model", parts=[genai_types.Part(text=QUESTION)]),
         genai_types.Content(role="user", parts=[genai_types.Part(text=student_answer)]),
     ]
 
 
-def test_model(model_name: str):
+def latency_summary(latencies: list[float]) -> str:
+    if not latencies:
+        return "no successful calls"
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered) * 1000:.0f}ms  p95 {p95 * 1000:.0f}ms  (n={len(ordered)})"
+
+
+def test_model(model_name: str, pick_route=None):
+    """
+    Run TEST_CASES on `model_name`, or on the model pick_route(answer)
+    returns; a model of None means the answer is judged locally (not understood).
+    """
     print(f"\n{'='*50}")
     print(f"  MODEL: {model_name}")
     print(f"{'='*50}")
 
     passed = 0
     total = len(TEST_CASES)
+    latencies: dict[str, list[float]] = defaultdict(list)
 
     for answer, expected, note in TEST_CASES:
+        route, model = (model_name, model_name) if pick_route is None else pick_route(answer)
         try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=build_contents(answer),
-                config=genai_types.GenerateContentConfig(
-                    system_instruction=SYSTEM_PROMPT,
-                    response_mime_type="application/json",
-                    response_schema=SCHEMA,
-                    max_output_tokens=1024,
-                    temperature=0.7,
-                ),
-            )
-            raw = response.text
+            start = time.perf_counter()
+            if model is None:
+                raw = json.dumps({"understood": False})
+            else:
+                raw = client.models.generate_content(
+                    model=model,
+                    contents=build_contents(answer),
+                    config=genai_types.GenerateContentConfig(
+                        system_instruction=SYSTEM_PROMPT,
+                        response_mime_type="application/json",
+                        response_schema=SCHEMA,
+                        max_output_tokens=1024,
+                        temperature=0.7,
+                    ),
+                ).text
+            latency = time.perf_counter() - start
+            latencies[route].append(latency)
             try:
                 result = json.loads(raw)
                 actual = result.get("understood")
@@ -130,7 +175,8 @@ def test_model(model_name: str):
                     passed += 1
                 icon = "  " if ok else ">>"
                 status = "PASS" if ok else "FAIL"
-                print(f"  {icon} {status} | '{answer}' → {actual} (expected {expected}) — {note}")
+                print(f"  {icon} {status} | '{answer}' → {actual} (expected {expected}) — {note}"
+                      f"  [{route}, {latency * 1000:.0f}ms]")
             except json.JSONDecodeError as je:
                 print(f"  >> JSON_ERR | '{answer}' — {je}")
                 print(f"     RAW: {raw[:300]}")
@@ -138,9 +184,31 @@ def test_model(model_name: str):
             print(f"  >> ERROR | '{answer}' → {e}")
 
     pct = passed / total * 100
-    print(f"\n  Result: {passed}/{total} ({pct:.0f}%)\n")
+    print(f"\n  Result: {passed}/{total} ({pct:.0f}%)")
+    for route, samples in latencies.items():
+        print(f"  Latency [{route}]: {latency_summary(samples)}")
+    print()
+
+
+def routed(answer: str) -> tuple[str, str | None]:
+    from app.services.answer_screen import screen_answer
+    from app.services.model_router import LOCAL_ROUTE, route_answer
+    from app.services.story_table import story_table
+
+    if screen_answer(answer, story_table.intern(STORY_TITLE, STORY), QUESTION) is not None:
+        return LOCAL_ROUTE, None
+    route = route_answer(answer)
+    return f"{route.name}: {route.model}", route.model
 
 
 if __name__ == "__main__":
-    for model in MODELS:
-        test_model(model)
+    parser = argparse.ArgumentParser(description="Compare models on the Socratic evaluation prompt")
+    parser.add_argument("--models", nargs="+", default=MODELS)
+    parser.add_argument("--routed", action="store_true", help="route each answer like the backend does")
+    args = parser.parse_args()
+
+    if args.routed:
+        test_model("routed", pick_route=routed)
+    else:
+        for model in args.models:
+            test_model(model)
@@ -5,21 +5,43 @@ Agent Accuracy Eval Runner
 Runs test suites against a live backend to measure LLM agent accuracy.
 Test data lives in JSON files alongside this script.
 
+Cases and runs are scheduled --concurrency at a time (default 1, one after
+another). Besides accuracy, each suite reports wall time, requests/s and
+the latency percentiles of the individual API calls.
+
+Run i of every case forks its session from one warmed-up session for run i
+(POST /api/comprehension/sessions/fork) instead of replaying the warmup
+answers, so warmup costs `--runs` sessions per suite instead of one per
+case and run. Against a backend without the fork endpoint, or with
+--no-fork, every case sets up its own session as before.
+
+With --local the backend runs in-process with the model stubbed: the stub
+answers each student answer with the suite's expected verdict after
+--model-ms (±50%), so a run needs no network or credentials. Accuracy is
+then a check of the pipeline around the model (e.g. answers the local
+screen judges wrongly), not of the model.
+
 Usage:
     python3 tests/agent-eval/run_eval.py --suite tests/agent-eval/socratic-eval.json --api-base https://...
     python3 tests/agent-eval/run_eval.py --all --api-base https://...
     python3 tests/agent-eval/run_eval.py --suite ... --api-base ... --runs 3  # majority vote
+    python3 tests/agent-eval/run_eval.py --suite ... --api-base ... --runs 3 --concurrency 8
+    python3 tests/agent-eval/run_eval.py --all --local --runs 3 --concurrency 16
+    python3 tests/agent-eval/run_eval.py --all --local --runs 3 --concurrency 16 --no-fork
 """
 
 import argparse
 import asyncio
+import contextlib
 import json
 import re
 import sys
 import time
 import random
+import uuid
 from collections import defaultdict
 from pathlib import Path
+from types import SimpleNamespace
 
 try:
     import aiohttp
@@ -28,22 +50,56 @@ except ImportError:
     sys.exit(1)
 
 MAX_QUESTION_RETRIES = 5  # Max session retries to get a matching question
+FORK_ENDPOINT = "/api/comprehension/sessions/fork"
+
+
+class CallStats:
+    """Latency of every API call made during a suite."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.setups = 0   # sessions started and warmed up
+        self.forks = 0    # sessions forked from a warmed-up one
+
+    def summary(self, wall):
+        n = len(self.latencies)
+        if not n:
+            return "no calls"
+        ordered = sorted(self.latencies)
+
+        def pct(q):
+            return ordered[min(n - 1, int(n * q))] * 1000
+
+        return (f"{n} requests in {wall:.1f}s ({n / wall:.1f} req/s, {self.errors} errors); "
+                f"sessions: {self.setups} warmed up, {self.forks} forked\n"
+                f"  call latency: p50 {pct(0.5):.0f}ms  p95 {pct(0.95):.0f}ms  "
+                f"p99 {pct(0.99):.0f}ms  max {ordered[-1] * 1000:.0f}ms")
+
+
+stats = CallStats()
 
 
 async def call_api(session, api_base, endpoint, payload):
     url = f"{api_base}{endpoint}"
-    async with session.post(url, json=payload) as resp:
-        if resp.status != 200:
-            text = await resp.text()
-            return {"error": f"HTTP {resp.status}: {text}"}
-        return await resp.json()
+    start = time.perf_counter()
+    try:
+        async with session.post(url, json=payload) as resp:
+            if not 200 <= resp.status < 300:
+                text = await resp.text()
+                stats.errors += 1
+                return {"error": f"HTTP {resp.status}: {text}"}
+            return await resp.json()
+    finally:
+        stats.latencies.append(time.perf_counter() - start)
 
 
 async def setup_session(session, api_base, suite):
     """Start a session + warmup. Returns (sid, last_question) or (None, error)."""
     endpoint = suite["endpoint"]
     setup = suite["setup"]
-    sid = f"eval-{int(time.time())}-{random.randint(10000, 99999)}"
+    sid = f"eval-{uuid.uuid4().hex[:12]}"
+    stats.setups += 1
 
     # Start session
     start_result = await call_api(session, api_base, endpoint, {
@@ -71,14 +127,47 @@ async def setup_session(session, api_base, suite):
     return sid, last_question
 
 
-async def run_single_case(session, api_base, suite, case):
+class WarmSessions:
+    """One warmed-up session per run that the cases of that run fork from."""
+
+    def __init__(self, api_base, suite, enabled=True):
+        self.api_base = api_base
+        self.suite = suite
+        self.enabled = enabled
+        self._setups = {}   # run -> Task[(sid, last_question)]
+
+    async def fork(self, session, run, pattern=None):
+        """A fresh (sid, last_question) forked from run `run`'s session, or None to set one up."""
+        if not self.enabled:
+            return None
+        if run not in self._setups:
+            self._setups[run] = asyncio.ensure_future(setup_session(session, self.api_base, self.suite))
+        source, last_question = await self._setups[run]
+        if source is None or (pattern is not None and not pattern.search(last_question)):
+            return None
+        sid = f"eval-{uuid.uuid4().hex[:12]}"
+        result = await call_api(session, self.api_base, FORK_ENDPOINT, {"session_id": sid, "source_session_id": source})
+        if "error" in result:
+            if result["error"].startswith(("HTTP 404: {\"detail\":\"Not Found\"}", "HTTP 405")):
+                self.enabled = False    # backend without the fork API (not a missing source session)
+            return None
+        stats.forks += 1
+        return sid, result["question"]
+
+
+async def run_single_case(session, api_base, suite, case, warm=None, run=0):
     """Run a single test case. Returns (case_id, actual, expected, passed, info)."""
     endpoint = suite["endpoint"]
     setup = suite["setup"]
     keyword = case.get("question_keyword")
+    forked = None
+    if warm is not None:
+        forked = await warm.fork(session, run, re.compile(keyword) if keyword else None)
 
+    if forked is not None:
+        sid, last_question = forked
     # If case has question_keyword, retry sessions until AI asks a matching question
-    if keyword:
+    elif keyword:
         pattern = re.compile(keyword)
         for attempt in range(MAX_QUESTION_RETRIES):
             sid, last_question = await setup_session(session, api_base, suite)
@@ -111,16 +200,41 @@ async def run_single_case(session, api_base, suite, case):
     return case["id"], actual, expected, passed, f"Q: {last_question[:30]}"
 
 
-async def run_suite(api_base, suite_path, runs=1):
+async def run_cases(api_base, suite, runs, concurrency, fork=True):
+    """Run every case `runs` times, `concurrency` at a time. Returns {case_id: [result, ...]}."""
+    semaphore = asyncio.Semaphore(concurrency)
+    warm = WarmSessions(api_base, suite, enabled=fork)
+
+    async def run_one(session, case, run):
+        async with semaphore:
+            return await run_single_case(session, api_base, suite, case, warm, run)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        jobs = [run_one(session, case, run) for case in suite["cases"] for run in range(runs)]
+        results = await asyncio.gather(*jobs)
+    by_case = defaultdict(list)
+    for result in results:
+        by_case[result[0]].append(result)
+    return by_case
+
+
+async def run_suite(api_base, suite_path, runs=1, concurrency=1, fork=True):
     """Run all cases in a suite. Returns results dict."""
+    global stats
     with open(suite_path) as f:
         suite = json.load(f)
 
     print(f"\n{'='*60}")
     print(f"  {suite['suite_name']} — {suite['description']}")
-    print(f"  {len(suite['cases'])} cases × {runs} run(s)")
+    print(f"  {len(suite['cases'])} cases × {runs} run(s), concurrency {concurrency}")
     print(f"{'='*60}\n")
 
+    stats = CallStats()
+    start = time.perf_counter()
+    by_case = await run_cases(api_base, suite, runs, concurrency, fork)
+    wall = time.perf_counter() - start
+
     # Group cases by category
     by_category = defaultdict(list)
     for case in suite["cases"]:
@@ -130,73 +244,69 @@ async def run_suite(api_base, suite_path, runs=1):
     category_stats = {}
     skipped = 0
 
-    async with aiohttp.ClientSession() as session:
-        for category, cases in sorted(by_category.items()):
-            print(f"  {category} ({len(cases)} cases)")
-            cat_passed = 0
-            cat_total = 0
-
-            for case in cases:
-                votes = []
-                last_info = ""
-                for run_i in range(runs):
-                    case_id, actual, expected, passed, info = await run_single_case(
-                        session, api_base, suite, case
-                    )
-                    votes.append(passed)
-                    last_info = info
-
-                # Handle SKIP
-                if actual == "SKIP":
-                    print(f"  ~~ SKIP | '{case['input']}' — {last_info}")
-                    skipped += 1
-                    all_results.append({
-                        "case_id": case_id,
-                        "category": category,
-                        "passed": True,  # Don't count skips as failures
-                        "skipped": True,
-                    })
-                    cat_passed += 1
-                    cat_total += 1
-                    continue
-
-                # Majority vote
-                pass_count = sum(votes)
-                final_passed = pass_count > runs / 2
-
-                if runs > 1:
-                    confidence = f" [{pass_count}/{runs}]"
-                    if pass_count == runs:
-                        stability = ""
-                    elif final_passed:
-                        stability = " FLAKY"
-                    else:
-                        stability = " FLAKY" if pass_count > 0 else ""
-                else:
-                    confidence = ""
-                    stability = ""
-
-                status = "PASS" if final_passed else "FAIL"
-                icon = "  " if final_passed else ">>"
-                note = f" — {case.get('note', '')}" if case.get("note") else ""
-                q_info = f" [{last_info}]" if not final_passed and last_info else ""
-                print(f"  {icon} {status} | '{case['input']}' → {actual} (expected {expected}){confidence}{stability}{note}{q_info}")
-
+    for category, cases in sorted(by_category.items()):
+        print(f"  {category} ({len(cases)} cases)")
+        cat_passed = 0
+        cat_total = 0
+
+        for case in cases:
+            votes = []
+            last_info = ""
+            for case_id, actual, expected, passed, info in by_case[case["id"]]:
+                votes.append(passed)
+                last_info = info
+
+            # Handle SKIP
+            if actual == "SKIP":
+                print(f"  ~~ SKIP | '{case['input']}' — {last_info}")
+                skipped += 1
                 all_results.append({
                     "case_id": case_id,
                     "category": category,
-                    "passed": final_passed,
-                    "votes": votes if runs > 1 else None,
+                    "passed": True,  # Don't count skips as failures
+                    "skipped": True,
                 })
-
-                if final_passed:
-                    cat_passed += 1
+                cat_passed += 1
                 cat_total += 1
+                continue
+
+            # Majority vote
+            pass_count = sum(votes)
+            final_passed = pass_count > runs / 2
 
-            pct = (cat_passed / cat_total * 100) if cat_total else 0
-            flag = "" if cat_passed == cat_total else "  ← FAILURES"
-            category_stats[category] = (cat_passed, cat_total, pct)
-            print(f"    subtotal: {cat_passed}/{cat_total} ({pct:.0f}%){flag}\n")
+            if runs > 1:
+                confidence = f" [{pass_count}/{runs}]"
+                if pass_count == runs:
+                    stability = ""
+                elif final_passed:
+                    stability = " FLAKY"
+                else:
+                    stability = " FLAKY" if pass_count > 0 else ""
+            else:
+                confidence = ""
+                stability = ""
+
+            status = "PASS" if final_passed else "FAIL"
+            icon = "  " if final_passed else ">>"
+            note = f" — {case.get('note', '')}" if case.get("note") else ""
+            q_info = f" [{last_info}]" if not final_passed and last_info else ""
+            print(f"  {icon} {status} | '{case['input']}' → {actual} (expected {expected}){confidence}{stability}{note}{q_info}")
+
+            all_results.append({
+                "case_id": case_id,
+                "category": category,
+                "passed": final_passed,
+                "votes": votes if runs > 1 else None,
+            })
+
+            if final_passed:
+                cat_passed += 1
+            cat_total += 1
+
+        pct = (cat_passed / cat_total * 100) if cat_total else 0
+        flag = "" if cat_passed == cat_total else "  ← FAILURES"
+        category_stats[category] = (cat_passed, cat_total, pct)
+        print(f"    subtotal: {cat_passed}/{cat_total} ({pct:.0f}%){flag}\n")
 
     # Summary
     total = len(all_results)
@@ -214,17 +324,85 @@ async def run_suite(api_base, suite_path, runs=1):
     for cat, (p, t, pc) in sorted(category_stats.items()):
         flag = "" if p == t else " ← REVIEW"
         print(f"    {cat}: {p}/{t} ({pc:.0f}%){flag}")
+    print()
+    print(f"  {stats.summary(wall)}")
     print(f"{'='*60}\n")
 
     return passed == total
 
 
+# ---------------------------------------------------------------------------
+# Local backend (--local)
+# ---------------------------------------------------------------------------
+
+class SuiteModel:
+    """
+    Stands in for genai.Client: judges each answer as the suites expect
+    (warmup answers are right; anything unknown is wrong) and always asks
+    about the story's height, so question_keyword cases find their question.
+    """
+
+    def __init__(self, suites, model_ms):
+        self.verdicts = {}
+        for suite in suites:
+            self.verdicts.update({answer: True for answer in suite["setup"].get("warmup_answers", [])})
+            self.verdicts.update({case["input"]: case["expected_understood"] for case in suite["cases"]})
+        self.delay = model_ms / 1000
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self._generate_content), aclose=self._aclose)
+
+    async def _generate_content(self, model, contents, config):
+        await asyncio.sleep(self.delay * random.uniform(0.5, 1.5))
+        answer = contents[-1].parts[0].text
+        text = json.dumps({
+            "understood": self.verdicts.get(answer, False),
+            "feedback": "好，我們繼續。",
+            "question": "課文提到這座山的高度，請問它大約有多高呢？",
+            "phase": "factual",
+            "referenced_paragraph": None,
+        }, ensure_ascii=False)
+        return SimpleNamespace(text=text, usage_metadata=None)
+
+    async def _aclose(self):
+        pass
+
+
+@contextlib.asynccontextmanager
+async def local_backend(suites, model_ms):
+    """Serve backend/app on a free local port with SuiteModel as the model; yields the base URL."""
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+    import uvicorn
+    from app.config import settings
+    from app.main import app
+    from app.services import ai_service
+
+    settings.context_cache_enabled = False
+    settings.response_cache_backend = "none"
+    settings.question_bank_enabled = False
+    ai_service.init_client(SuiteModel(suites, model_ms))
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+        await ai_service.close_client()
+
+
 async def main():
     parser = argparse.ArgumentParser(description="Agent Accuracy Eval Runner")
     parser.add_argument("--suite", help="Path to test suite JSON")
     parser.add_argument("--all", action="store_true", help="Run all suites in tests/agent-eval/")
-    parser.add_argument("--api-base", required=True, help="Backend API base URL")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--api-base", help="Backend API base URL")
+    target.add_argument("--local", action="store_true", help="Run the backend in-process with the model stubbed")
     parser.add_argument("--runs", type=int, default=1, help="Runs per case for majority vote (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Cases/runs in flight at once (default: 1)")
+    parser.add_argument("--no-fork", action="store_true", help="Replay warmup answers for every case instead of forking")
+    parser.add_argument("--model-ms", type=float, default=800.0, help="Stub model latency with --local (default: 800)")
     args = parser.parse_args()
 
     if args.all:
@@ -233,19 +411,24 @@ async def main():
         if not suites:
             print("No test suites found in", eval_dir)
             sys.exit(1)
-        all_passed = True
-        for suite_path in suites:
-            passed = await run_suite(args.api_base, suite_path, args.runs)
-            if not passed:
-                all_passed = False
-        sys.exit(0 if all_passed else 1)
     elif args.suite:
-        passed = await run_suite(args.api_base, args.suite, args.runs)
-        sys.exit(0 if passed else 1)
+        suites = [Path(args.suite)]
     else:
         parser.print_help()
         sys.exit(1)
 
+    async with contextlib.AsyncExitStack() as stack:
+        api_base = args.api_base
+        if args.local:
+            loaded = [json.loads(path.read_text(encoding="utf-8")) for path in suites]
+            api_base = await stack.enter_async_context(local_backend(loaded, args.model_ms))
+        all_passed = True
+        for suite_path in suites:
+            passed = await run_suite(api_base, suite_path, args.runs, args.concurrency, not args.no_fork)
+            if not passed:
+                all_passed = False
+    sys.exit(0 if all_passed else 1)
+
 
 if __name__ == "__main__":
     asyncio.run(main())